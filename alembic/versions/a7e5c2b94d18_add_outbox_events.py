@@ -0,0 +1,35 @@
+"""add_outbox_events
+Revision ID: a7e5c2b94d18
+Revises: f1c3d9e27a54
+Create Date: 2026-10-19 18:22:07.481355
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7e5c2b94d18'
+down_revision = 'f1c3d9e27a54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('aggregate_type', sa.String(length=50), nullable=False),
+    sa.Column('aggregate_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('trace_id', sa.String(length=64), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_dispatched_at_id', 'outbox_events', ['dispatched_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_outbox_events_dispatched_at_id', table_name='outbox_events')
+    op.drop_table('outbox_events')
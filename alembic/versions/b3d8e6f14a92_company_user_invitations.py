@@ -0,0 +1,47 @@
+"""company_user_invitations
+Revision ID: b3d8e6f14a92
+Revises: a7e5c2b94d18
+Create Date: 2026-10-19 19:05:44.218530
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b3d8e6f14a92'
+down_revision = 'a7e5c2b94d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('company_users', sa.Column('invitation_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.alter_column('company_users', 'password_hash',
+               existing_type=sa.String(length=255),
+               nullable=True,
+               comment='NULL until the invitation is accepted')
+    op.alter_column('company_users', 'invitation_token',
+               existing_type=sa.String(length=100),
+               comment='SHA-256 of the token sent',
+               existing_nullable=True)
+    op.create_index(
+        'ix_company_users_pending_invitation_expires_at', 'company_users', ['invitation_expires_at'], unique=False,
+        postgresql_where=sa.text('invitation_token IS NOT NULL'),
+        sqlite_where=sa.text('invitation_token IS NOT NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_company_users_pending_invitation_expires_at', table_name='company_users')
+    op.alter_column('company_users', 'invitation_token',
+               existing_type=sa.String(length=100),
+               comment=None,
+               existing_comment='SHA-256 of the token sent',
+               existing_nullable=True)
+    # Pending invitations have no password; they cannot survive the downgrade
+    op.execute('DELETE FROM company_users WHERE password_hash IS NULL')
+    op.alter_column('company_users', 'password_hash',
+               existing_type=sa.String(length=255),
+               nullable=False,
+               comment=None,
+               existing_comment='NULL until the invitation is accepted')
+    op.drop_column('company_users', 'invitation_expires_at')
@@ -0,0 +1,23 @@
+"""user_login_lockout
+Revision ID: c6f2a9d37e15
+Revises: b3d8e6f14a92
+Create Date: 2026-10-19 19:48:31.602974
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c6f2a9d37e15'
+down_revision = 'b3d8e6f14a92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('failed_login_attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('users', 'locked_until')
+    op.drop_column('users', 'failed_login_attempts')
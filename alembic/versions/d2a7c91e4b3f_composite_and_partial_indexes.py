@@ -0,0 +1,65 @@
+"""composite_and_partial_indexes
+Revision ID: d2a7c91e4b3f
+Revises: 383c5f20fdcd
+Create Date: 2026-10-19 10:12:41.508217
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7c91e4b3f'
+down_revision = '383c5f20fdcd'
+branch_labels = None
+depends_on = None
+
+
+# ix_<table>_id duplicated the primary key index on every table
+PK_INDEXED_TABLES = [
+    'careers', 'cities', 'company_users', 'content_categories', 'empresas',
+    'industries', 'model_answers', 'module_tasks', 'provinces', 'regions',
+    'simulation_modules', 'simulations', 'skills_catalog', 'task_resources',
+    'universities', 'users',
+]
+
+
+def upgrade():
+    for table in PK_INDEXED_TABLES:
+        op.drop_index(op.f(f'ix_{table}_id'), table_name=table)
+
+    # Superseded by the composite indexes below (same leading column)
+    op.drop_index(op.f('ix_company_users_company_id'), table_name='company_users')
+    op.drop_index(op.f('ix_company_users_role'), table_name='company_users')
+    op.drop_index(op.f('ix_simulations_company_id'), table_name='simulations')
+    op.drop_index(op.f('ix_simulation_modules_simulation_id'), table_name='simulation_modules')
+    op.drop_index(op.f('ix_module_tasks_module_id'), table_name='module_tasks')
+
+    op.create_index('ix_company_users_company_id_is_active', 'company_users', ['company_id', 'is_active'], unique=False)
+    op.create_index(
+        'ix_company_users_active_company_id_role', 'company_users', ['company_id', 'role'], unique=False,
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active = 1'),
+    )
+    op.create_index('ix_careers_university_id_is_active', 'careers', ['university_id', 'is_active'], unique=False)
+    op.create_index('ix_universities_is_active_city_id', 'universities', ['is_active', 'city_id'], unique=False)
+    op.create_index('ix_simulations_company_id_state', 'simulations', ['company_id', 'state'], unique=False)
+    op.create_index('ix_simulation_modules_simulation_id_order', 'simulation_modules', ['simulation_id', 'order'], unique=False)
+    op.create_index('ix_module_tasks_module_id_order', 'module_tasks', ['module_id', 'order'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_module_tasks_module_id_order', table_name='module_tasks')
+    op.drop_index('ix_simulation_modules_simulation_id_order', table_name='simulation_modules')
+    op.drop_index('ix_simulations_company_id_state', table_name='simulations')
+    op.drop_index('ix_universities_is_active_city_id', table_name='universities')
+    op.drop_index('ix_careers_university_id_is_active', table_name='careers')
+    op.drop_index('ix_company_users_active_company_id_role', table_name='company_users')
+    op.drop_index('ix_company_users_company_id_is_active', table_name='company_users')
+
+    op.create_index(op.f('ix_module_tasks_module_id'), 'module_tasks', ['module_id'], unique=False)
+    op.create_index(op.f('ix_simulation_modules_simulation_id'), 'simulation_modules', ['simulation_id'], unique=False)
+    op.create_index(op.f('ix_simulations_company_id'), 'simulations', ['company_id'], unique=False)
+    op.create_index(op.f('ix_company_users_role'), 'company_users', ['role'], unique=False)
+    op.create_index(op.f('ix_company_users_company_id'), 'company_users', ['company_id'], unique=False)
+
+    for table in PK_INDEXED_TABLES:
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
@@ -0,0 +1,26 @@
+"""optimistic_concurrency_versions
+Revision ID: d9a4e7b25c31
+Revises: c6f2a9d37e15
+Create Date: 2026-10-19 21:12:05.418237
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd9a4e7b25c31'
+down_revision = 'c6f2a9d37e15'
+branch_labels = None
+depends_on = None
+
+# version_id_col de SQLAlchemy (If-Match / 409 en updates concurrentes)
+VERSIONED_TABLES = ('simulations', 'simulation_modules', 'module_tasks', 'empresas')
+
+
+def upgrade():
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+
+
+def downgrade():
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'version')
@@ -0,0 +1,26 @@
+"""simulation_clone_lineage
+Revision ID: e2b7c4f81d06
+Revises: d9a4e7b25c31
+Create Date: 2026-10-19 22:03:47.126590
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c4f81d06'
+down_revision = 'd9a4e7b25c31'
+branch_labels = None
+depends_on = None
+
+# POST /simulations/{id}/clone: origen de cada fila copiada (remapeo de ids en INSERT ... SELECT)
+CLONED_TABLES = ('simulations', 'simulation_modules', 'module_tasks')
+
+
+def upgrade():
+    for table in CLONED_TABLES:
+        op.add_column(table, sa.Column('cloned_from_id', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    for table in reversed(CLONED_TABLES):
+        op.drop_column(table, 'cloned_from_id')
@@ -0,0 +1,37 @@
+"""soft_delete_columns
+Revision ID: e4b8f2a61c07
+Revises: d2a7c91e4b3f
+Create Date: 2026-10-19 15:40:12.734105
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8f2a61c07'
+down_revision = 'd2a7c91e4b3f'
+branch_labels = None
+depends_on = None
+
+
+# (table, column): soft-delete timestamp, indexed only where set
+SOFT_DELETE_COLUMNS = [
+    ('simulations', 'deleted_at'),
+    ('empresas', 'eliminado_en'),
+    ('users', 'deleted_at'),
+]
+
+
+def upgrade():
+    for table, column in SOFT_DELETE_COLUMNS:
+        op.add_column(table, sa.Column(column, sa.DateTime(timezone=True), nullable=True))
+        op.create_index(
+            f'ix_{table}_{column}', table, [column], unique=False,
+            postgresql_where=sa.text(f'{column} IS NOT NULL'),
+            sqlite_where=sa.text(f'{column} IS NOT NULL'),
+        )
+
+
+def downgrade():
+    for table, column in reversed(SOFT_DELETE_COLUMNS):
+        op.drop_index(f'ix_{table}_{column}', table_name=table)
+        op.drop_column(table, column)
@@ -0,0 +1,48 @@
+"""add_background_jobs
+Revision ID: f1c3d9e27a54
+Revises: e4b8f2a61c07
+Create Date: 2026-10-19 17:05:48.219730
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f1c3d9e27a54'
+down_revision = 'e4b8f2a61c07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('background_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('queue', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='queued, running, done, failed'),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('run_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_background_jobs_queued_queue_run_at', 'background_jobs', ['queue', 'run_at'], unique=False,
+        postgresql_where=sa.text("status = 'queued'"),
+        sqlite_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        'ix_background_jobs_running_locked_at', 'background_jobs', ['locked_at'], unique=False,
+        postgresql_where=sa.text("status = 'running'"),
+        sqlite_where=sa.text("status = 'running'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_background_jobs_running_locked_at', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_queued_queue_run_at', table_name='background_jobs')
+    op.drop_table('background_jobs')
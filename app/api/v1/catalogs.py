@@ -2,11 +2,13 @@
 Catalogs API Endpoints
 Complete CRUD for all catalog tables
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.db.session import get_db
+from app.api.v1.conditional import check_not_modified
+from app.api.v1.params import parse_ids
+from app.db.session import get_db, get_read_db
 from app.models.catalog import (
     Region, Province, City, 
     Industry, ContentCategory, SkillCatalog
@@ -17,6 +19,8 @@ from app.schemas.catalog import (
     RegionCreate, ProvinceCreate, CityCreate,
     IndustryCreate, ContentCategoryCreate, SkillCatalogCreate
 )
+from app.schemas.common import IdBatch
+from app.repositories.batch import get_many_by_ids
 
 router = APIRouter()
 
@@ -27,15 +31,25 @@ router = APIRouter()
 
 @router.get("/regions", response_model=List[RegionOut])
 def get_regions(
+    ids: Optional[str] = Query(None, description="Comma-separated ids (1,2,3); ignores other filters"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all regions"""
+    if ids:
+        return get_many_by_ids(db, Region, parse_ids(ids))
+    
     regions = db.query(Region).filter(Region.is_active == True).offset(skip).limit(limit).all()
     return regions
 
 
+@router.post("/regions/batch", response_model=List[RegionOut])
+def get_regions_batch(batch: IdBatch, db: Session = Depends(get_read_db)):
+    """Get regions by id list (single query, request order preserved)"""
+    return get_many_by_ids(db, Region, batch.ids)
+
+
 @router.post("/regions", response_model=RegionOut)
 def create_region(region: RegionCreate, db: Session = Depends(get_db)):
     """Create new region"""
@@ -47,7 +61,7 @@ def create_region(region: RegionCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/regions/{region_id}", response_model=RegionOut)
-def get_region(region_id: int, db: Session = Depends(get_db)):
+def get_region(region_id: int, db: Session = Depends(get_read_db)):
     """Get region by ID"""
     region = db.query(Region).filter(Region.id == region_id).first()
     if not region:
@@ -62,11 +76,15 @@ def get_region(region_id: int, db: Session = Depends(get_db)):
 @router.get("/provinces", response_model=List[ProvinceOut])
 def get_provinces(
     region_id: int = None,
+    ids: Optional[str] = Query(None, description="Comma-separated ids (1,2,3); ignores other filters"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all provinces, optionally filtered by region"""
+    if ids:
+        return get_many_by_ids(db, Province, parse_ids(ids))
+    
     query = db.query(Province).filter(Province.is_active == True)
     
     if region_id:
@@ -76,6 +94,12 @@ def get_provinces(
     return provinces
 
 
+@router.post("/provinces/batch", response_model=List[ProvinceOut])
+def get_provinces_batch(batch: IdBatch, db: Session = Depends(get_read_db)):
+    """Get provinces by id list (single query, request order preserved)"""
+    return get_many_by_ids(db, Province, batch.ids)
+
+
 @router.post("/provinces", response_model=ProvinceOut)
 def create_province(province: ProvinceCreate, db: Session = Depends(get_db)):
     """Create new province"""
@@ -87,7 +111,7 @@ def create_province(province: ProvinceCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/provinces/{province_id}", response_model=ProvinceOut)
-def get_province(province_id: int, db: Session = Depends(get_db)):
+def get_province(province_id: int, db: Session = Depends(get_read_db)):
     """Get province by ID"""
     province = db.query(Province).filter(Province.id == province_id).first()
     if not province:
@@ -102,11 +126,15 @@ def get_province(province_id: int, db: Session = Depends(get_db)):
 @router.get("/cities", response_model=List[CityOut])
 def get_cities(
     province_id: int = None,
+    ids: Optional[str] = Query(None, description="Comma-separated ids (1,2,3); ignores other filters"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all cities, optionally filtered by province"""
+    if ids:
+        return get_many_by_ids(db, City, parse_ids(ids))
+    
     query = db.query(City).filter(City.is_active == True)
     
     if province_id:
@@ -116,6 +144,12 @@ def get_cities(
     return cities
 
 
+@router.post("/cities/batch", response_model=List[CityOut])
+def get_cities_batch(batch: IdBatch, db: Session = Depends(get_read_db)):
+    """Get cities by id list (single query, request order preserved)"""
+    return get_many_by_ids(db, City, batch.ids)
+
+
 @router.post("/cities", response_model=CityOut)
 def create_city(city: CityCreate, db: Session = Depends(get_db)):
     """Create new city"""
@@ -127,7 +161,7 @@ def create_city(city: CityCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/cities/{city_id}", response_model=CityOut)
-def get_city(city_id: int, db: Session = Depends(get_db)):
+def get_city(city_id: int, db: Session = Depends(get_read_db)):
     """Get city by ID"""
     city = db.query(City).filter(City.id == city_id).first()
     if not city:
@@ -142,11 +176,15 @@ def get_city(city_id: int, db: Session = Depends(get_db)):
 @router.get("/industries", response_model=List[IndustryOut])
 def get_industries(
     parent_id: int = None,
+    ids: Optional[str] = Query(None, description="Comma-separated ids (1,2,3); ignores other filters"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all industries, optionally filtered by parent"""
+    if ids:
+        return get_many_by_ids(db, Industry, parse_ids(ids))
+    
     query = db.query(Industry).filter(Industry.is_active == True)
     
     if parent_id is not None:
@@ -156,6 +194,12 @@ def get_industries(
     return industries
 
 
+@router.post("/industries/batch", response_model=List[IndustryOut])
+def get_industries_batch(batch: IdBatch, db: Session = Depends(get_read_db)):
+    """Get industries by id list (single query, request order preserved)"""
+    return get_many_by_ids(db, Industry, batch.ids)
+
+
 @router.post("/industries", response_model=IndustryOut)
 def create_industry(industry: IndustryCreate, db: Session = Depends(get_db)):
     """Create new industry"""
@@ -167,7 +211,7 @@ def create_industry(industry: IndustryCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/industries/{industry_id}", response_model=IndustryOut)
-def get_industry(industry_id: int, db: Session = Depends(get_db)):
+def get_industry(industry_id: int, db: Session = Depends(get_read_db)):
     """Get industry by ID"""
     industry = db.query(Industry).filter(Industry.id == industry_id).first()
     if not industry:
@@ -182,11 +226,15 @@ def get_industry(industry_id: int, db: Session = Depends(get_db)):
 @router.get("/categories", response_model=List[ContentCategoryOut])
 def get_categories(
     parent_id: int = None,
+    ids: Optional[str] = Query(None, description="Comma-separated ids (1,2,3); ignores other filters"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all content categories, optionally filtered by parent"""
+    if ids:
+        return get_many_by_ids(db, ContentCategory, parse_ids(ids))
+    
     query = db.query(ContentCategory).filter(ContentCategory.is_active == True)
     
     if parent_id is not None:
@@ -196,6 +244,12 @@ def get_categories(
     return categories
 
 
+@router.post("/categories/batch", response_model=List[ContentCategoryOut])
+def get_categories_batch(batch: IdBatch, db: Session = Depends(get_read_db)):
+    """Get content categories by id list (single query, request order preserved)"""
+    return get_many_by_ids(db, ContentCategory, batch.ids)
+
+
 @router.post("/categories", response_model=ContentCategoryOut)
 def create_category(category: ContentCategoryCreate, db: Session = Depends(get_db)):
     """Create new content category"""
@@ -207,7 +261,7 @@ def create_category(category: ContentCategoryCreate, db: Session = Depends(get_d
 
 
 @router.get("/categories/{category_id}", response_model=ContentCategoryOut)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+def get_category(category_id: int, db: Session = Depends(get_read_db)):
     """Get content category by ID"""
     category = db.query(ContentCategory).filter(ContentCategory.id == category_id).first()
     if not category:
@@ -224,11 +278,15 @@ def get_skills(
     category: str = None,
     parent_id: int = None,
     market_demand: str = None,
+    ids: Optional[str] = Query(None, description="Comma-separated ids (1,2,3); ignores other filters"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all skills, with multiple filters"""
+    if ids:
+        return get_many_by_ids(db, SkillCatalog, parse_ids(ids))
+    
     query = db.query(SkillCatalog).filter(SkillCatalog.is_active == True)
     
     if category:
@@ -244,6 +302,12 @@ def get_skills(
     return skills
 
 
+@router.post("/skills/batch", response_model=List[SkillCatalogOut])
+def get_skills_batch(batch: IdBatch, db: Session = Depends(get_read_db)):
+    """Get skills by id list (single query, request order preserved)"""
+    return get_many_by_ids(db, SkillCatalog, batch.ids)
+
+
 @router.post("/skills", response_model=SkillCatalogOut)
 def create_skill(skill: SkillCatalogCreate, db: Session = Depends(get_db)):
     """Create new skill"""
@@ -255,8 +319,10 @@ def create_skill(skill: SkillCatalogCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/skills/{skill_id}", response_model=SkillCatalogOut)
-def get_skill(skill_id: int, db: Session = Depends(get_db)):
-    """Get skill by ID"""
+def get_skill(skill_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    """Get skill by ID (304 if the client copy is current)"""
+    check_not_modified(request, response, db, SkillCatalog, [SkillCatalog.id == skill_id],
+                       not_found_detail="Skill not found")
     skill = db.query(SkillCatalog).filter(SkillCatalog.id == skill_id).first()
     if not skill:
         raise HTTPException(status_code=404, detail="Skill not found")
@@ -2,23 +2,30 @@
 Company Users API Endpoints
 CRUD operations for company users with role-based access
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
-from passlib.context import CryptContext
+from typing import List, Optional
 
+from app.api.v1.conditional import check_not_modified
+from app.core import security
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.usuarios_empresa import CompanyUser
 from app.models.empresa import Empresa
+from app.repositories.unique import commit_unique, raise_unique_violation
+from app.repositories.updates import commit_keeping_state, update_returning
 from app.schemas.usuarios_empresa import (
     CompanyUserCreate, CompanyUserUpdate, CompanyUserOut,
-    CompanyUserInvite, CompanyUserList
+    CompanyUserInvite, CompanyUserList, CompanyUserBulkInvite,
+    CompanyUserInvitationAccept, CompanyUserInvitationOut
 )
+from app.services import invitations, plan_limits
 
 router = APIRouter()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+COMPANY_USER_UNIQUE_MESSAGES = {"email": "Email already registered"}
 
 
 # ============================================
@@ -27,12 +34,12 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
-    return pwd_context.hash(password)
+    return security.hash_password(password)
 
 
 def verify_company_exists(company_id: int, db: Session) -> Empresa:
     """Verify company exists"""
-    company = db.query(Empresa).filter(Empresa.id == company_id).first()
+    company = db.query(Empresa).filter(Empresa.id == company_id, Empresa.eliminado_en.is_(None)).first()
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,17 +101,6 @@ def create_company_user(
     # Verify company exists
     verify_company_exists(company_id, db)
     
-    # Check if email already exists
-    existing_user = db.query(CompanyUser).filter(
-        CompanyUser.email == user_data.email
-    ).first()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     # Hash password
     hashed_password = hash_password(user_data.password)
     
@@ -115,29 +111,114 @@ def create_company_user(
     
     db_user = CompanyUser(**user_dict)
     
+    # Plan limit: lock the company row right before inserting the admin
+    if db_user.role in plan_limits.ADMIN_ROLES:
+        plan_limits.ensure_admin_seat(db, company_id)
+    
     db.add(db_user)
-    db.commit()
+    # Email uniqueness is enforced by the unique index (no SELECT first)
+    commit_unique(db, COMPANY_USER_UNIQUE_MESSAGES)
     db.refresh(db_user)
+    plan_limits.usage_cache.invalidate(company_id)
     
     return db_user
 
 
+@router.post(
+    "/companies/{company_id}/invitations",
+    response_model=CompanyUserInvitationOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def invite_company_user(
+    company_id: int,
+    invite: CompanyUserInvite,
+    invited_by_user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Invite a user to the company
+    
+    The user is created without a password; the returned token (valid for
+    INVITATION_EXPIRE_HOURS) is shown only once and must be sent to the
+    invitee, who sets a password with /company-users/invitations/accept.
+    
+    - **company_id**: Company ID
+    - **invite**: Email, name, role and position of the invitee
+    """
+    return invite_company_users(
+        company_id, CompanyUserBulkInvite(invitations=[invite]), invited_by_user_id, db
+    )[0]
+
+
+@router.post(
+    "/companies/{company_id}/invitations/bulk",
+    response_model=List[CompanyUserInvitationOut],
+    status_code=status.HTTP_201_CREATED,
+)
+def invite_company_users(
+    company_id: int,
+    bulk: CompanyUserBulkInvite,
+    invited_by_user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Invite several users in one transaction (all or none)
+    
+    - **company_id**: Company ID
+    - **bulk**: Up to INVITATION_BULK_MAX invitations
+    """
+    if len(bulk.invitations) > settings.INVITATION_BULK_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.INVITATION_BULK_MAX} invitations per request"
+        )
+    verify_company_exists(company_id, db)
+    
+    try:
+        invited = invitations.invite_users(db, company_id, bulk.invitations, invited_by_user_id)
+    except IntegrityError as exc:
+        raise_unique_violation(db, exc, COMPANY_USER_UNIQUE_MESSAGES)
+    # Rows were loaded by INSERT ... RETURNING; no refresh per invitee
+    commit_keeping_state(db)
+    plan_limits.usage_cache.invalidate(company_id)
+    
+    return [
+        CompanyUserInvitationOut(user=CompanyUserOut.model_validate(user), invitation_token=token)
+        for user, token in invited
+    ]
+
+
+@router.post("/company-users/invitations/accept", response_model=CompanyUserOut)
+def accept_invitation(
+    acceptance: CompanyUserInvitationAccept,
+    db: Session = Depends(get_db)
+):
+    """
+    Accept an invitation: set the password and activate the account
+    
+    - **token**: Token received with the invitation
+    - **password**: New password
+    """
+    return invitations.accept_invitation(db, acceptance.token, acceptance.password)
+
+
 @router.get("/companies/{company_id}/users/{user_id}", response_model=CompanyUserOut)
 def get_company_user(
     company_id: int,
     user_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
-    Get specific company user
+    Get specific company user (304 if the client copy is current)
     
     - **company_id**: Company ID
     - **user_id**: User ID
     """
-    user = db.query(CompanyUser).filter(
-        CompanyUser.id == user_id,
-        CompanyUser.company_id == company_id
-    ).first()
+    criteria = [CompanyUser.id == user_id, CompanyUser.company_id == company_id]
+    check_not_modified(request, response, db, CompanyUser, criteria, not_found_detail="User not found")
+    user = db.query(CompanyUser).filter(*criteria).first()
     
     if not user:
         raise HTTPException(
@@ -162,25 +243,33 @@ def update_company_user(
     - **user_id**: User ID
     - **user_data**: Fields to update
     """
-    user = db.query(CompanyUser).filter(
-        CompanyUser.id == user_id,
-        CompanyUser.company_id == company_id
-    ).first()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Update fields
     update_data = user_data.model_dump(exclude_unset=True)
+    criteria = [CompanyUser.id == user_id, CompanyUser.company_id == company_id]
     
-    for field, value in update_data.items():
-        setattr(user, field, value)
+    # Plan limit: promotions and reactivations take a new admin seat
+    if "role" in update_data or "is_active" in update_data:
+        current = db.execute(
+            select(CompanyUser.role, CompanyUser.is_active).where(*criteria).with_for_update()
+        ).first()
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        was_admin = current.is_active and current.role in plan_limits.ADMIN_ROLES
+        is_admin = (
+            update_data.get("is_active", current.is_active)
+            and update_data.get("role", current.role) in plan_limits.ADMIN_ROLES
+        )
+        if is_admin and not was_admin:
+            plan_limits.ensure_admin_seat(db, company_id)
     
-    db.commit()
-    db.refresh(user)
+    user = update_returning(
+        db, CompanyUser, criteria, update_data,
+        not_found_detail="User not found",
+        unique_messages=COMPANY_USER_UNIQUE_MESSAGES,
+    )
+    plan_limits.usage_cache.invalidate(company_id)
     
     return user
 
@@ -212,6 +301,7 @@ def delete_company_user(
     user.is_active = False
     
     db.commit()
+    plan_limits.usage_cache.invalidate(company_id)
     
     return None
 
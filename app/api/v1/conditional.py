@@ -0,0 +1,152 @@
+"""
+Conditional GETs (ETag / Last-Modified) for single-entity endpoints
+
+The validators come from the entity's version columns (updated_at or
+actualizado_en, falling back to the creation timestamp for rows never
+updated), read with a one-row SELECT before the entity and its
+relationships are loaded. A matching If-None-Match / If-Modified-Since
+answers 304 with no body, so polling clients skip both the relationship
+loads and the serialization.
+
+Nested content must bump the parent's version column when it changes,
+or clients keep the cached body.
+
+Models with a `version_id_col` get ETags of the form "<version>.<digest>";
+updates accept them back in If-Match (see if_match_versions), and only the
+version part is compared, so counters maintained by the server never make
+an edit conflict.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import sha256
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.repositories.updates import version_column
+
+UPDATED_COLUMNS = ("updated_at", "actualizado_en")
+CREATED_COLUMNS = ("created_at", "creado_en")
+
+
+def _column(model, names: Tuple[str, ...]):
+    for name in names:
+        if hasattr(model, name):
+            return getattr(model, name)
+    raise AttributeError(f"{model.__name__} has none of {', '.join(names)}")
+
+
+def version_expression(model):
+    """COALESCE(updated, created) for `model`"""
+    return func.coalesce(_column(model, UPDATED_COLUMNS), _column(model, CREATED_COLUMNS))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devuelve datetimes naive (en UTC)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def make_etag(model, entity_id: int, modified: datetime, row_version: Optional[int] = None) -> str:
+    digest = sha256(f"{model.__tablename__}:{entity_id}:{modified.isoformat()}".encode()).hexdigest()
+    if row_version is None:
+        return f'"{digest[:32]}"'
+    return f'"{row_version}.{digest[:16]}"'
+
+
+def validators(model, entity_id: int, modified: Optional[datetime], row_version: Optional[int] = None) -> Dict[str, str]:
+    """ETag, Last-Modified and Cache-Control headers for one row"""
+    headers = {"Cache-Control": "no-cache"}
+    if modified is not None:
+        modified = _as_utc(modified)
+        headers["ETag"] = make_etag(model, entity_id, modified, row_version)
+        headers["Last-Modified"] = format_datetime(modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def set_validators(response: Response, model, row) -> None:
+    """Validators of a row just written (e.g. by update_returning), for chained edits"""
+    modified = getattr(row, _column(model, UPDATED_COLUMNS).key) or getattr(row, _column(model, CREATED_COLUMNS).key)
+    version = version_column(model)
+    row_version = getattr(row, version.key) if version is not None else None
+    response.headers.update(validators(model, row.id, modified, row_version))
+
+
+def if_match_versions(request: Request) -> Optional[List[int]]:
+    """
+    Row versions named by If-Match, for update_returning(expected_versions=...)
+
+    None when the header is absent or "*" (no version check). Weak or foreign
+    tags never match (strong comparison), so they yield no versions: the
+    update then answers 409.
+    """
+    if_match = request.headers.get("if-match")
+    if if_match is None:
+        return None
+    versions = []
+    for tag in (part.strip() for part in if_match.split(",")):
+        if tag == "*":
+            return None
+        number, dot, _ = tag.strip('"').partition(".")
+        if tag.startswith('"') and dot and number.isdigit():
+            versions.append(int(number))
+    return versions
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def _not_modified_since(if_modified_since: str, modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return modified.replace(microsecond=0) <= since
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    db: Session,
+    model,
+    criteria: Sequence,
+    not_found_detail: str,
+) -> None:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the row's version
+
+    Sets ETag and Last-Modified on `response` for the 200 path.
+
+    Raises:
+        HTTPException 404 if no row matches `criteria`
+        HTTPException 304 (empty body, same validators) if the client copy is current
+    """
+    version = version_column(model)
+    columns = [model.id, version_expression(model)] + ([version] if version is not None else [])
+    row = db.execute(select(*columns).where(*criteria)).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+
+    modified = _as_utc(row[1]) if row[1] is not None else None
+    headers = validators(model, row[0], modified, row[2] if version is not None else None)
+    response.headers.update(headers)
+    if modified is None:
+        return
+
+    if_none_match: Optional[str] = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present
+        not_modified = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, modified)
+
+    if not_modified:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -1,65 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.db.session import get_db
+from app.api.v1.auth import get_current_user
+from app.api.v1.conditional import check_not_modified, if_match_versions, set_validators
+from app.api.v1.params import parse_ids
+from app.core.config import settings
+from app.db.session import get_db, get_read_db
 from app.models.empresa import Empresa
-from app.schemas.empresa import EmpresaCreate, EmpresaUpdate, EmpresaOut
+from app.repositories.batch import get_many_by_ids
+from app.repositories.unique import commit_unique
+from app.repositories.updates import update_returning
+from app.schemas.common import IdBatch
+from app.schemas.empresa import EmpresaCreate, EmpresaPlanUpdate, EmpresaUpdate, EmpresaOut
+from app.services import archival, outbox, plan_limits
 
 router = APIRouter()
 
+EMPRESA_UNIQUE_MESSAGES = {"nombre_empresa": "Empresa ya existe", "slug": "Empresa ya existe"}
+
+NO_ELIMINADA = Empresa.eliminado_en.is_(None)
+
+
+def require_plan_admin(current_user=Depends(get_current_user)):
+    admins = {name.strip() for name in settings.PLAN_ADMINS.split(",") if name.strip()}
+    if current_user.username not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Solo administradores de planes")
+    return current_user
+
 @router.get("/", response_model=List[EmpresaOut])
 def listar_empresas(
     skip: int = 0,
     limit: int = 100,
     tipo_empresa: Optional[str] = None,
-    db: Session = Depends(get_db)
+    ids: Optional[str] = Query(None, description="Ids separados por coma (1,2,3); ignora otros filtros"),
+    db: Session = Depends(get_read_db)
 ):
-    query = db.query(Empresa)
+    if ids:
+        return get_many_by_ids(db, Empresa, parse_ids(ids), criteria=[NO_ELIMINADA])
+    query = db.query(Empresa).filter(NO_ELIMINADA)
     if tipo_empresa:
         query = query.filter(Empresa.tipo_empresa == tipo_empresa)
     empresas = query.offset(skip).limit(limit).all()
     return empresas
 
+@router.post("/batch", response_model=List[EmpresaOut])
+def obtener_empresas_lote(lote: IdBatch, db: Session = Depends(get_read_db)):
+    return get_many_by_ids(db, Empresa, lote.ids, criteria=[NO_ELIMINADA])
+
 @router.get("/{id}", response_model=EmpresaOut)
-def obtener_empresa(id: int, db: Session = Depends(get_db)):
-    empresa = db.query(Empresa).filter(Empresa.id == id).first()
+def obtener_empresa(id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    # ETag/Last-Modified desde actualizado_en: 304 sin cargar ni serializar la empresa
+    check_not_modified(request, response, db, Empresa, [Empresa.id == id, NO_ELIMINADA],
+                       not_found_detail=f"Empresa {id} no encontrada")
+    empresa = db.query(Empresa).filter(Empresa.id == id, NO_ELIMINADA).first()
     if not empresa:
         raise HTTPException(status_code=404, detail=f"Empresa {id} no encontrada")
     return empresa
 
 @router.post("/", response_model=EmpresaOut, status_code=201)
 def crear_empresa(empresa_data: EmpresaCreate, db: Session = Depends(get_db)):
-    empresa_existente = db.query(Empresa).filter(
-        Empresa.nombre_empresa == empresa_data.nombre_empresa
-    ).first()
-    if empresa_existente:
-        raise HTTPException(status_code=400, detail="Empresa ya existe")
-    
     nueva_empresa = Empresa(**empresa_data.model_dump(exclude_unset=True))
     db.add(nueva_empresa)
-    db.commit()
+    # Unicidad garantizada por los índices únicos (sin SELECT previo)
+    commit_unique(db, EMPRESA_UNIQUE_MESSAGES)
     db.refresh(nueva_empresa)
     return nueva_empresa
 
 @router.put("/{id}", response_model=EmpresaOut)
-def actualizar_empresa(id: int, empresa_data: EmpresaUpdate, db: Session = Depends(get_db)):
-    empresa = db.query(Empresa).filter(Empresa.id == id).first()
-    if not empresa:
-        raise HTTPException(status_code=404, detail=f"Empresa {id} no encontrada")
-    
+def actualizar_empresa(
+    id: int,
+    empresa_data: EmpresaUpdate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    # Un único UPDATE ... RETURNING (404 si no existe); con If-Match, 409 si otro la cambió antes
     update_data = empresa_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(empresa, field, value)
-    db.commit()
-    db.refresh(empresa)
+    empresa = update_returning(
+        db, Empresa, [Empresa.id == id, NO_ELIMINADA],
+        update_data,
+        not_found_detail=f"Empresa {id} no encontrada",
+        unique_messages=EMPRESA_UNIQUE_MESSAGES,
+        expected_versions=if_match_versions(request),
+    )
+    set_validators(response, Empresa, empresa)
+    return empresa
+
+@router.put("/{id}/plan", response_model=EmpresaOut, dependencies=[Depends(require_plan_admin)])
+def actualizar_plan_empresa(id: int, plan_data: EmpresaPlanUpdate, response: Response, db: Session = Depends(get_db)):
+    # Límites de plan fuera de EmpresaUpdate: no los cambia cualquier cliente del PUT público
+    empresa = update_returning(
+        db, Empresa, [Empresa.id == id, NO_ELIMINADA],
+        plan_data.model_dump(exclude_unset=True),
+        not_found_detail=f"Empresa {id} no encontrada",
+    )
+    # Un cambio de plan deja obsoleto el estado "lleno" cacheado
+    plan_limits.usage_cache.invalidate(id)
+    set_validators(response, Empresa, empresa)
     return empresa
 
 @router.delete("/{id}", status_code=204)
 def eliminar_empresa(id: int, db: Session = Depends(get_db)):
-    empresa = db.query(Empresa).filter(Empresa.id == id).first()
-    if not empresa:
-        raise HTTPException(status_code=404, detail=f"Empresa {id} no encontrada")
-    db.delete(empresa)
+    # Soft delete: la empresa, sus simulaciones y usuarios se purgan luego por lotes
+    update_returning(
+        db, Empresa, [Empresa.id == id, NO_ELIMINADA],
+        {"eliminado_en": func.now(), "esta_activo": False},
+        not_found_detail=f"Empresa {id} no encontrada",
+        commit=False,
+        event=outbox.DELETED,
+    )
+    archival.archive_company_content(db, id)
     db.commit()
     return None
@@ -0,0 +1,70 @@
+"""
+?include= support for list endpoints
+Each endpoint declares a whitelist of relationships that clients may expand;
+requested ones are eager-loaded in batch, the rest are never touched.
+"""
+from typing import Iterable, List, Optional, Set, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.orm import joinedload, selectinload
+
+
+class Includes:
+    """
+    Whitelist of expandable relationships for one endpoint
+
+    Example:
+        SIMULATION_INCLUDES = Includes(company=Simulation.company)
+        requested = SIMULATION_INCLUDES.parse("company")
+        query.options(*SIMULATION_INCLUDES.options(requested))
+    """
+
+    def __init__(self, **relationships):
+        self.relationships = relationships
+
+    def parse(self, include: Optional[str]) -> Set[str]:
+        """Parse ?include=a,b and reject names outside the whitelist (400)"""
+        if not include:
+            return set()
+        requested = {name.strip() for name in include.split(",") if name.strip()}
+        unknown = requested - self.relationships.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid include: {', '.join(sorted(unknown))}. "
+                       f"Allowed: {', '.join(sorted(self.relationships))}"
+            )
+        return requested
+
+    def options(self, requested: Set[str]) -> list:
+        """
+        Loader options for a query
+
+        Collections use selectinload (one extra IN query per relationship),
+        many-to-one uses joinedload (same query).
+        """
+        opts = []
+        for name in requested:
+            attr = self.relationships[name]
+            if attr.property.uselist:
+                opts.append(selectinload(attr))
+            else:
+                opts.append(joinedload(attr))
+        return opts
+
+    def serialize(self, schema: Type[BaseModel], rows: Iterable, requested: Set[str]) -> List[BaseModel]:
+        """
+        Validate rows into `schema` without reading non-requested relationships
+
+        Skipped relationships are left unset, so no lazy load is ever emitted
+        for them; routes declare response_model_exclude_unset=True so the key
+        is omitted instead of coming back as null.
+        """
+        skipped = {name for name in self.relationships if name not in requested}
+        fields = [name for name in schema.model_fields if name not in skipped]
+        items = []
+        for row in rows:
+            data = {name: getattr(row, name) for name in fields if hasattr(row, name)}
+            items.append(schema.model_validate(data, from_attributes=True))
+        return items
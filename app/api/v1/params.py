@@ -0,0 +1,30 @@
+"""
+Shared query parameter parsing for API routers
+"""
+from typing import List
+
+from fastapi import HTTPException, status
+
+from app.schemas.common import MAX_BATCH_IDS
+
+
+def parse_ids(ids: str) -> List[int]:
+    """
+    Parse a comma-separated id list (?ids=1,2,3)
+
+    Raises:
+        HTTPException 400: on non-integer values or more than MAX_BATCH_IDS ids
+    """
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many ids (max {MAX_BATCH_IDS}); use POST /batch instead"
+        )
+    return parsed
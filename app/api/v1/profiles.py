@@ -0,0 +1,40 @@
+"""
+Request Profiles API
+Lists and downloads the profiles captured by ProfilingMiddleware (admins only)
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.api.v1.auth import get_current_user
+from app.core.profiling import admin_usernames, store
+
+router = APIRouter()
+
+
+def require_profiling_admin(current_user=Depends(get_current_user)):
+    if current_user.username not in admin_usernames():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling is restricted to admins"
+        )
+    return current_user
+
+
+@router.get("/profiles", response_model=List[dict], dependencies=[Depends(require_profiling_admin)])
+def list_profiles(limit: int = 50):
+    """List stored profiles, newest first"""
+    return [vars(meta) for meta in store.list()[:limit]]
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profiling_admin)])
+def download_profile(profile_id: str):
+    """Download a profile as collapsed stacks (flamegraph.pl / speedscope)"""
+    path = store.collapsed_path(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.collapsed")
@@ -2,21 +2,34 @@
 Simulations API
 Core logic for creating and managing educational simulations
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.db.session import get_db
+from app.api.v1.conditional import check_not_modified, if_match_versions, set_validators
+from app.api.v1.includes import Includes
+from app.db.session import get_db, get_read_db
 from app.models.simulations import (
     Simulation, SimulationModule, ModuleTask, 
     TaskResource, ModelAnswer
 )
+from app.repositories.unique import commit_unique
+from app.repositories.updates import commit_keeping_state, update_returning
 from app.schemas.simulations import (
-    SimulationCreate, SimulationOut, SimulationList, SimulationUpdate
+    SimulationCreate, SimulationOut, SimulationList, SimulationUpdate, SimulationClone,
+    SimulationModuleAdd, SimulationModuleEdit, SimulationModuleOut,
+    ModuleTaskAdd, ModuleTaskEdit, ModuleTaskOut,
+    NodeOrder, SimulationStructurePatch
 )
+from app.services import company_metrics, outbox, simulation_cloning, simulation_structure
 
 router = APIRouter()
 
+SIMULATION_INCLUDES = Includes(company=Simulation.company, category=Simulation.category)
+
+SIMULATION_UNIQUE_MESSAGES = {"slug": "Slug already exists"}
+
 # ============================
 # HELPER FUNCTIONS
 # ============================
@@ -63,10 +76,6 @@ def create_simulation(sim_data: SimulationCreate, db: Session = Depends(get_db))
     Create a new simulation.
     Can handle nested creation (Modules -> Tasks) if provided.
     """
-    # Check slug uniqueness
-    if db.query(Simulation).filter(Simulation.slug == sim_data.slug).first():
-        raise HTTPException(status_code=400, detail="Slug already exists")
-
     # Extract nested data
     sim_dict = sim_data.model_dump()
     modules_data = sim_dict.pop("modules", [])
@@ -74,7 +83,9 @@ def create_simulation(sim_data: SimulationCreate, db: Session = Depends(get_db))
     # Create base simulation
     db_sim = Simulation(**sim_dict)
     db.add(db_sim)
-    db.commit()
+    company_metrics.on_simulation_created(db, db_sim)
+    # Slug uniqueness is enforced by the unique index (no SELECT first)
+    commit_unique(db, SIMULATION_UNIQUE_MESSAGES)
     db.refresh(db_sim)
     
     # Handle nested creation
@@ -84,17 +95,23 @@ def create_simulation(sim_data: SimulationCreate, db: Session = Depends(get_db))
         
     return db_sim
 
-@router.get("", response_model=List[SimulationList])
+@router.get("", response_model=List[SimulationList], response_model_exclude_unset=True)
 def list_simulations(
     company_id: int = None,
     category_id: int = None,
     state: str = None,
+    include: Optional[str] = Query(None, description="Related objects to embed: company,category"),
     skip: int = 0, 
     limit: int = 20, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """List simulations with filters"""
-    query = db.query(Simulation)
+    requested = SIMULATION_INCLUDES.parse(include)
+    query = (
+        db.query(Simulation)
+        .options(*SIMULATION_INCLUDES.options(requested))
+        .filter(Simulation.deleted_at.is_(None))
+    )
     
     if company_id:
         query = query.filter(Simulation.company_id == company_id)
@@ -103,44 +120,203 @@ def list_simulations(
     if state:
         query = query.filter(Simulation.state == state)
         
-    return query.offset(skip).limit(limit).all()
+    sims = query.offset(skip).limit(limit).all()
+    return SIMULATION_INCLUDES.serialize(SimulationList, sims, requested)
 
 @router.get("/{id_or_slug}", response_model=SimulationOut)
-def get_simulation(id_or_slug: str, db: Session = Depends(get_db)):
-    """Get full simulation details by ID or Slug"""
-    query = db.query(Simulation)
-    
+def get_simulation(id_or_slug: str, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    """Get full simulation details by ID or Slug (304 if the client copy is current)"""
     if id_or_slug.isdigit():
-        sim = query.filter(Simulation.id == int(id_or_slug)).first()
+        criteria = [Simulation.id == int(id_or_slug), Simulation.deleted_at.is_(None)]
     else:
-        sim = query.filter(Simulation.slug == id_or_slug).first()
-        
+        criteria = [Simulation.slug == id_or_slug, Simulation.deleted_at.is_(None)]
+    check_not_modified(request, response, db, Simulation, criteria, not_found_detail="Simulation not found")
+    
+    sim = db.query(Simulation).filter(*criteria).first()
     if not sim:
         raise HTTPException(status_code=404, detail="Simulation not found")
         
     return sim
 
+@router.post("/{id}/clone", response_model=SimulationOut, status_code=201)
+def clone_simulation(id: int, clone: SimulationClone, db: Session = Depends(get_db)):
+    """
+    Copy a simulation with its whole tree as a new draft (e.g. a per-language template).
+    Five INSERT ... SELECT statements inside the database, whatever the tree size.
+    """
+    new_id = simulation_cloning.clone_simulation(db, id, **clone.model_dump())
+    db.commit()
+    return db.get(Simulation, new_id)
+
 @router.patch("/{id}", response_model=SimulationOut)
-def update_simulation(id: int, update_data: SimulationUpdate, db: Session = Depends(get_db)):
-    """Update simulation basic info"""
-    sim = db.query(Simulation).filter(Simulation.id == id).first()
-    if not sim:
-        raise HTTPException(status_code=404, detail="Simulation not found")
+def update_simulation(
+    id: int,
+    update_data: SimulationUpdate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """
+    Update simulation basic info with a single UPDATE ... RETURNING
+    With If-Match (the ETag of a GET) the update only applies to that version; 409 otherwise.
+    """
+    values = update_data.model_dump(exclude_unset=True)
+    criteria = [Simulation.id == id, Simulation.deleted_at.is_(None)]
     
-    for key, value in update_data.model_dump(exclude_unset=True).items():
-        setattr(sim, key, value)
-        
-    db.commit()
-    db.refresh(sim)
+    if "state" in values:
+        # State transitions feed company metrics / plan limits: read the old state under lock
+        current = db.execute(
+            select(Simulation.company_id, Simulation.state)
+            .where(*criteria)
+            .with_for_update()
+        ).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Simulation not found")
+        company_metrics.on_simulation_state_changed(db, current.company_id, current.state, values["state"])
+    
+    sim = update_returning(
+        db, Simulation, criteria, values,
+        not_found_detail="Simulation not found",
+        unique_messages=SIMULATION_UNIQUE_MESSAGES,
+        expected_versions=if_match_versions(request),
+    )
+    set_validators(response, Simulation, sim)
     return sim
 
 @router.delete("/{id}", status_code=204)
 def delete_simulation(id: int, db: Session = Depends(get_db)):
-    """Delete simulation and all its content (modules, tasks)"""
-    sim = db.query(Simulation).filter(Simulation.id == id).first()
-    if not sim:
-        raise HTTPException(status_code=404, detail="Simulation not found")
-        
-    db.delete(sim)
+    """
+    Soft-delete a simulation (single UPDATE).
+    Modules and tasks are purged later in batches by app.services.archival.
+    """
+    sim = update_returning(
+        db, Simulation, [Simulation.id == id, Simulation.deleted_at.is_(None)],
+        {"deleted_at": func.now()},
+        not_found_detail="Simulation not found",
+        commit=False,
+        event=outbox.DELETED,
+    )
+    company_metrics.on_simulation_deleted(db, sim)
     db.commit()
     return None
+
+# ============================
+# STRUCTURE (modules / tasks)
+# ============================
+# Every structural edit bumps the simulation's version: If-Match takes the
+# ETag of GET /simulations/{id} and a stale one gets 409.
+
+@router.post("/{simulation_id}/modules", response_model=SimulationModuleOut, status_code=201)
+def add_module(simulation_id: int, module: SimulationModuleAdd, request: Request, db: Session = Depends(get_db)):
+    """Add a module (with optional tasks) at `position`, without renumbering its siblings"""
+    data = module.model_dump(exclude={"position"})
+    db_module = simulation_structure.add_module(
+        db, simulation_id, data, module.position, expected_versions=if_match_versions(request)
+    )
+    db.commit()
+    return db_module
+
+@router.patch("/{simulation_id}/modules/{module_id}", response_model=SimulationModuleOut)
+def update_module(
+    simulation_id: int,
+    module_id: int,
+    update_data: SimulationModuleEdit,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Update module fields with a single UPDATE ... RETURNING"""
+    db_module = simulation_structure.update_module(
+        db, simulation_id, module_id, update_data.model_dump(exclude_unset=True),
+        expected_versions=if_match_versions(request),
+    )
+    commit_keeping_state(db)
+    return db_module
+
+@router.delete("/{simulation_id}/modules/{module_id}", status_code=204)
+def delete_module(simulation_id: int, module_id: int, request: Request, db: Session = Depends(get_db)):
+    """Delete a module with its tasks, resources and model answers"""
+    simulation_structure.delete_module(db, simulation_id, module_id, expected_versions=if_match_versions(request))
+    db.commit()
+    return None
+
+@router.put("/{simulation_id}/modules/order", status_code=204)
+def reorder_modules(simulation_id: int, order: NodeOrder, request: Request, db: Session = Depends(get_db)):
+    """Reorder all modules: one UPDATE for the rows whose order key changes"""
+    simulation_structure.reorder_modules(db, simulation_id, order.ids, expected_versions=if_match_versions(request))
+    db.commit()
+    return None
+
+@router.post("/{simulation_id}/modules/{module_id}/tasks", response_model=ModuleTaskOut, status_code=201)
+def add_task(
+    simulation_id: int,
+    module_id: int,
+    task: ModuleTaskAdd,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Add a task (with resources / model answer) at `position` in a module"""
+    db_task = simulation_structure.add_task(
+        db, simulation_id, module_id, task.model_dump(exclude={"position"}), task.position,
+        expected_versions=if_match_versions(request),
+    )
+    db.commit()
+    return db_task
+
+@router.put("/{simulation_id}/modules/{module_id}/tasks/order", status_code=204)
+def reorder_tasks(
+    simulation_id: int,
+    module_id: int,
+    order: NodeOrder,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Reorder all tasks of a module: one UPDATE for the rows whose order key changes"""
+    simulation_structure.reorder_tasks(
+        db, simulation_id, module_id, order.ids, expected_versions=if_match_versions(request)
+    )
+    db.commit()
+    return None
+
+@router.patch("/{simulation_id}/tasks/{task_id}", response_model=ModuleTaskOut)
+def update_task(
+    simulation_id: int,
+    task_id: int,
+    update_data: ModuleTaskEdit,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Update task fields with a single UPDATE ... RETURNING"""
+    db_task = simulation_structure.update_task(
+        db, simulation_id, task_id, update_data.model_dump(exclude_unset=True),
+        expected_versions=if_match_versions(request),
+    )
+    commit_keeping_state(db)
+    return db_task
+
+@router.delete("/{simulation_id}/tasks/{task_id}", status_code=204)
+def delete_task(simulation_id: int, task_id: int, request: Request, db: Session = Depends(get_db)):
+    """Delete a task with its resources and model answer"""
+    simulation_structure.delete_task(db, simulation_id, task_id, expected_versions=if_match_versions(request))
+    db.commit()
+    return None
+
+@router.patch("/{simulation_id}/structure", response_model=SimulationOut)
+def patch_structure(
+    simulation_id: int,
+    structure: SimulationStructurePatch,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """
+    Bring the module/task tree to the one sent, writing only the difference.
+    Nodes with `id` are kept (edited / moved), nodes without are created, the rest deleted.
+    """
+    simulation_structure.apply_tree(
+        db, simulation_id, structure.model_dump(exclude_unset=True)["modules"],
+        expected_versions=if_match_versions(request),
+    )
+    db.commit()
+    sim = db.get(Simulation, simulation_id)
+    set_validators(response, Simulation, sim)
+    return sim
@@ -2,28 +2,53 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.api.v1.includes import Includes
+from app.api.v1.params import parse_ids
 from app.db.session import get_db
 from app.models.university import University, Career
-from app.schemas.university import UniversityOut, CareerOut, UniversityWithCareers
+from app.repositories.batch import get_many_by_ids
+from app.schemas.common import IdBatch
+from app.schemas.university import UniversityOut, CareerOut, UniversityWithCareers, UniversityListOut
 
 router = APIRouter(prefix='/universities', tags=['universities'])
 
-@router.get('/', response_model=List[UniversityOut])
+UNIVERSITY_INCLUDES = Includes(careers=University.careers)
+
+@router.get('/', response_model=List[UniversityListOut], response_model_exclude_unset=True)
 def list_universities(
     city_id: Optional[int] = None,
     university_type: Optional[str] = None,
+    ids: Optional[str] = Query(None, description='Ids separados por coma (1,2,3); ignora otros filtros'),
+    include: Optional[str] = Query(None, description='Relaciones a incluir: careers'),
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
-    query = db.query(University).filter(University.is_active == True)
+    requested = UNIVERSITY_INCLUDES.parse(include)
+    options = UNIVERSITY_INCLUDES.options(requested)
+    if ids:
+        universities = get_many_by_ids(db, University, parse_ids(ids), options)
+        return UNIVERSITY_INCLUDES.serialize(UniversityListOut, universities, requested)
+    
+    query = db.query(University).options(*options).filter(University.is_active == True)
     
     if city_id:
         query = query.filter(University.city_id == city_id)
     if university_type:
         query = query.filter(University.university_type == university_type)
     
-    return query.offset(skip).limit(limit).all()
+    universities = query.offset(skip).limit(limit).all()
+    return UNIVERSITY_INCLUDES.serialize(UniversityListOut, universities, requested)
+
+@router.post('/batch', response_model=List[UniversityListOut], response_model_exclude_unset=True)
+def get_universities_batch(
+    batch: IdBatch,
+    include: Optional[str] = Query(None, description='Relaciones a incluir: careers'),
+    db: Session = Depends(get_db)
+):
+    requested = UNIVERSITY_INCLUDES.parse(include)
+    universities = get_many_by_ids(db, University, batch.ids, UNIVERSITY_INCLUDES.options(requested))
+    return UNIVERSITY_INCLUDES.serialize(UniversityListOut, universities, requested)
 
 @router.get('/{university_id}', response_model=UniversityWithCareers)
 def get_university(university_id: int, db: Session = Depends(get_db)):
@@ -1,64 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserOut
 from app.core.security import hash_password
+from app.repositories.unique import commit_unique
+from app.repositories.updates import update_returning
+from app.services import outbox
 
 router = APIRouter()
 
+USER_UNIQUE_MESSAGES = {"email": "Email ya registrado", "username": "Username ya tomado"}
+
+NOT_DELETED = User.deleted_at.is_(None)
+
 # RUTAS SIN SLASH FINAL ("") PARA EVITAR REDIRECCIONES 307/404
 @router.post("", response_model=UserOut, status_code=201)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email ya registrado")
-    
-    db_username = db.query(User).filter(User.username == user.username).first()
-    if db_username:
-        raise HTTPException(status_code=400, detail="Username ya tomado")
-
     hashed_password = hash_password(user.password)
     user_data = user.model_dump(exclude={"password"})
     user_data["hashed_password"] = hashed_password
     
     new_user = User(**user_data)
     db.add(new_user)
-    db.commit()
+    # Unicidad garantizada por los índices únicos (sin SELECT previo)
+    commit_unique(db, USER_UNIQUE_MESSAGES)
     db.refresh(new_user)
     return new_user
 
 @router.get("", response_model=List[UserOut])
 def list_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(User).offset(skip).limit(limit).all()
+    return db.query(User).filter(NOT_DELETED).offset(skip).limit(limit).all()
 
 @router.get("/{user_id}", response_model=UserOut)
 def read_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == user_id, NOT_DELETED).first()
     if user is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
 
 @router.put("/{user_id}", response_model=UserOut)
 def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-
-    update_data = user_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(user, field, value)
-
-    db.commit()
-    db.refresh(user)
-    return user
+    # Un único UPDATE ... RETURNING (404 si no existe)
+    return update_returning(
+        db, User, [User.id == user_id, NOT_DELETED],
+        user_data.model_dump(exclude_unset=True),
+        not_found_detail="Usuario no encontrado",
+        unique_messages=USER_UNIQUE_MESSAGES,
+    )
 
 @router.delete("/{user_id}", status_code=204)
 def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    db.delete(user)
-    db.commit()
+    # Soft delete (deshabilitado hasta que app.services.archival lo purgue)
+    update_returning(
+        db, User, [User.id == user_id, NOT_DELETED],
+        {"deleted_at": func.now(), "disabled": True},
+        not_found_detail="Usuario no encontrado",
+        event=outbox.DELETED,
+    )
     return None
@@ -14,13 +14,88 @@ class Settings(BaseSettings):
         "postgresql://postgres:postgres@db:5432/aurum_db"
     )
     
-    # JWT
-    SECRET_KEY: str = os.getenv(
-        "SECRET_KEY", 
-        "tu_clave_super_secreta_cambiar_en_produccion_12345"
-    )
-    ALGORITHM: str = "HS256"
+    # development | production (en producción no se generan claves JWT al vuelo)
+    ENVIRONMENT: str = "development"
+    
+    # JWT (ES256, claves en JWT_KEYS_DIR: app.core.tokens)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_KEYS_DIR: str = "keys"  # <kid>.pem; python -m app.core.tokens rotate
+    JWT_KEYS_RELOAD_SECONDS: float = 30.0
+    JWT_JWKS_MAX_AGE_SECONDS: int = 300
+    
+    # Réplicas de lectura (URLs separadas por coma; vacío = solo primario)
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # más atrasada que esto: se lee del primario
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    REPLICA_CONNECT_TIMEOUT_SECONDS: int = 2
+    REPLICA_STICKY_SECONDS: int = 10  # lecturas al primario tras escribir (read-your-writes)
+    
+    # Plan limits
+    PLAN_USAGE_CACHE_TTL_SECONDS: float = 5.0
+    PLAN_ADMINS: str = ""  # usernames separados por coma que pueden cambiar límites de plan
+    
+    # Rate limiting (token buckets: capacity = burst, per_minute = refill)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | redis
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    RATE_LIMIT_AUTH_CAPACITY: int = 10
+    RATE_LIMIT_AUTH_PER_MINUTE: float = 10
+    RATE_LIMIT_LOGIN_USER_CAPACITY: int = 5
+    RATE_LIMIT_LOGIN_USER_PER_MINUTE: float = 5
+    RATE_LIMIT_WRITE_CAPACITY: int = 60
+    RATE_LIMIT_WRITE_PER_MINUTE: float = 60
+    
+    # Costo bcrypt (calibrar por host: python -m app.core.passwords --target-ms 250)
+    BCRYPT_ROUNDS: int = 12
+    
+    # Bloqueo de cuenta por intentos fallidos de login
+    LOGIN_LOCKOUT_ENABLED: bool = True
+    LOGIN_LOCKOUT_BACKEND: str = "memory"  # memory (por proceso) | redis (compartido entre workers)
+    LOGIN_LOCKOUT_THRESHOLD: int = 10  # fallos dentro de la ventana que bloquean la cuenta
+    LOGIN_LOCKOUT_WINDOW_SECONDS: float = 900.0
+    LOGIN_LOCKOUT_SECONDS: int = 900
+    REDIS_URL: str = "redis://localhost:6379/0"
+    
+    # Metrics / tracing (/metrics, X-Request-ID, /* trace_id */ en SQL)
+    METRICS_ENABLED: bool = True
+    METRICS_SQL_COMMENTS: bool = True
+    
+    # Profiling por request (X-Profile: 1 o ?profile=1 para admins, o 1 de cada N)
+    PROFILING_ADMINS: str = ""  # usernames separados por coma
+    PROFILING_SAMPLE_EVERY_N: int = 0  # 0 = desactivado
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 500
+    
+    # Soft delete: días antes de purgar definitivamente (python -m app.services.archival)
+    PURGE_RETENTION_DAYS: int = 30
+    PURGE_BATCH_SIZE: int = 25  # simulaciones por transacción (con todo su contenido)
+    PURGE_EVERY_SECONDS: float = 3600.0  # job periódico archival.purge; 0 = solo manual
+    
+    # Background jobs (python -m app.jobs.worker, o dentro de la API con JOBS_RUN_IN_PROCESS)
+    JOBS_RUN_IN_PROCESS: bool = False
+    JOBS_QUEUES: str = "default,maintenance"  # colas que atiende el worker, separadas por coma
+    JOBS_BATCH_SIZE: int = 10
+    JOBS_POLL_INTERVAL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_BASE_SECONDS: float = 5.0
+    JOBS_BACKOFF_MAX_SECONDS: float = 900.0
+    JOBS_LOCK_TIMEOUT_SECONDS: int = 600  # jobs 'running' más viejos se reencolan (worker caído)
+    JOBS_KEEP_DONE_HOURS: int = 24
+    JOBS_HOUSEKEEPING_INTERVAL_SECONDS: float = 10.0
+    COMPANY_METRICS_RECONCILE_EVERY_SECONDS: float = 3600.0  # job periódico; 0 = solo manual
+    
+    # Outbox de eventos de dominio (despachado por el worker de jobs)
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 5  # luego el evento se descarta con last_error
+    OUTBOX_KEEP_HOURS: int = 72
+    
+    # Invitaciones de usuarios de empresa
+    INVITATION_EXPIRE_HOURS: int = 72
+    INVITATION_BULK_MAX: int = 100  # invitaciones por request en /invitations/bulk
+    INVITATION_SWEEP_BATCH_SIZE: int = 500  # invitaciones vencidas borradas por transacción
+    INVITATION_SWEEP_EVERY_SECONDS: float = 900.0  # job periódico invitations.sweep; 0 = solo manual
     
     model_config = SettingsConfigDict(
         env_file=".env",
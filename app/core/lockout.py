@@ -0,0 +1,245 @@
+"""
+Account lockout after repeated failed logins
+
+- Failed attempts are counted per username in a sliding window of
+  LOGIN_LOCKOUT_WINDOW_SECONDS. A failed login costs no database write.
+- LOGIN_LOCKOUT_BACKEND picks where the counters live: "memory" keeps them
+  per process (lock-striped shards, like the in-memory rate limiter): with
+  N gunicorn workers close to N x threshold failures can land before one
+  worker locks the username, and an unknown username stays locked only in
+  that worker. "redis" shares counters and locks across workers and hosts
+  (requires the optional `redis` package); the production profile uses it.
+- Failures are counted on the submitted username whether or not the user
+  exists, and unknown usernames get the same 401 / 423 answers, so the
+  lockout does not reveal which accounts exist.
+- When a username reaches LOGIN_LOCKOUT_THRESHOLD failures in the window
+  it is locked in the tracker and, if the user exists, users.locked_until and
+  users.failed_login_attempts are written once, so the lock is shared by
+  every worker.
+- /token checks both locks before bcrypt.
+"""
+import math
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class FailedLoginTracker:
+    """
+    Sliding window of failure timestamps per key, plus the keys locked out
+
+    Keys are spread over `shards` dicts, each guarded by its own lock. When a
+    shard grows past `max_keys_per_shard`, keys with no failure inside the
+    window (or whose lock expired) are dropped.
+    """
+
+    def __init__(self, window_seconds: float, shards: int = 64, max_keys_per_shard: int = 10_000):
+        self.window_seconds = window_seconds
+        self._shards: List[Tuple[Dict[str, Deque[float]], threading.Lock]] = [
+            ({}, threading.Lock()) for _ in range(shards)
+        ]
+        self._locks: List[Dict[str, datetime]] = [{} for _ in range(shards)]
+        self.max_keys_per_shard = max_keys_per_shard
+
+    def _index(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self._shards)
+
+    def _shard(self, key: str):
+        return self._shards[self._index(key)]
+
+    def record_failure(self, key: str) -> int:
+        """Add a failure for `key` and return the failures inside the window"""
+        failures_by_key, lock = self._shard(key)
+        now = time.monotonic()
+        horizon = now - self.window_seconds
+        with lock:
+            failures = failures_by_key.get(key)
+            if failures is None:
+                if len(failures_by_key) >= self.max_keys_per_shard:
+                    self._evict_expired(failures_by_key, horizon)
+                failures = failures_by_key[key] = deque()
+            while failures and failures[0] <= horizon:
+                failures.popleft()
+            failures.append(now)
+            return len(failures)
+
+    @staticmethod
+    def _evict_expired(failures_by_key: Dict[str, Deque[float]], horizon: float) -> None:
+        for key in [k for k, failures in failures_by_key.items() if not failures or failures[-1] <= horizon]:
+            del failures_by_key[key]
+
+    def lock(self, key: str, until: datetime) -> None:
+        """Lock `key` until `until` and reset its failures"""
+        index = self._index(key)
+        failures_by_key, lock = self._shards[index]
+        locks = self._locks[index]
+        now = datetime.now(timezone.utc)
+        with lock:
+            failures_by_key.pop(key, None)
+            if len(locks) >= self.max_keys_per_shard:
+                for expired in [k for k, locked_until in locks.items() if locked_until <= now]:
+                    del locks[expired]
+            locks[key] = until
+
+    def locked_until(self, key: str) -> Optional[datetime]:
+        index = self._index(key)
+        until = self._locks[index].get(key)
+        return until if until is not None and until > datetime.now(timezone.utc) else None
+
+    def forget(self, key: str) -> None:
+        index = self._index(key)
+        failures_by_key, lock = self._shards[index]
+        with lock:
+            failures_by_key.pop(key, None)
+            self._locks[index].pop(key, None)
+
+    def clear(self) -> None:
+        for (failures_by_key, lock), locks in zip(self._shards, self._locks):
+            with lock:
+                failures_by_key.clear()
+                locks.clear()
+
+
+class RedisFailedLoginTracker:
+    """Same interface as FailedLoginTracker, with the windows and locks kept in Redis"""
+
+    def __init__(self, url: str, window_seconds: float, prefix: str = "aurum:lockout:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("LOGIN_LOCKOUT_BACKEND=redis requires the 'redis' package") from exc
+        self.client = redis.Redis.from_url(url)
+        self.window_seconds = window_seconds
+        self.prefix = prefix
+
+    def _failures_key(self, key: str) -> str:
+        return f"{self.prefix}failures:{key}"
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.prefix}locked:{key}"
+
+    def record_failure(self, key: str) -> int:
+        """Add a failure for `key` and return the failures inside the window"""
+        now = time.time()
+        name = self._failures_key(key)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zremrangebyscore(name, "-inf", now - self.window_seconds)
+        pipe.zadd(name, {uuid.uuid4().hex: now})
+        pipe.zcard(name)
+        pipe.expire(name, math.ceil(self.window_seconds))
+        return int(pipe.execute()[2])
+
+    def lock(self, key: str, until: datetime) -> None:
+        """Lock `key` until `until` and reset its failures"""
+        seconds = math.ceil((until - datetime.now(timezone.utc)).total_seconds())
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._failures_key(key))
+        if seconds > 0:
+            pipe.set(self._lock_key(key), until.timestamp(), ex=seconds)
+        pipe.execute()
+
+    def locked_until(self, key: str) -> Optional[datetime]:
+        value = self.client.get(self._lock_key(key))
+        if value is None:
+            return None
+        until = datetime.fromtimestamp(float(value), tz=timezone.utc)
+        return until if until > datetime.now(timezone.utc) else None
+
+    def forget(self, key: str) -> None:
+        self.client.delete(self._failures_key(key), self._lock_key(key))
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+def build_tracker():
+    if settings.LOGIN_LOCKOUT_BACKEND == "redis":
+        return RedisFailedLoginTracker(settings.REDIS_URL, settings.LOGIN_LOCKOUT_WINDOW_SECONDS)
+    return FailedLoginTracker(window_seconds=settings.LOGIN_LOCKOUT_WINDOW_SECONDS)
+
+
+failed_logins = build_tracker()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devuelve datetimes naive (en UTC)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def locked_error(locked_until: datetime) -> HTTPException:
+    """423 with Retry-After until the lock expires"""
+    retry_after = max(int((locked_until - datetime.now(timezone.utc)).total_seconds()) + 1, 1)
+    return HTTPException(
+        status_code=status.HTTP_423_LOCKED,
+        detail="Cuenta bloqueada temporalmente por intentos fallidos",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def ensure_not_locked(username: str, user: Optional[User]) -> None:
+    """Raise 423 if the username or the account is locked (call before verifying the password)"""
+    if not settings.LOGIN_LOCKOUT_ENABLED:
+        return
+    locked_until = failed_logins.locked_until(username)
+    if locked_until is None and user is not None and user.locked_until is not None:
+        locked_until = _as_utc(user.locked_until)
+    if locked_until is not None and locked_until > datetime.now(timezone.utc):
+        raise locked_error(locked_until)
+
+
+def register_failure(db: Session, username: str, user: Optional[User]) -> Optional[datetime]:
+    """
+    Count a failed login for `username`, whether or not `user` exists
+
+    At the threshold the username is locked in the tracker and, only if the row
+    exists, locked_until is persisted (one UPDATE + commit).
+
+    Returns:
+        locked_until if this failure locked the username, else None
+    """
+    if not settings.LOGIN_LOCKOUT_ENABLED:
+        return None
+    failures = failed_logins.record_failure(username)
+    if failures < settings.LOGIN_LOCKOUT_THRESHOLD:
+        return None
+
+    locked_until = datetime.now(timezone.utc) + timedelta(seconds=settings.LOGIN_LOCKOUT_SECONDS)
+    failed_logins.lock(username, locked_until)
+    if user is not None:
+        db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                failed_login_attempts=User.failed_login_attempts + failures,
+                locked_until=locked_until,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return locked_until
+
+
+def register_success(db: Session, user: User) -> None:
+    """Forget past failures; the row is only written if it carried a lock"""
+    failed_logins.forget(user.username)
+    if user.locked_until is None and not user.failed_login_attempts:
+        return
+    db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(failed_login_attempts=0, locked_until=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
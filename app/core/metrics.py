@@ -0,0 +1,298 @@
+"""
+Request metrics and tracing
+
+- MetricsMiddleware: per route (templated path, e.g. /api/v1/simulations/{id})
+  latency histograms, in-flight gauges and status-code counters.
+- Trace id per request (X-Request-ID in/out) available through `trace_id_var`,
+  added to every log record as `trace_id` and appended to SQL statements as
+  a /* trace_id=... */ comment.
+- render_prometheus(): text exposition format served at /metrics.
+  The registry lives in process memory: under gunicorn each scrape is
+  answered by one worker with its own numbers, identified by the pid in
+  aurum_worker_info (see gunicorn.conf.py).
+
+Histograms are log-linear (HDR-style): 16 sub-buckets per power of two of
+microseconds, so any percentile is within ~6% of the real value with a
+fixed amount of memory per route.
+"""
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+TRACE_HEADER = b"x-request-id"
+# Incoming ids end up in SQL comments and logs: only allow a safe charset
+VALID_TRACE_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# ============================================
+# HISTOGRAM
+# ============================================
+
+class LatencyHistogram:
+    """Log-linear histogram of durations in microseconds"""
+
+    SUB_BUCKET_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    # Up to 2^36 us (~19 h); slower values are clamped to the last bucket
+    BUCKETS = SUB_BUCKETS * (36 - SUB_BUCKET_BITS + 1)
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.sum_us = 0
+
+    @classmethod
+    def index_of(cls, value_us: int) -> int:
+        if value_us < cls.SUB_BUCKETS:
+            return max(value_us, 0)
+        shift = value_us.bit_length() - cls.SUB_BUCKET_BITS - 1
+        index = (shift + 1) * cls.SUB_BUCKETS + (value_us >> shift) - cls.SUB_BUCKETS
+        return min(index, cls.BUCKETS - 1)
+
+    @classmethod
+    def upper_bound(cls, index: int) -> int:
+        """Largest value (us) that falls in bucket `index`"""
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        mantissa = index % cls.SUB_BUCKETS + cls.SUB_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value_us: int) -> None:
+        self.counts[self.index_of(value_us)] += 1
+        self.count += 1
+        self.sum_us += value_us
+
+    def percentile(self, pct: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, round(pct / 100 * self.count))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                return self.upper_bound(index)
+        return self.upper_bound(self.BUCKETS - 1)
+
+    def count_le(self, bound_us: int) -> int:
+        """Observations whose bucket lies entirely at or below `bound_us`"""
+        limit = self.index_of(bound_us)
+        if self.upper_bound(limit) > bound_us:
+            limit -= 1
+        return sum(self.counts[:limit + 1])
+
+
+# ============================================
+# REGISTRY
+# ============================================
+
+RouteKey = Tuple[str, str]  # (method, route)
+
+
+class MetricsRegistry:
+    """Process-wide store of request metrics"""
+
+    # Cumulative `le` buckets exported to Prometheus, in seconds
+    EXPORT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    EXPORT_QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self.histograms: Dict[RouteKey, LatencyHistogram] = {}
+        self.statuses: Dict[Tuple[str, str, int], int] = {}
+        # Scopes of requests currently being served, keyed by id(scope);
+        # the route is resolved at scrape time, once routing has happened
+        self.active: Dict[int, dict] = {}
+        # Extra exposition lines rendered at scrape time (e.g. background jobs)
+        self.collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        if collector not in self.collectors:
+            self.collectors.append(collector)
+
+    def start(self, scope: dict) -> None:
+        self.active[id(scope)] = scope
+
+    def finish(self, scope: dict, status_code: int, duration_us: int) -> None:
+        key = (scope["method"], route_template(scope))
+        with self._lock:
+            self.active.pop(id(scope), None)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(duration_us)
+            status_key = key + (status_code,)
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+    def in_flight(self) -> Dict[RouteKey, int]:
+        gauges: Dict[RouteKey, int] = {}
+        for scope in list(self.active.values()):
+            key = (scope["method"], route_template(scope))
+            gauges[key] = gauges.get(key, 0) + 1
+        return gauges
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.statuses.clear()
+            self.active.clear()
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            histograms = dict(self.histograms)
+            statuses = dict(self.statuses)
+
+        lines.append("# HELP http_request_duration_seconds Request latency by route")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), hist in sorted(histograms.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for bound in self.EXPORT_BUCKETS:
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                             f'{hist.count_le(int(bound * 1_000_000))}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {hist.sum_us / 1_000_000:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {hist.count}")
+
+        lines.append("# HELP http_request_latency_seconds Request latency percentiles by route")
+        lines.append("# TYPE http_request_latency_seconds summary")
+        for (method, route), hist in sorted(histograms.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for quantile in self.EXPORT_QUANTILES:
+                lines.append(f'http_request_latency_seconds{{{labels},quantile="{quantile}"}} '
+                             f'{hist.percentile(quantile * 100) / 1_000_000:.6f}')
+            lines.append(f"http_request_latency_seconds_sum{{{labels}}} {hist.sum_us / 1_000_000:.6f}")
+            lines.append(f"http_request_latency_seconds_count{{{labels}}} {hist.count}")
+
+        lines.append("# HELP http_requests_in_flight Requests currently being served")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for (method, route), value in sorted(self.in_flight().items()):
+            lines.append(f'http_requests_in_flight{{method="{method}",route="{_escape(route)}"}} {value}')
+
+        lines.append("# HELP http_responses_total Responses by route and status code")
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, code), value in sorted(statuses.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{_escape(route)}",status="{code}"}} {value}')
+
+        lines.append("# HELP aurum_worker_info Worker process that answered this scrape")
+        lines.append("# TYPE aurum_worker_info gauge")
+        lines.append(f'aurum_worker_info{{pid="{os.getpid()}"}} 1')
+
+        for collector in list(self.collectors):
+            lines.extend(collector())
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def route_template(scope: dict) -> str:
+    """
+    Templated path of the matched route (bounded label cardinality)
+
+    Routes of included routers only know their own path, so the mount prefix
+    is taken from the leading segments of the concrete request path.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return UNMATCHED_ROUTE
+    concrete = scope["path"].split("/")
+    prefix = "/".join(concrete[:len(concrete) - path.count("/")])
+    return prefix + path
+
+
+registry = MetricsRegistry()
+
+
+# ============================================
+# TRACING
+# ============================================
+
+def _trace_id_from(scope: dict) -> str:
+    for name, value in scope.get("headers", []):
+        if name == TRACE_HEADER:
+            candidate = value.decode("latin-1")
+            if VALID_TRACE_ID.match(candidate):
+                return candidate
+            break
+    return uuid.uuid4().hex
+
+
+def install_trace_logging() -> None:
+    """Add `trace_id` to every LogRecord (use %(trace_id)s in formats)"""
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, "_adds_trace_id", False):
+        return
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        record.trace_id = trace_id_var.get() or "-"
+        return record
+
+    record_factory._adds_trace_id = True
+    logging.setLogRecordFactory(record_factory)
+
+
+def _add_sql_comment(conn, cursor, statement, parameters, context, executemany):
+    trace_id = trace_id_var.get()
+    if trace_id is not None:
+        statement = f"{statement} /* trace_id={trace_id} */"
+    return statement, parameters
+
+
+def install_sql_comments() -> None:
+    """Append /* trace_id=... */ to SQL sent by every engine"""
+    if not event.contains(Engine, "before_cursor_execute", _add_sql_comment):
+        event.listen(Engine, "before_cursor_execute", _add_sql_comment, retval=True)
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: trace id + latency/status/in-flight metrics"""
+
+    def __init__(self, app, metrics: MetricsRegistry = registry):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = _trace_id_from(scope)
+        token = trace_id_var.set(trace_id)
+        trace_header = (TRACE_HEADER, trace_id.encode("latin-1"))
+        status_code = 500
+
+        async def send_with_trace(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [trace_header]
+            await send(message)
+
+        self.metrics.start(scope)
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            self.metrics.finish(scope, status_code, (time.perf_counter_ns() - start) // 1000)
+            trace_id_var.reset(token)
@@ -0,0 +1,162 @@
+"""
+Política de contraseñas (bcrypt)
+
+Único lugar donde se generan y verifican hashes. El costo (work factor)
+sale de settings.BCRYPT_ROUNDS y se calibra por host con:
+
+    python -m app.core.passwords --target-ms 250
+
+Los hashes con otro costo se detectan con needs_rehash() y se regeneran
+después de un login correcto, en una tarea en segundo plano (la respuesta
+no espera al nuevo bcrypt).
+"""
+import argparse
+import functools
+import time
+from typing import List, Optional, Tuple
+
+import bcrypt
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+
+# bcrypt solo usa los primeros 72 bytes (bcrypt>=5 lanza ValueError si hay más)
+BCRYPT_MAX_BYTES = 72
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Hash bcrypt con el costo configurado (o `rounds`)"""
+    if password is None:
+        raise ValueError("password cannot be None")
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(_encode(password), salt).decode("utf-8")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica el password; False si falta alguno o el hash no es bcrypt válido"""
+    if not plain_password or not hashed_password:
+        return False
+    try:
+        return bcrypt.checkpw(_encode(plain_password), hashed_password.encode("utf-8"))
+    except ValueError:
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def _dummy_hash(rounds: int) -> str:
+    return hash_password("aurum-dummy-password", rounds=rounds)
+
+
+def dummy_hash() -> str:
+    """
+    Hash de relleno con el costo actual, para verificar cuando el usuario no existe
+
+    Así un username desconocido paga el mismo bcrypt que uno real y el
+    tiempo de respuesta no revela qué cuentas existen.
+    """
+    return _dummy_hash(settings.BCRYPT_ROUNDS)
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Costo de un hash "$2b$12$..." (None si no es bcrypt)"""
+    parts = (hashed_password or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True si el hash no usa el costo configurado (más bajo o más alto)"""
+    return hash_rounds(hashed_password) != settings.BCRYPT_ROUNDS
+
+
+def rehash_user_password(db: Session, user_id: int, password: str, old_hash: str) -> bool:
+    """
+    Guardar el hash con el costo actual
+
+    El UPDATE solo aplica si el hash sigue siendo `old_hash`: un cambio de
+    contraseña concurrente gana.
+
+    Returns:
+        True si se actualizó la fila
+    """
+    result = db.execute(
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=hash_password(password))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def rehash_in_background(user_id: int, password: str, old_hash: str) -> bool:
+    """
+    rehash_user_password() con su propia sesión, para BackgroundTasks
+
+    La tarea corre después de la respuesta, cuando la sesión del request
+    (get_db) ya se cerró: no se le pasa esa sesión.
+    """
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        return rehash_user_password(db, user_id, password, old_hash)
+
+
+# ============================================
+# CALIBRACIÓN
+# ============================================
+
+def measure(rounds: int, samples: int = 3) -> float:
+    """Milisegundos de un hash con `rounds` en este host (mejor de `samples`)"""
+    password = b"calibration-password"
+    best = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def calibrate(target_ms: float, samples: int = 3) -> Tuple[int, List[Tuple[int, float]]]:
+    """
+    Mayor costo cuyo hash tarda como máximo `target_ms` (mínimo MIN_ROUNDS)
+
+    Cada punto extra duplica el tiempo, así que se corta en cuanto se pasa.
+
+    Returns:
+        (rounds recomendados, [(rounds, ms) medidos])
+    """
+    timings = []
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = measure(rounds, samples)
+        timings.append((rounds, elapsed))
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrar BCRYPT_ROUNDS para una latencia objetivo")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Tiempo máximo por hash")
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    rounds, timings = calibrate(args.target_ms, args.samples)
+    for measured_rounds, elapsed in timings:
+        print(f"rounds={measured_rounds:>2}  {elapsed:8.1f} ms")
+    print(f"\nBCRYPT_ROUNDS={rounds}  (actual: {settings.BCRYPT_ROUNDS})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+On-demand request profiling
+
+A sampling profiler that captures the stacks of one request while it runs:
+
+- Opt-in per request with `X-Profile: 1` or `?profile=1`, honored only for
+  bearer tokens whose user is listed in PROFILING_ADMINS.
+- Sampling mode: every PROFILING_SAMPLE_EVERY_N-th request is profiled.
+
+A background thread reads sys._current_frames() every
+PROFILING_INTERVAL_MS and keeps the stacks that run inside the matched
+endpoint function (sync endpoints run in the threadpool, async ones in the
+event loop thread). Concurrent requests to the same endpoint can be mixed
+into the same profile.
+
+Each profile is stored in PROFILING_DIR as <id>.collapsed (flame-graph
+ready, rooted at "METHOD /route") plus <id>.json metadata; the writes and
+the pruning (oldest files by mtime) run in a worker thread, off the event
+loop.
+
+Usage: python -m app.core.profiling [--dir profiles] [--route /api/v1/simulations] [--output all.collapsed]
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import anyio
+
+from app.core.config import settings
+from app.core.metrics import route_template, trace_id_var
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+def admin_usernames() -> set:
+    return {name.strip() for name in settings.PROFILING_ADMINS.split(",") if name.strip()}
+
+
+@dataclass
+class ProfileMeta:
+    id: str
+    method: str
+    route: str
+    path: str
+    status_code: int
+    duration_ms: float
+    samples: int
+    interval_ms: float
+    trigger: str
+    trace_id: Optional[str]
+    created_at: str
+
+
+# ============================================
+# SAMPLER
+# ============================================
+
+def _frame_label(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stacks running a given endpoint function until stopped"""
+
+    def __init__(self, scope: dict, interval_s: float):
+        self.scope = scope
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            endpoint = self.scope.get("endpoint")
+            code = getattr(endpoint, "__code__", None)
+            if code is None:
+                continue
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = self._stack_below(frame, code)
+                if stack:
+                    self.stacks[";".join(stack)] += 1
+
+    @staticmethod
+    def _stack_below(frame, endpoint_code) -> Optional[List[str]]:
+        """Frames from the endpoint call down to the sampled frame, root first"""
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code))
+            if frame.f_code is endpoint_code:
+                labels.reverse()
+                return labels
+            frame = frame.f_back
+        return None
+
+
+# ============================================
+# STORAGE
+# ============================================
+
+class ProfileStore:
+    """Collapsed stacks + metadata on disk, pruned to `max_files` profiles"""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, meta: ProfileMeta, stacks: Counter) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        root = f"{meta.method} {meta.route}"
+        with open(os.path.join(self.directory, f"{meta.id}.collapsed"), "w") as fh:
+            for stack, count in stacks.most_common():
+                fh.write(f"{root};{stack} {count}\n")
+        with open(os.path.join(self.directory, f"{meta.id}.json"), "w") as fh:
+            json.dump(asdict(meta), fh)
+        self.prune()
+
+    def list(self) -> List[ProfileMeta]:
+        if not os.path.isdir(self.directory):
+            return []
+        items = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                with open(os.path.join(self.directory, name)) as fh:
+                    items.append(ProfileMeta(**json.load(fh)))
+        return sorted(items, key=lambda m: m.created_at, reverse=True)
+
+    def collapsed_path(self, profile_id: str) -> Optional[str]:
+        if not profile_id.replace("-", "").isalnum():
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.collapsed")
+        return path if os.path.exists(path) else None
+
+    def prune(self) -> None:
+        """Drop the oldest profiles beyond `max_files`, by file mtime (no JSON parsing)"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.name[:-len(".json")]))
+                    except FileNotFoundError:
+                        pass
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(reverse=True)
+        for _, profile_id in entries[self.max_files:]:
+            for ext in (".json", ".collapsed"):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + ext))
+                except FileNotFoundError:
+                    pass
+
+
+store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+def _requested_by_admin(scope: dict) -> bool:
+    headers = dict(scope.get("headers", []))
+    query = scope.get("query_string", b"").decode("latin-1")
+    wants = headers.get(PROFILE_HEADER) in (b"1", b"true") or "profile=1" in query.split("&")
+    if not wants:
+        return False
+
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if not authorization.lower().startswith("bearer "):
+        return False
+    from jose import JWTError
+    from app.core import tokens
+
+    try:
+        payload = tokens.decode_token(authorization[7:])
+    except JWTError:
+        return False
+    return payload.get("sub") in admin_usernames()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware: profile admin-requested and 1-in-N requests"""
+
+    def __init__(self, app, profile_store: ProfileStore = store):
+        self.app = app
+        self.store = profile_store
+        self._counter = itertools.count(1)
+
+    def trigger_for(self, scope) -> Optional[str]:
+        if admin_usernames() and _requested_by_admin(scope):
+            return "admin"
+        every_n = settings.PROFILING_SAMPLE_EVERY_N
+        if every_n > 0 and next(self._counter) % every_n == 0:
+            return "sampling"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self.trigger_for(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(scope, settings.PROFILING_INTERVAL_MS / 1000)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            meta = ProfileMeta(
+                id=profile_id,
+                method=scope["method"],
+                route=route_template(scope),
+                path=scope["path"],
+                status_code=status_code,
+                duration_ms=round((time.perf_counter() - start) * 1000, 3),
+                samples=0,
+                interval_ms=settings.PROFILING_INTERVAL_MS,
+                trigger=trigger,
+                trace_id=trace_id_var.get(),
+                created_at=datetime.now(timezone.utc).isoformat(),
+            )
+            # Thread join and file I/O off the event loop
+            await anyio.to_thread.run_sync(self._finish, sampler, meta)
+
+    def _finish(self, sampler: StackSampler, meta: ProfileMeta) -> None:
+        sampler.stop()
+        meta.samples = sampler.samples
+        self.store.save(meta, sampler.stacks)
+
+
+# ============================================
+# CLI
+# ============================================
+
+def aggregate(directory: str, route_prefix: Optional[str] = None) -> Dict[str, Counter]:
+    """Merge collapsed stacks of all stored profiles, grouped by route"""
+    merged: Dict[str, Counter] = {}
+    profile_store = ProfileStore(directory, max_files=sys.maxsize)
+    for meta in profile_store.list():
+        if route_prefix and not meta.route.startswith(route_prefix):
+            continue
+        stacks = merged.setdefault(f"{meta.method} {meta.route}", Counter())
+        with open(os.path.join(directory, f"{meta.id}.collapsed")) as fh:
+            for line in fh:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                stacks[stack] += int(count)
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrega perfiles por ruta en un archivo collapsed-stack")
+    parser.add_argument("--dir", default=settings.PROFILING_DIR)
+    parser.add_argument("--route", help="Solo rutas con este prefijo")
+    parser.add_argument("--output", default="profiles.collapsed",
+                        help="Archivo de salida (flamegraph.pl / speedscope)")
+    args = parser.parse_args()
+
+    metas = ProfileStore(args.dir, max_files=sys.maxsize).list()
+    merged = aggregate(args.dir, args.route)
+    with open(args.output, "w") as fh:
+        for stacks in merged.values():
+            for stack, count in stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+    for route in sorted(merged):
+        durations = [m.duration_ms for m in metas if f"{m.method} {m.route}" == route]
+        print(f"{route:50s} perfiles={len(durations):4d} "
+              f"mediana_ms={statistics.median(durations):9.2f} muestras={sum(merged[route].values())}")
+    print(f"✅ {args.output}")
+
+
+if __name__ == "__main__":
+    main()
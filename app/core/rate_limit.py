@@ -0,0 +1,287 @@
+"""
+Rate limiting (token buckets)
+
+- RateLimitMiddleware: per client IP on auth endpoints and on every write
+  (POST/PUT/PATCH/DELETE); adds X-RateLimit-* headers and answers 429.
+- enforce(): per-key check for use inside endpoints (e.g. per username on
+  /token), raising HTTPException 429.
+
+Buckets live in a pluggable backend: InMemoryRateLimitBackend (per process,
+lock-striped for threaded workers) or RedisRateLimitBackend (shared across
+workers/hosts, requires the optional `redis` package).
+"""
+import json
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Bucket of `capacity` tokens refilled at `per_minute` tokens per minute"""
+    name: str
+    capacity: int
+    per_minute: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.per_minute / 60.0
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+def _result(rule: RateLimitRule, allowed: bool, tokens: float, cost: float) -> RateLimitResult:
+    retry_after = 0
+    if not allowed:
+        rate = rule.refill_per_second
+        retry_after = math.ceil((cost - tokens) / rate) if rate > 0 else 3600
+    return RateLimitResult(allowed, rule.capacity, int(tokens), max(retry_after, 0))
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets (an incomplete backend fails when instantiated)"""
+
+    @abstractmethod
+    def consume(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> RateLimitResult:
+        """Take `cost` tokens from the bucket of `key` if it has them"""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Drop every bucket"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets in process memory
+
+    Keys are spread over `shards` dicts, each guarded by its own lock, so
+    threads hitting different keys rarely contend. Full buckets are evicted
+    when a shard grows past `max_keys_per_shard`.
+    """
+
+    def __init__(self, shards: int = 64, max_keys_per_shard: int = 10_000):
+        self._shards: List[Tuple[Dict[str, List[float]], threading.Lock]] = [
+            ({}, threading.Lock()) for _ in range(shards)
+        ]
+        self.max_keys_per_shard = max_keys_per_shard
+
+    def _shard(self, key: str):
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def consume(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> RateLimitResult:
+        buckets, lock = self._shard(key)
+        now = time.monotonic()
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                if len(buckets) >= self.max_keys_per_shard:
+                    self._evict_full(buckets, rule, now)
+                bucket = buckets[key] = [float(rule.capacity), now]
+            tokens = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            bucket[0], bucket[1] = tokens, now
+        return _result(rule, allowed, tokens, cost)
+
+    @staticmethod
+    def _evict_full(buckets: Dict[str, List[float]], rule: RateLimitRule, now: float) -> None:
+        rate = rule.refill_per_second
+        for key in [k for k, (tokens, ts) in buckets.items() if tokens + (now - ts) * rate >= rule.capacity]:
+            del buckets[key]
+
+    def reset(self) -> None:
+        for buckets, lock in self._shards:
+            with lock:
+                buckets.clear()
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Token buckets shared through Redis (one atomic Lua call per check)"""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    local ttl = 3600
+    if rate > 0 then ttl = math.ceil(capacity / rate) + 1 end
+    redis.call('EXPIRE', KEYS[1], ttl)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str, prefix: str = "aurum:ratelimit:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from exc
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    def consume(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> RateLimitResult:
+        allowed, tokens = self._script(
+            keys=[self.prefix + key],
+            args=[rule.capacity, rule.refill_per_second, time.time(), cost],
+        )
+        return _result(rule, bool(allowed), float(tokens), cost)
+
+    def reset(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+def build_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.REDIS_URL)
+    return InMemoryRateLimitBackend()
+
+
+# ============================================
+# LIMITER
+# ============================================
+
+class RateLimiter:
+    """Rules + backend; `rules` is keyed by rule name"""
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self._backend = backend
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.rules: Dict[str, RateLimitRule] = {
+            "auth": RateLimitRule("auth", settings.RATE_LIMIT_AUTH_CAPACITY, settings.RATE_LIMIT_AUTH_PER_MINUTE),
+            "login_user": RateLimitRule("login_user", settings.RATE_LIMIT_LOGIN_USER_CAPACITY, settings.RATE_LIMIT_LOGIN_USER_PER_MINUTE),
+            "write": RateLimitRule("write", settings.RATE_LIMIT_WRITE_CAPACITY, settings.RATE_LIMIT_WRITE_PER_MINUTE),
+        }
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        if self._backend is None:
+            self._backend = build_backend()
+        return self._backend
+
+    def configure_backend(self, backend: RateLimitBackend) -> None:
+        self._backend = backend
+
+    def hit(self, rule_name: str, key: str) -> RateLimitResult:
+        rule = self.rules[rule_name]
+        return self.backend.consume(f"{rule.name}:{key}", rule)
+
+    def reset(self) -> None:
+        if self._backend is not None:
+            self._backend.reset()
+
+
+rate_limiter = RateLimiter()
+
+
+def enforce(rule_name: str, key: str) -> None:
+    """Consume one token for `key` or raise 429 (for use inside endpoints)"""
+    if not rate_limiter.enabled:
+        return
+    result = rate_limiter.hit(rule_name, key)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas solicitudes, intenta más tarde",
+            headers=result.headers(),
+        )
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+AUTH_PATHS = {"/token", "/api/v1/token", "/api/v1/register-full", "/api/v1/company-users/invitations/accept"}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def client_ip(scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware: per-IP buckets for auth endpoints and writes"""
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    def rule_for(self, scope) -> Optional[str]:
+        if scope["path"] in AUTH_PATHS:
+            return "auth"
+        if scope["method"] in WRITE_METHODS:
+            return "write"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        rule_name = self.rule_for(scope)
+        if rule_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        result = self.limiter.hit(rule_name, f"ip:{client_ip(scope)}")
+        headers = [(k.lower().encode(), v.encode()) for k, v in result.headers().items()]
+
+        if not result.allowed:
+            body = json.dumps({"detail": "Demasiadas solicitudes, intenta más tarde"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": status.HTTP_429_TOO_MANY_REQUESTS,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())] + headers,
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,40 +1,11 @@
-from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-import bcrypt
+from app.core import passwords, tokens
 
-# Configuración
-SECRET_KEY = "tu-clave-secreta-super-segura-cambiar-en-produccion"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica el password usando bcrypt puro"""
-    if not plain_password or not hashed_password:
-        return False
-    # Bcrypt requiere bytes
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'), 
-        hashed_password.encode('utf-8')
-    )
-
-def get_password_hash(password: str) -> str:
-    """Genera hash usando bcrypt puro"""
-    # Generar salt y hash
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(pwd_bytes, salt)
-    return hashed.decode('utf-8')
+# Hashing: ver app.core.passwords (costo configurable, rehash en login)
+verify_password = passwords.verify_password
+get_password_hash = passwords.hash_password
 
 # Alias de compatibilidad
 hash_password = get_password_hash
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+# Tokens: ver app.core.tokens (ES256, claves rotables, JWKS)
+create_access_token = tokens.create_access_token
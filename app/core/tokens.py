@@ -0,0 +1,289 @@
+"""
+JWT signing service (ES256 with kid-based key rotation)
+
+Keys are PEM files in JWT_KEYS_DIR named after their key id:
+
+- `<kid>.pem`: EC P-256 private key. The kid is the UTC time from which
+  the key signs; the newest key already active signs new tokens, older
+  ones only verify until they are pruned.
+- `<kid>.pub.pem`: public key only (e.g. a key retired from signing).
+
+Rotation publishes first and signs later: `rotate` names the new key after
+now + JWT_JWKS_MAX_AGE_SECONDS + JWT_KEYS_RELOAD_SECONDS, so it is in
+/.well-known/jwks.json before any consumer caching the previous JWKS can
+receive a token signed with it.
+
+Key objects are parsed once and reused for every request; the directory is
+re-scanned at most every JWT_KEYS_RELOAD_SECONDS so a rotation on disk is
+picked up without a restart. /.well-known/jwks.json publishes the public
+keys so other services verify tokens locally.
+
+A missing signing key is generated on the fly only outside production
+(ENVIRONMENT != "production"); in production the API refuses to start.
+
+Usage:
+    python -m app.core.tokens rotate [--activate-after SECONDS]   # publish a new signing key
+    python -m app.core.tokens prune --keep 2                        # drop all but the 2 newest
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from typing import Any, Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import JWTError, jwk, jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "ES256"
+PRIVATE_SUFFIX = ".pem"
+PUBLIC_SUFFIX = ".pub.pem"
+KID_FORMAT = "%Y%m%dT%H%M%S%fZ"
+
+
+class MissingSigningKeyError(RuntimeError):
+    """No private key in JWT_KEYS_DIR and auto-generation is disabled"""
+
+
+@dataclass
+class VerificationKey:
+    kid: str
+    key: Any  # jose Key, parsed once
+    public_jwk: Dict[str, Any]
+
+
+@dataclass
+class SigningKey(VerificationKey):
+    private_key: Any = None
+    activates_at: Optional[datetime] = None  # None: active since it was written
+
+
+def new_kid(activate_after: float = 0) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=activate_after)).strftime(KID_FORMAT)
+
+
+def activation_time(kid: str) -> Optional[datetime]:
+    """When the key `kid` starts signing (None for kids that are not timestamps)"""
+    try:
+        return datetime.strptime(kid, KID_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def generate_key(keys_dir: str, kid: Optional[str] = None, activate_after: float = 0) -> str:
+    """
+    Write a new EC P-256 private key as <kid>.pem and return the kid
+
+    The key is published (JWKS) right away and signs from now + `activate_after`.
+    """
+    kid = kid or new_kid(activate_after)
+    os.makedirs(keys_dir, exist_ok=True)
+    pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    path = os.path.join(keys_dir, kid + PRIVATE_SUFFIX)
+    # O_EXCL: two workers bootstrapping at once never overwrite each other
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(pem)
+    return kid
+
+
+def _kid(name: str) -> str:
+    suffix = PUBLIC_SUFFIX if name.endswith(PUBLIC_SUFFIX) else PRIVATE_SUFFIX
+    return name[:-len(suffix)]
+
+
+def _public_jwk(kid: str, public_pem: bytes) -> Dict[str, Any]:
+    data = jwk.construct(public_pem, ALGORITHM).to_dict()
+    data.update(kid=kid, use="sig", alg=ALGORITHM)
+    return data
+
+
+class KeySet:
+    """Parsed signing/verification keys of a directory, refreshed on change"""
+
+    def __init__(self, keys_dir: str, reload_seconds: float, autogenerate: bool = True):
+        self.keys_dir = keys_dir
+        self.reload_seconds = reload_seconds
+        self.autogenerate = autogenerate
+        self.signing_keys: List[SigningKey] = []
+        self.verification: Dict[str, VerificationKey] = {}
+        self.jwks_body = b'{"keys": []}'
+        self.jwks_etag = ""
+        self._fingerprint = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _listing(self) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(self.keys_dir) if name.endswith(PRIVATE_SUFFIX))
+        except FileNotFoundError:
+            return []
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_seconds:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_seconds:
+                return
+            names = self._listing()
+            if not any(not name.endswith(PUBLIC_SUFFIX) for name in names):
+                if not self.autogenerate:
+                    raise MissingSigningKeyError(
+                        f"No JWT signing key in {os.path.abspath(self.keys_dir)!r} "
+                        "(python -m app.core.tokens rotate --activate-after 0; en Docker: make jwt-init)"
+                    )
+                logger.warning(f"No JWT signing key in {self.keys_dir!r}; generating one")
+                try:
+                    generate_key(self.keys_dir)
+                except FileExistsError:
+                    pass
+                names = self._listing()
+            fingerprint = tuple(
+                (name, os.stat(os.path.join(self.keys_dir, name)).st_mtime_ns) for name in names
+            )
+            if fingerprint != self._fingerprint:
+                self._load(names)
+                self._fingerprint = fingerprint
+            self._checked_at = now
+
+    def _load(self, names: List[str]) -> None:
+        signing_keys = []
+        verification = {}
+        for name in names:
+            with open(os.path.join(self.keys_dir, name), "rb") as fh:
+                pem = fh.read()
+            kid = _kid(name)
+            if name.endswith(PUBLIC_SUFFIX):
+                public_pem = pem
+                private_key = None
+            else:
+                private = serialization.load_pem_private_key(pem, password=None)
+                public_pem = private.public_key().public_bytes(
+                    serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+                )
+                private_key = jwk.construct(pem, ALGORITHM)
+            entry = VerificationKey(kid, jwk.construct(public_pem, ALGORITHM), _public_jwk(kid, public_pem))
+            verification[kid] = entry
+            if private_key is not None:
+                # Names are sorted: oldest activation first
+                signing_keys.append(SigningKey(kid, entry.key, entry.public_jwk, private_key, activation_time(kid)))
+
+        self.signing_keys = signing_keys
+        self.verification = verification
+        self.jwks_body = json.dumps({"keys": [k.public_jwk for k in verification.values()]}).encode()
+        self.jwks_etag = '"' + sha256(self.jwks_body).hexdigest()[:32] + '"'
+
+    @property
+    def signing(self) -> Optional[SigningKey]:
+        return self.signing_key_at(datetime.now(timezone.utc))
+
+    def signing_key_at(self, now: datetime) -> Optional[SigningKey]:
+        """Newest private key active at `now` (the oldest pending one if none is)"""
+        for key in reversed(self.signing_keys):
+            if key.activates_at is None or key.activates_at <= now:
+                return key
+        return self.signing_keys[0] if self.signing_keys else None
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        self.refresh()
+        signing = self.signing
+        return jwt.encode(claims, signing.private_key, algorithm=ALGORITHM, headers={"kid": signing.kid})
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Decode and verify a token signed by any key still in the set
+
+        Raises:
+            JWTError on bad signature, expiry, or unknown kid
+        """
+        self.refresh()
+        kid = jwt.get_unverified_header(token).get("kid")
+        entry = self.verification.get(kid)
+        if entry is None and time.monotonic() - self._checked_at >= 1.0:
+            # Maybe rotated by another process since our last scan (at most
+            # one rescan per second, whatever kids clients make up)
+            self.refresh(force=True)
+            entry = self.verification.get(kid)
+        if entry is None:
+            raise JWTError(f"Unknown key id: {kid}")
+        return jwt.decode(token, entry.key, algorithms=[ALGORITHM])
+
+
+key_set = KeySet(
+    settings.JWT_KEYS_DIR,
+    settings.JWT_KEYS_RELOAD_SECONDS,
+    autogenerate=settings.ENVIRONMENT != "production",
+)
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    """Signed access token with `exp` (default ACCESS_TOKEN_EXPIRE_MINUTES)"""
+    claims = data.copy()
+    expire = datetime.now(timezone.utc) + (
+        expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    claims.update({"exp": expire})
+    return key_set.sign(claims)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verified claims of `token` (raises JWTError)"""
+    return key_set.verify(token)
+
+
+# ============================================
+# KEY MANAGEMENT CLI
+# ============================================
+
+def prune(keys_dir: str, keep: int) -> List[str]:
+    """Delete all but the `keep` newest keys; returns the removed kids"""
+    kids = sorted({_kid(name) for name in os.listdir(keys_dir) if name.endswith(PRIVATE_SUFFIX)})
+    removed = kids[:-keep] if keep > 0 else kids
+    for kid in removed:
+        for suffix in (PRIVATE_SUFFIX, PUBLIC_SUFFIX):
+            path = os.path.join(keys_dir, kid + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gestión de claves de firma JWT")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rotate_parser = sub.add_parser("rotate", help="Publicar una nueva clave de firma (firma tras --activate-after)")
+    rotate_parser.add_argument(
+        "--activate-after", type=float,
+        default=settings.JWT_JWKS_MAX_AGE_SECONDS + settings.JWT_KEYS_RELOAD_SECONDS,
+        help="Segundos hasta que firme: al menos el max-age del JWKS más el intervalo de recarga, "
+             "para que los consumidores ya la tengan (0 = inmediata, p.ej. primera clave)",
+    )
+    prune_parser = sub.add_parser("prune", help="Borrar claves viejas")
+    prune_parser.add_argument("--keep", type=int, default=2,
+                              help="Claves a conservar (las viejas deben sobrevivir a sus tokens)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "rotate":
+        kid = generate_key(settings.JWT_KEYS_DIR, activate_after=args.activate_after)
+        logger.info(f"✅ Nueva clave publicada: {kid} (firma desde {activation_time(kid).isoformat()})")
+    else:
+        for kid in prune(settings.JWT_KEYS_DIR, args.keep):
+            logger.info(f"🗑️  Clave eliminada: {kid}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Advisory locks
+
+Named locks held for the rest of the current transaction, for work that
+must run in a single process at a time (e.g. the outbox dispatcher or the
+periodic job scheduler) even with several workers running.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+
+def try_transaction_lock(db: Session, name: str) -> bool:
+    """
+    Take the lock `name` until commit/rollback without waiting
+
+    PostgreSQL: pg_try_advisory_xact_lock(hashtext(name)). Other engines
+    have no advisory locks; SQLite allows a single writer anyway, so the
+    lock is always granted there.
+
+    Returns:
+        False if another transaction holds the lock
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return bool(db.scalar(select(func.pg_try_advisory_xact_lock(func.hashtext(name)))))
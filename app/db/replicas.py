@@ -0,0 +1,216 @@
+"""
+Enrutamiento de lecturas a réplicas
+
+- get_read_db() entrega una sesión sobre una réplica (round-robin entre las
+  sanas) para endpoints de solo lectura; get_db() sigue yendo al primario.
+- Cada réplica se revisa como mucho cada REPLICA_HEALTH_CHECK_SECONDS: si no
+  responde o su atraso supera REPLICA_MAX_LAG_SECONDS queda fuera hasta la
+  próxima revisión. Sin réplicas disponibles se lee del primario.
+- La revisión corre en un thread aparte (un lock por réplica, sin esperar):
+  los requests usan siempre el último estado conocido y nunca esperan a una
+  réplica caída; la conexión tiene REPLICA_CONNECT_TIMEOUT_SECONDS.
+- Una réplica empieza como no sana (al arrancar y en cada worker tras el
+  fork): se lee del primario hasta que su primera revisión sale bien.
+- Read-your-writes: cuando un request hace commit en el primario,
+  ReadYourWritesMiddleware deja una cookie que manda las lecturas de ese
+  cliente al primario durante REPLICA_STICKY_SECONDS.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from sqlalchemy import create_engine, event, make_url, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "aurum_rw"
+
+# Segundos de atraso de la réplica (0 si ya aplicó todo lo recibido)
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    healthy: bool = False  # hasta la primera revisión
+    lag_seconds: float = 0.0
+    checked_at: float = float("-inf")
+    sessions: sessionmaker = field(init=False)
+    probe_lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine, info={"read_only": True})
+
+
+def measure_lag(engine: Engine) -> float:
+    """Atraso de replicación en segundos (SQLite no replica: 0)"""
+    with engine.connect() as conn:
+        if engine.dialect.name != "postgresql":
+            conn.execute(text("SELECT 1"))
+            return 0.0
+        return float(conn.execute(POSTGRES_LAG_SQL).scalar() or 0.0)
+
+
+class ReplicaRouter:
+    """Elige réplica por round-robin, saltando las caídas o atrasadas"""
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+        lag_probe: Callable[[Engine], float] = measure_lag,
+        background_checks: bool = True,
+    ):
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.lag_probe = lag_probe
+        self.background_checks = background_checks
+        self._next = itertools.count()
+
+    def check(self, replica: Replica) -> None:
+        try:
+            replica.lag_seconds = self.lag_probe(replica.engine)
+            replica.healthy = True
+        except Exception as exc:
+            if replica.healthy:
+                logger.warning(f"Replica {replica.name} unavailable: {exc!r}")
+            replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    def _refresh(self, replica: Replica) -> None:
+        if time.monotonic() - replica.checked_at < self.check_interval_seconds:
+            return
+        # Sin esperar: si otro thread ya la está revisando se usa el último estado
+        if not replica.probe_lock.acquire(blocking=False):
+            return
+        if not self.background_checks:
+            self._check_and_release(replica)
+            return
+        try:
+            threading.Thread(
+                target=self._check_and_release, args=(replica,), name=f"{replica.name}-check", daemon=True
+            ).start()
+        except RuntimeError:
+            replica.probe_lock.release()
+            raise
+
+    def _check_and_release(self, replica: Replica) -> None:
+        try:
+            self.check(replica)
+        finally:
+            replica.probe_lock.release()
+
+    def usable(self, replica: Replica) -> bool:
+        self._refresh(replica)
+        return replica.healthy and replica.lag_seconds <= self.max_lag_seconds
+
+    def choose(self) -> Optional[Replica]:
+        """Siguiente réplica usable, o None para leer del primario"""
+        count = len(self.replicas)
+        if not count:
+            return None
+        start = next(self._next)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if self.usable(replica):
+                return replica
+        return None
+
+
+def replica_engine(url: str) -> Engine:
+    """Engine con timeout de conexión: una réplica caída no retiene un thread por minutos"""
+    connect_args = {}
+    if make_url(url).get_backend_name() == "postgresql":
+        connect_args["connect_timeout"] = settings.REPLICA_CONNECT_TIMEOUT_SECONDS
+    return create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+
+
+def build_router() -> ReplicaRouter:
+    urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    replicas = [Replica(name=f"replica{i}", engine=replica_engine(url)) for i, url in enumerate(urls)]
+    return ReplicaRouter(replicas, settings.REPLICA_MAX_LAG_SECONDS, settings.REPLICA_HEALTH_CHECK_SECONDS)
+
+
+# ============================================
+# READ-YOUR-WRITES
+# ============================================
+
+@dataclass
+class RequestRouting:
+    """Estado por request compartido con los threads de las dependencias"""
+    sticky: bool = False
+    wrote: bool = False
+
+
+routing_var: ContextVar[Optional[RequestRouting]] = ContextVar("replica_routing", default=None)
+
+
+def mark_write(session: Session) -> None:
+    """after_commit: el request actual escribió en el primario"""
+    routing = routing_var.get()
+    if routing is not None and not session.info.get("read_only"):
+        routing.wrote = True
+
+
+def reads_from_primary() -> bool:
+    routing = routing_var.get()
+    return routing is not None and (routing.sticky or routing.wrote)
+
+
+def install() -> None:
+    if not event.contains(Session, "after_commit", mark_write):
+        event.listen(Session, "after_commit", mark_write)
+
+
+def _sticky_cookie(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            for part in value.decode("latin-1").split(";"):
+                key, _, until = part.strip().partition("=")
+                if key == STICKY_COOKIE:
+                    try:
+                        return float(until) > time.time()
+                    except ValueError:
+                        return False
+    return False
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware: cookie que fija las lecturas al primario tras un commit"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        routing = RequestRouting(sticky=_sticky_cookie(scope))
+        token = routing_var.set(routing)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and routing.wrote:
+                seconds = settings.REPLICA_STICKY_SECONDS
+                cookie = f"{STICKY_COOKIE}={time.time() + seconds:.0f}; Max-Age={seconds}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            routing_var.reset(token)
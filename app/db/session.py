@@ -2,6 +2,8 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.db import replicas
+
 # Construir la URL de la base de datos usando variables de entorno con fallback
 # Esto permite ejecutar la app localmente contra Docker (db) o contra localhost
 DB_HOST = os.getenv("POSTGRES_SERVER", "localhost")
@@ -23,3 +25,34 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Réplicas de lectura (DATABASE_REPLICA_URLS); sin réplicas todo va al primario
+replica_router = replicas.build_router()
+
+
+def get_read_db():
+    """
+    Sesión para endpoints de solo lectura
+
+    Va a una réplica sana y al día, salvo que el cliente haya escrito hace
+    poco (read-your-writes) o que no haya ninguna disponible.
+    """
+    replica = None if replicas.reads_from_primary() else replica_router.choose()
+    db = replica.sessions() if replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def dispose_engines() -> None:
+    """
+    Descartar los pools heredados tras un fork (gunicorn post_fork)
+
+    close=False: las conexiones del padre no se cierran (siguen siendo suyas),
+    solo se olvidan; el worker abre las propias.
+    """
+    engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.engine.dispose(close=False)
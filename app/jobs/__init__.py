@@ -0,0 +1,23 @@
+"""
+Background jobs
+
+Durable job queue backed by the background_jobs table:
+
+- enqueue() from any router or service adds the job to the caller's
+  transaction, so it only becomes visible if the write that produced it
+  commits.
+- Workers claim batches with SELECT ... FOR UPDATE SKIP LOCKED: several
+  worker processes never pick the same job and never wait on each other.
+- Failed jobs are retried with exponential backoff up to max_attempts.
+  Delivery is at-least-once, so handlers must be idempotent.
+- Handlers registered with every_seconds (company metrics reconciliation,
+  purge of soft-deleted rows, expired invitations sweep) are enqueued by
+  the workers themselves whenever no run of them is pending.
+
+Run a worker with `python -m app.jobs.worker`, or inside the API process
+with JOBS_RUN_IN_PROCESS=True.
+"""
+from app.jobs.queue import enqueue
+from app.jobs.registry import job
+
+__all__ = ["enqueue", "job"]
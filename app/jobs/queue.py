@@ -0,0 +1,233 @@
+"""
+Queue operations on the background_jobs table
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.locks import try_transaction_lock
+from app.jobs.registry import JobSpec, get_spec
+from app.models.jobs import BackgroundJob
+from app.repositories.updates import commit_keeping_state
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MAX_ERROR_LENGTH = 2000
+
+
+@dataclass
+class QueueStats:
+    queue: str
+    ready: int
+    oldest_run_at: Optional[datetime]
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes (stored in UTC)"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    delay_seconds: float = 0,
+    queue: Optional[str] = None,
+) -> BackgroundJob:
+    """
+    Add a job to the caller's transaction (no commit)
+
+    Raises:
+        ValueError if no handler is registered under `name`
+    """
+    spec = get_spec(name)
+    if spec is None:
+        raise ValueError(f"Unknown job: {name}")
+
+    job = BackgroundJob(
+        name=name,
+        queue=queue or spec.queue,
+        payload=payload or {},
+        max_attempts=spec.max_attempts,
+    )
+    if delay_seconds:
+        job.run_at = utcnow() + timedelta(seconds=delay_seconds)
+    db.add(job)
+    return job
+
+
+def claim(db: Session, queue: str, limit: int, worker_id: str) -> List[BackgroundJob]:
+    """
+    Lock up to `limit` ready jobs of `queue` for this worker and commit
+
+    One UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING:
+    rows being claimed by another worker are skipped instead of waited on.
+    SQLite has no row locks; its single writer makes the UPDATE atomic.
+    """
+    candidates = (
+        select(BackgroundJob.id)
+        .where(
+            BackgroundJob.status == QUEUED,
+            BackgroundJob.queue == queue,
+            BackgroundJob.run_at <= func.now(),
+        )
+        .order_by(BackgroundJob.run_at, BackgroundJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id.in_(candidates))
+        .values(
+            status=RUNNING,
+            attempts=BackgroundJob.attempts + 1,
+            locked_at=func.now(),
+            locked_by=worker_id,
+        )
+        .returning(BackgroundJob)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).scalars().all()
+    commit_keeping_state(db)
+    return sorted(jobs, key=lambda job: (as_utc(job.run_at), job.id))
+
+
+def mark_done(db: Session, job_id: int) -> None:
+    """Finish a job in the handler's transaction (no commit)"""
+    db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id)
+        .values(status=DONE, finished_at=func.now(), last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = min(
+        settings.JOBS_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.JOBS_BACKOFF_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def mark_failed(db: Session, job: BackgroundJob, error: str, retry: bool = True) -> str:
+    """
+    Schedule a retry or give up (after max_attempts, or retry=False), and commit
+
+    Returns:
+        "retry" or "failed"
+    """
+    values: Dict[str, Any] = {"last_error": error[:MAX_ERROR_LENGTH], "locked_by": None}
+    if not retry or job.attempts >= job.max_attempts:
+        outcome = FAILED
+        values.update(status=FAILED, finished_at=func.now())
+    else:
+        outcome = "retry"
+        values.update(status=QUEUED, run_at=utcnow() + timedelta(seconds=backoff_seconds(job.attempts)))
+
+    db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return outcome
+
+
+# ============================================
+# PERIODIC JOBS
+# ============================================
+
+def schedule_periodic(db: Session, specs: List[JobSpec]) -> List[BackgroundJob]:
+    """
+    Enqueue each periodic job that has no queued or running instance, and commit
+
+    The next run is due `every_seconds` after the last one finished (now if
+    it never ran). Runs under an advisory lock so several workers don't
+    enqueue the same job twice.
+    """
+    if not specs or not try_transaction_lock(db, "background_jobs.schedule"):
+        db.rollback()
+        return []
+
+    names = [spec.name for spec in specs]
+    pending = set(db.scalars(
+        select(BackgroundJob.name).where(
+            BackgroundJob.name.in_(names),
+            BackgroundJob.status.in_((QUEUED, RUNNING)),
+        )
+    ))
+    last_finished = dict(db.execute(
+        select(BackgroundJob.name, func.max(BackgroundJob.finished_at))
+        .where(BackgroundJob.name.in_(names), BackgroundJob.finished_at.is_not(None))
+        .group_by(BackgroundJob.name)
+    ).all())
+
+    now = utcnow()
+    scheduled = []
+    for spec in specs:
+        if spec.name in pending:
+            continue
+        job = enqueue(db, spec.name)
+        finished = last_finished.get(spec.name)
+        if finished is not None and as_utc(finished) + timedelta(seconds=spec.every_seconds) > now:
+            job.run_at = as_utc(finished) + timedelta(seconds=spec.every_seconds)
+        scheduled.append(job)
+    db.commit()
+    return scheduled
+
+
+# ============================================
+# HOUSEKEEPING
+# ============================================
+
+def requeue_stale(db: Session, timeout_seconds: float) -> int:
+    """Put back jobs whose worker died while running them"""
+    result = db.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.status == RUNNING,
+            BackgroundJob.locked_at < utcnow() - timedelta(seconds=timeout_seconds),
+        )
+        .values(status=QUEUED, locked_by=None, run_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def delete_finished(db: Session, older_than_hours: float) -> int:
+    """Drop done jobs (failed ones are kept for inspection)"""
+    result = db.execute(
+        delete(BackgroundJob)
+        .where(
+            BackgroundJob.status == DONE,
+            BackgroundJob.finished_at < utcnow() - timedelta(hours=older_than_hours),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def queue_stats(db: Session) -> List[QueueStats]:
+    """Ready jobs per queue and the run_at of the oldest one (queue lag)"""
+    rows = db.execute(
+        select(BackgroundJob.queue, func.count(), func.min(BackgroundJob.run_at))
+        .where(BackgroundJob.status == QUEUED, BackgroundJob.run_at <= func.now())
+        .group_by(BackgroundJob.queue)
+    ).all()
+    return [QueueStats(queue, ready, as_utc(oldest) if oldest else None) for queue, ready, oldest in rows]
@@ -0,0 +1,51 @@
+"""
+Job handlers by name
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class JobSpec:
+    name: str
+    func: Callable
+    queue: str
+    max_attempts: int
+    every_seconds: Optional[float] = None
+
+
+handlers: Dict[str, JobSpec] = {}
+
+
+def job(
+    name: str,
+    queue: str = "default",
+    max_attempts: Optional[int] = None,
+    every_seconds: Optional[float] = None,
+):
+    """
+    Register a handler: `func(db, **payload)`
+
+    The handler runs in its own session; the worker commits it together
+    with marking the job as done. With `every_seconds` (> 0) the workers
+    serving `queue` also enqueue it periodically, without payload (see
+    queue.schedule_periodic).
+    """
+    def decorator(func: Callable) -> Callable:
+        handlers[name] = JobSpec(
+            name, func, queue, max_attempts or settings.JOBS_MAX_ATTEMPTS, every_seconds or None
+        )
+        return func
+    return decorator
+
+
+def periodic_specs(queues: Iterable[str]) -> List[JobSpec]:
+    """Handlers with a schedule on any of `queues`"""
+    queues = set(queues)
+    return [spec for spec in handlers.values() if spec.every_seconds and spec.queue in queues]
+
+
+def get_spec(name: str) -> Optional[JobSpec]:
+    return handlers.get(name)
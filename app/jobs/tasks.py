@@ -0,0 +1,33 @@
+"""
+Registered job handlers
+
+Import this module to register them (the worker does it at startup).
+Handlers with every_seconds are enqueued periodically by the workers that
+serve their queue; 0 in the matching setting disables the schedule.
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.jobs.registry import job
+from app.services import archival, company_metrics, invitations
+
+
+@job("company_metrics.reconcile", queue="maintenance", max_attempts=3,
+     every_seconds=settings.COMPANY_METRICS_RECONCILE_EVERY_SECONDS)
+def reconcile_company_metrics(db: Session, batch_size: int = 500) -> None:
+    company_metrics.reconcile_company_metrics(db, batch_size=batch_size)
+
+
+@job("archival.purge", queue="maintenance", max_attempts=3, every_seconds=settings.PURGE_EVERY_SECONDS)
+def purge_deleted(db: Session, retention_days: Optional[int] = None) -> None:
+    if retention_days is None:
+        retention_days = settings.PURGE_RETENTION_DAYS
+    archival.purge_deleted(db, retention_days=retention_days)
+
+
+@job("invitations.sweep", queue="maintenance", max_attempts=3,
+     every_seconds=settings.INVITATION_SWEEP_EVERY_SECONDS)
+def sweep_expired_invitations(db: Session) -> None:
+    invitations.sweep_expired(db)
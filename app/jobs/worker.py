@@ -0,0 +1,338 @@
+"""
+Background job worker
+
+Claims ready jobs queue by queue, runs each handler in its own session and
+records queue lag (time between run_at and the job starting), durations and
+outcomes. Every JOBS_HOUSEKEEPING_INTERVAL_SECONDS it also refreshes the
+ready/oldest gauges, requeues jobs left 'running' by a dead worker, drops
+old finished jobs and enqueues the periodic jobs of its queues (handlers
+registered with every_seconds) that have no pending run.
+
+With dispatch_outbox=True (OUTBOX_ENABLED) each cycle also delivers a batch
+of domain events from the outbox (app.services.outbox).
+
+The loop is async: batches run in a thread so the worker can share the event
+loop of the API (JOBS_RUN_IN_PROCESS=True) without blocking requests.
+
+Usage:
+    python -m app.jobs.worker [--queues default,maintenance] [--once] [--metrics-port 9100]
+    python -m app.jobs.worker --enqueue archival.purge [--payload '{"retention_days": 30}']
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import LatencyHistogram, registry
+from app.jobs import queue as job_queue
+from app.jobs.registry import get_spec, periodic_specs
+from app.models.jobs import BackgroundJob
+from app.services import outbox
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# METRICS
+# ============================================
+
+class JobMetrics:
+    """Queue lag, duration and outcome metrics, exported through /metrics"""
+
+    def __init__(self):
+        self.lag: Dict[str, LatencyHistogram] = {}
+        self.duration: Dict[str, LatencyHistogram] = {}
+        self.outcomes: Dict[Tuple[str, str], int] = {}
+        self.ready: Dict[str, Tuple[int, float]] = {}  # queue -> (jobs, oldest age in s)
+        self._lock = threading.Lock()
+
+    def started(self, job: BackgroundJob) -> None:
+        lag_s = (job_queue.utcnow() - job_queue.as_utc(job.run_at)).total_seconds()
+        with self._lock:
+            self.lag.setdefault(job.queue, LatencyHistogram()).record(max(int(lag_s * 1_000_000), 0))
+
+    def finished(self, job: BackgroundJob, outcome: str, duration_us: int) -> None:
+        with self._lock:
+            self.duration.setdefault(job.name, LatencyHistogram()).record(duration_us)
+            key = (job.name, outcome)
+            self.outcomes[key] = self.outcomes.get(key, 0) + 1
+
+    def set_ready(self, stats: List[job_queue.QueueStats]) -> None:
+        now = job_queue.utcnow()
+        ready = {
+            s.queue: (s.ready, (now - s.oldest_run_at).total_seconds() if s.oldest_run_at else 0.0)
+            for s in stats
+        }
+        with self._lock:
+            # Queues that drained report 0 instead of disappearing
+            self.ready = {queue: (0, 0.0) for queue in self.ready}
+            self.ready.update(ready)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.lag.clear()
+            self.duration.clear()
+            self.outcomes.clear()
+            self.ready.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            lag = dict(self.lag)
+            duration = dict(self.duration)
+            outcomes = dict(self.outcomes)
+            ready = dict(self.ready)
+
+        lines = [
+            "# HELP background_job_lag_seconds Time from run_at until a worker started the job",
+            "# TYPE background_job_lag_seconds summary",
+        ]
+        lines += _summary_lines("background_job_lag_seconds", "queue", lag)
+        lines += [
+            "# HELP background_job_duration_seconds Job handler duration",
+            "# TYPE background_job_duration_seconds summary",
+        ]
+        lines += _summary_lines("background_job_duration_seconds", "name", duration)
+        lines += [
+            "# HELP background_jobs_total Finished job attempts by outcome (done, retry, failed)",
+            "# TYPE background_jobs_total counter",
+        ]
+        for (name, outcome), value in sorted(outcomes.items()):
+            lines.append(f'background_jobs_total{{name="{name}",outcome="{outcome}"}} {value}')
+        lines += [
+            "# HELP background_jobs_ready Jobs ready to run and not yet claimed",
+            "# TYPE background_jobs_ready gauge",
+        ]
+        for queue, (count, _) in sorted(ready.items()):
+            lines.append(f'background_jobs_ready{{queue="{queue}"}} {count}')
+        lines += [
+            "# HELP background_jobs_oldest_ready_seconds Age of the oldest ready job",
+            "# TYPE background_jobs_oldest_ready_seconds gauge",
+        ]
+        for queue, (_, age) in sorted(ready.items()):
+            lines.append(f'background_jobs_oldest_ready_seconds{{queue="{queue}"}} {age:.3f}')
+        return lines
+
+
+def _summary_lines(metric: str, label: str, histograms: Dict[str, LatencyHistogram]) -> List[str]:
+    lines = []
+    for key, hist in sorted(histograms.items()):
+        for quantile in registry.EXPORT_QUANTILES:
+            lines.append(f'{metric}{{{label}="{key}",quantile="{quantile}"}} '
+                         f'{hist.percentile(quantile * 100) / 1_000_000:.6f}')
+        lines.append(f'{metric}_sum{{{label}="{key}"}} {hist.sum_us / 1_000_000:.6f}')
+        lines.append(f'{metric}_count{{{label}="{key}"}} {hist.count}')
+    return lines
+
+
+job_metrics = JobMetrics()
+registry.register_collector(job_metrics.render)
+
+
+# ============================================
+# WORKER
+# ============================================
+
+def _default_session_factory() -> Session:
+    from app.db.session import SessionLocal
+    return SessionLocal()
+
+
+def configured_queues() -> List[str]:
+    return [name.strip() for name in settings.JOBS_QUEUES.split(",") if name.strip()]
+
+
+class Worker:
+    """Claims and runs jobs from `queues` until stopped"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = _default_session_factory,
+        queues: Optional[Sequence[str]] = None,
+        batch_size: int = settings.JOBS_BATCH_SIZE,
+        poll_interval: float = settings.JOBS_POLL_INTERVAL_SECONDS,
+        metrics: JobMetrics = job_metrics,
+        dispatch_outbox: bool = False,
+    ):
+        self.session_factory = session_factory
+        self.queues = list(queues or configured_queues())
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.metrics = metrics
+        self.dispatch_outbox = dispatch_outbox
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._last_housekeeping = 0.0
+
+    def run_once(self) -> int:
+        """Claim one batch per queue and run it; returns the number of jobs/events handled"""
+        processed = 0
+        for queue_name in self.queues:
+            with self.session_factory() as db:
+                jobs = job_queue.claim(db, queue_name, self.batch_size, self.worker_id)
+            for job in jobs:
+                self.execute(job)
+            processed += len(jobs)
+        if self.dispatch_outbox:
+            with self.session_factory() as db:
+                processed += outbox.dispatch_pending(db)
+        return processed
+
+    def execute(self, job: BackgroundJob) -> str:
+        self.metrics.started(job)
+        spec = get_spec(job.name)
+        start = time.perf_counter_ns()
+
+        with self.session_factory() as db:
+            try:
+                if spec is None:
+                    raise LookupError(f"No handler registered for job {job.name!r}")
+                spec.func(db, **job.payload)
+                job_queue.mark_done(db, job.id)
+                db.commit()
+                outcome = job_queue.DONE
+            except Exception as exc:
+                db.rollback()
+                logger.warning(f"Job {job.id} ({job.name}) failed on attempt {job.attempts}: {exc!r}")
+                outcome = job_queue.mark_failed(
+                    db, job, f"{exc!r}\n{traceback.format_exc()}", retry=spec is not None
+                )
+
+        self.metrics.finished(job, outcome, (time.perf_counter_ns() - start) // 1000)
+        return outcome
+
+    def housekeeping(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_housekeeping < settings.JOBS_HOUSEKEEPING_INTERVAL_SECONDS:
+            return
+        self._last_housekeeping = now
+        with self.session_factory() as db:
+            requeued = job_queue.requeue_stale(db, settings.JOBS_LOCK_TIMEOUT_SECONDS)
+            if requeued:
+                logger.warning(f"Requeued {requeued} stale running jobs")
+            job_queue.delete_finished(db, settings.JOBS_KEEP_DONE_HOURS)
+            for scheduled in job_queue.schedule_periodic(db, periodic_specs(self.queues)):
+                logger.info(f"Scheduled periodic job {scheduled.id} ({scheduled.name})")
+            self.metrics.set_ready(job_queue.queue_stats(db))
+            if self.dispatch_outbox:
+                outbox.housekeeping(db)
+
+    def drain(self) -> int:
+        """Run until no job is ready (tests, --once)"""
+        total = 0
+        while True:
+            self.housekeeping(force=True)
+            processed = self.run_once()
+            if not processed:
+                return total
+            total += processed
+
+    async def run(self, stop: asyncio.Event) -> None:
+        logger.info(f"Worker {self.worker_id} listening on {', '.join(self.queues)}")
+        while not stop.is_set():
+            try:
+                await asyncio.to_thread(self.housekeeping)
+                processed = await asyncio.to_thread(self.run_once)
+            except Exception:
+                logger.exception("Worker loop error")
+                processed = 0
+            if not processed:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+
+
+@contextlib.asynccontextmanager
+async def in_process_worker():
+    """Run a worker on the current event loop for the duration of the block"""
+    import app.jobs.tasks  # noqa: F401  (registers handlers)
+
+    stop = asyncio.Event()
+    task = asyncio.create_task(Worker(dispatch_outbox=settings.OUTBOX_ENABLED).run(stop))
+    try:
+        yield
+    finally:
+        stop.set()
+        await task
+
+
+# ============================================
+# CLI
+# ============================================
+
+def serve_metrics(port: int) -> ThreadingHTTPServer:
+    """Expose registry.render_prometheus() on http://0.0.0.0:<port>/metrics"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    import app.jobs.tasks  # noqa: F401  (registers handlers)
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Worker de background jobs")
+    parser.add_argument("--queues", default=settings.JOBS_QUEUES, help="Colas separadas por coma")
+    parser.add_argument("--once", action="store_true", help="Procesar lo pendiente y salir")
+    parser.add_argument("--metrics-port", type=int, help="Servir /metrics en este puerto")
+    parser.add_argument("--enqueue", metavar="NAME", help="Encolar un job y salir")
+    parser.add_argument("--payload", default="{}", help="Payload JSON para --enqueue")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    if args.enqueue:
+        with SessionLocal() as db:
+            job = job_queue.enqueue(db, args.enqueue, json.loads(args.payload))
+            db.commit()
+            logger.info(f"✅ Job {job.id} ({job.name}) encolado en '{job.queue}'")
+        return
+
+    if settings.OUTBOX_ENABLED:
+        outbox.install()
+    worker = Worker(
+        queues=[q.strip() for q in args.queues.split(",") if q.strip()],
+        dispatch_outbox=settings.OUTBOX_ENABLED,
+    )
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    if args.once:
+        logger.info(f"✅ {worker.drain()} jobs procesados")
+        return
+
+    async def run_until_signal():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await worker.run(stop)
+
+    asyncio.run(run_until_signal())
+
+
+if __name__ == "__main__":
+    main()
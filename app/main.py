@@ -1,6 +1,10 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from pydantic import BaseModel
 
 # Imports de Schemas y Modelos
@@ -17,20 +21,89 @@ from app.api.v1 import universities
 from app.api.v1 import empresas
 from app.api.v1 import company_users
 from app.api.v1 import simulations
+from app.api.v1 import profiles
 from app.api.v1.users import router as users_router # IMPORTACION DIRECTA DEL ARCHIVO
 
-from app.db.session import get_db
+from app.db import replicas
+from app.db.replicas import ReadYourWritesMiddleware
+from app.db.session import get_db, replica_router
+from app.core import lockout, passwords, tokens
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, install_sql_comments, install_trace_logging, registry
+from app.core.profiling import ProfilingMiddleware
+from app.core.rate_limit import RateLimitMiddleware, enforce
+from app.jobs.worker import in_process_worker
+from app.services import outbox
+import app.jobs.tasks  # registra los handlers para jobs.enqueue()
 
 class Token(BaseModel):
     access_token: str
     token_type: str
 
-app = FastAPI(title="Aurum API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sin clave de firma JWT en producción el proceso no arranca (MissingSigningKeyError)
+    tokens.key_set.refresh(force=True)
+    # Worker de background jobs en el mismo proceso (en producción: python -m app.jobs.worker)
+    if settings.JOBS_RUN_IN_PROCESS:
+        async with in_process_worker():
+            yield
+    else:
+        yield
+
+app = FastAPI(title="Aurum API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+# Lecturas a réplicas: tras un commit, el cliente lee del primario un rato
+if replica_router.replicas:
+    replicas.install()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Métricas por endpoint y trace id (middleware más externo: mide también los 429)
+install_trace_logging()
+if settings.METRICS_SQL_COMMENTS:
+    install_sql_comments()
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Eventos de dominio en la misma transacción que cada escritura
+if settings.OUTBOX_ENABLED:
+    outbox.install()
+
+@app.exception_handler(StaleDataError)
+async def stale_data(request: Request, exc: StaleDataError):
+    # Flush del ORM sobre una fila versionada que otro request cambió antes
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Resource was modified by another request; reload it and retry"},
+    )
 
 @app.get("/")
 def root():
     return {"status": "online"}
 
+@app.get("/health", include_in_schema=False)
+def health():
+    # Healthcheck del contenedor y readiness de los workers (sin tocar la DB)
+    return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+def jwks(request: Request):
+    # Claves públicas para verificar tokens sin llamar a esta API (cacheable)
+    tokens.key_set.refresh()
+    headers = {
+        "ETag": tokens.key_set.jwks_etag,
+        "Cache-Control": f"public, max-age={settings.JWT_JWKS_MAX_AGE_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == tokens.key_set.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(tokens.key_set.jwks_body, media_type="application/json", headers=headers)
+
 # Registro de Routers
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
 app.include_router(catalogs.router, prefix="/api/v1", tags=["catalogs"])
@@ -39,12 +112,33 @@ app.include_router(empresas.router, prefix="/api/v1/empresas", tags=["empresas"]
 app.include_router(company_users.router, prefix="/api/v1", tags=["company-users"])
 app.include_router(simulations.router, prefix="/api/v1/simulations", tags=["simulations"])
 app.include_router(users_router, prefix="/api/v1/users", tags=["users"]) # Usamos el router importado explícitamente
+app.include_router(profiles.router, prefix="/api/v1", tags=["profiling"])
 
+# def (no async): la DB y bcrypt corren en el threadpool, sin bloquear el event loop del worker
 @app.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login_for_access_token(
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db),
+):
+    # Throttle por username (además del límite por IP del middleware) antes de bcrypt
+    enforce("login_user", form_data.username.lower())
     user = auth.get_user(db, form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    # Username bloqueado (exista o no la cuenta): se rechaza sin pagar bcrypt
+    lockout.ensure_not_locked(form_data.username, user)
+    # Sin usuario se verifica contra un hash de relleno: mismo costo bcrypt, mismo tiempo
+    password_ok = auth.verify_password(form_data.password, user.hashed_password if user else passwords.dummy_hash())
+    if not user or not password_ok:
+        locked_until = lockout.register_failure(db, form_data.username, user)
+        if locked_until is not None:
+            raise lockout.locked_error(locked_until)
         raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+    lockout.register_success(db, user)
+    # Hash con un costo distinto a BCRYPT_ROUNDS: se regenera después de responder
+    if passwords.needs_rehash(user.hashed_password):
+        background_tasks.add_task(
+            passwords.rehash_in_background, user.id, form_data.password, user.hashed_password
+        )
     access_token = auth.create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
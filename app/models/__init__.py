@@ -14,6 +14,8 @@ from app.models.simulations import (
     Simulation, SimulationModule, ModuleTask,
     TaskResource, ModelAnswer
 )
+from app.models.jobs import BackgroundJob
+from app.models.outbox import OutboxEvent
 
 __all__ = [
     "User",
@@ -21,5 +23,6 @@ __all__ = [
     "Industry", "ContentCategory", "SkillCatalog",
     "University", "Career",
     "Empresa", "CompanyUser",
-    "Simulation", "SimulationModule", "ModuleTask"
+    "Simulation", "SimulationModule", "ModuleTask",
+    "BackgroundJob", "OutboxEvent",
 ]
@@ -17,7 +17,7 @@ class Region(Base):
     """Regiones del Ecuador: Costa, Sierra, Amazonía, Insular"""
     __tablename__ = "regions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
     code = Column(String(10), unique=True, nullable=False, index=True)
     description = Column(Text)
@@ -38,7 +38,7 @@ class Province(Base):
     """Provincias del Ecuador (24 provincias)"""
     __tablename__ = "provinces"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     region_id = Column(Integer, ForeignKey("regions.id"), nullable=False, index=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
     code = Column(String(10), unique=True, nullable=False, index=True, comment="INEC Code")
@@ -60,7 +60,7 @@ class City(Base):
     """Ciudades del Ecuador"""
     __tablename__ = "cities"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     province_id = Column(Integer, ForeignKey("provinces.id"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     is_capital = Column(Boolean, default=False)
@@ -89,7 +89,7 @@ class Industry(Base):
     """
     __tablename__ = "industries"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
     slug = Column(String(100), unique=True, nullable=False, index=True)
     description = Column(Text)
@@ -122,7 +122,7 @@ class ContentCategory(Base):
     """
     __tablename__ = "content_categories"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
     slug = Column(String(100), unique=True, nullable=False, index=True)
     description = Column(Text)
@@ -155,7 +155,7 @@ class SkillCatalog(Base):
     """
     __tablename__ = "skills_catalog"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(150), unique=True, nullable=False, index=True)
     slug = Column(String(150), unique=True, nullable=False, index=True)
     category = Column(String(50), nullable=False, index=True, 
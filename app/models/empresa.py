@@ -2,7 +2,7 @@
 Modelo de Empresas Partner (B2B)
 Versión corregida sin FK a tabla inexistente
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, DECIMAL
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, DECIMAL, Index, text
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -13,9 +13,17 @@ class Empresa(Base):
     Representa empresas que crean simulaciones educativas
     """
     __tablename__ = "empresas"
+    __table_args__ = (
+        # Solo filas eliminadas: lo que recorre el job de purga
+        Index(
+            "ix_empresas_eliminado_en", "eliminado_en",
+            postgresql_where=text("eliminado_en IS NOT NULL"),
+            sqlite_where=text("eliminado_en IS NOT NULL"),
+        ),
+    )
     
     # Identificación
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     nombre_empresa = Column(String(200), unique=True, nullable=False, index=True)
     slug = Column(String(200), unique=True, nullable=False, index=True)
     
@@ -69,6 +77,10 @@ class Empresa(Base):
     # Timestamps
     creado_en = Column(DateTime(timezone=True), server_default=func.now())
     actualizado_en = Column(DateTime(timezone=True), onupdate=func.now())
+    eliminado_en = Column(DateTime(timezone=True), comment="Soft delete; purgado por app.services.archival")
+    version = Column(Integer, nullable=False, server_default=text("1"), comment="Concurrencia optimista (If-Match)")
+
+    __mapper_args__ = {"version_id_col": version}
     
     def __repr__(self):
         return f"<Empresa {self.nombre_empresa}>"
@@ -0,0 +1,47 @@
+"""
+Background Jobs Model
+Durable queue for work that should not run inside the request
+(see app.jobs)
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class BackgroundJob(Base):
+    """
+    One queued unit of work: `name` selects the registered handler and
+    `payload` holds its keyword arguments
+    """
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        # Dequeue: oldest ready job of a queue, queued rows only
+        Index(
+            "ix_background_jobs_queued_queue_run_at", "queue", "run_at",
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        # Stale lock recovery: running rows only
+        Index(
+            "ix_background_jobs_running_locked_at", "locked_at",
+            postgresql_where=text("status = 'running'"),
+            sqlite_where=text("status = 'running'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    queue = Column(String(50), nullable=False, default="default")
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    status = Column(String(20), nullable=False, default="queued", comment="queued, running, done, failed")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text)
+
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True))
+    locked_by = Column(String(100))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
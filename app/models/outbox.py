@@ -0,0 +1,32 @@
+"""
+Outbox Model
+Domain events written in the same transaction as the change that produced
+them (see app.services.outbox)
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class OutboxEvent(Base):
+    """
+    One change to an aggregate (simulation, empresa, company_user, user),
+    e.g. "simulation.updated" with the changed fields as payload
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Dispatcher: pending events (dispatched_at IS NULL) in id order
+        Index("ix_outbox_events_dispatched_at_id", "dispatched_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    aggregate_type = Column(String(50), nullable=False)
+    aggregate_id = Column(Integer, nullable=False)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    trace_id = Column(String(64))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
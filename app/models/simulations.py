@@ -2,7 +2,7 @@
 Simulation Models (Core Content)
 Hierarchical structure: Simulation -> Modules -> Tasks -> Resources
 """
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime, Numeric, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime, Numeric, JSON, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -12,11 +12,20 @@ class Simulation(Base):
     Simulación principal (ej: "Banca de Inversión - JPMorgan")
     """
     __tablename__ = "simulations"
+    __table_args__ = (
+        Index("ix_simulations_company_id_state", "company_id", "state"),
+        # Only soft-deleted rows: what the purge job scans
+        Index(
+            "ix_simulations_deleted_at", "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     # Relationships
-    company_id = Column(Integer, ForeignKey("empresas.id"), nullable=False, index=True)
+    company_id = Column(Integer, ForeignKey("empresas.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("content_categories.id"), nullable=False, index=True)
     
     # Info
@@ -47,6 +56,12 @@ class Simulation(Base):
     # Standard Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), comment="Soft delete; purged by app.services.archival")
+    version = Column(Integer, nullable=False, server_default=text("1"), comment="Optimistic concurrency (If-Match)")
+    # Template lineage; no FK so purging the source never blocks on its clones
+    cloned_from_id = Column(Integer, comment="Source simulation when created by POST /simulations/{id}/clone")
+
+    __mapper_args__ = {"version_id_col": version}
 
     # ORM Relationships
     company = relationship("Empresa", backref="simulations")
@@ -59,9 +74,12 @@ class SimulationModule(Base):
     Módulos o Capítulos de la simulación
     """
     __tablename__ = "simulation_modules"
+    __table_args__ = (
+        Index("ix_simulation_modules_simulation_id_order", "simulation_id", "order"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    simulation_id = Column(Integer, ForeignKey("simulations.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    simulation_id = Column(Integer, ForeignKey("simulations.id"), nullable=False)
     
     title = Column(String(200), nullable=False)
     description = Column(Text)
@@ -71,6 +89,10 @@ class SimulationModule(Base):
     estimated_hours = Column(Numeric(4, 2))
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, nullable=False, server_default=text("1"))
+    cloned_from_id = Column(Integer, comment="Source module: id remapping for set-based clones")
+
+    __mapper_args__ = {"version_id_col": version}
     
     # ORM
     simulation = relationship("Simulation", back_populates="modules")
@@ -82,9 +104,12 @@ class ModuleTask(Base):
     Tareas específicas dentro de un módulo
     """
     __tablename__ = "module_tasks"
+    __table_args__ = (
+        Index("ix_module_tasks_module_id_order", "module_id", "order"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    module_id = Column(Integer, ForeignKey("simulation_modules.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    module_id = Column(Integer, ForeignKey("simulation_modules.id"), nullable=False)
     
     title = Column(String(300), nullable=False)
     description = Column(Text)
@@ -102,6 +127,10 @@ class ModuleTask(Base):
     xp_reward = Column(Integer, default=50)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, nullable=False, server_default=text("1"))
+    cloned_from_id = Column(Integer, comment="Source task: id remapping for set-based clones")
+
+    __mapper_args__ = {"version_id_col": version}
     
     # ORM
     module = relationship("SimulationModule", back_populates="tasks")
@@ -115,7 +144,7 @@ class TaskResource(Base):
     """
     __tablename__ = "task_resources"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey("module_tasks.id"), nullable=False, index=True)
     
     name = Column(String(300), nullable=False)
@@ -133,7 +162,7 @@ class ModelAnswer(Base):
     """
     __tablename__ = "model_answers"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey("module_tasks.id"), nullable=False, unique=True)
     
     description = Column(Text)
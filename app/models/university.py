@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
@@ -16,8 +16,11 @@ class AccreditationType(str, enum.Enum):
 
 class University(Base):
     __tablename__ = 'universities'
+    __table_args__ = (
+        Index('ix_universities_is_active_city_id', 'is_active', 'city_id'),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     code = Column(String(20), unique=True, nullable=False, index=True)
     name = Column(String(200), nullable=False)
     acronym = Column(String(20))
@@ -43,8 +46,11 @@ class University(Base):
 
 class Career(Base):
     __tablename__ = 'careers'
+    __table_args__ = (
+        Index('ix_careers_university_id_is_active', 'university_id', 'is_active'),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     code = Column(String(20), unique=True, nullable=False)
     name = Column(String(200), nullable=False)
     description = Column(Text)
@@ -1,12 +1,20 @@
 # app/models/user.py
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Date, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Date, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Solo filas eliminadas: lo que recorre el job de purga
+        Index(
+            "ix_users_deleted_at", "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     full_name = Column(String, nullable=True)
@@ -25,6 +33,11 @@ class User(Base):
     xp_total = Column(Integer, default=0)
     current_level = Column(Integer, default=1)
 
+    # Seguridad (ver app.core.lockout: solo se escribe al bloquear la cuenta)
+    failed_login_attempts = Column(Integer, default=0, nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
     # Auditoría
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
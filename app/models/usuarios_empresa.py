@@ -3,7 +3,7 @@ Company Users Model (B2B)
 Users that manage company accounts with roles and permissions
 Based on diagram: MÓDULO 2 - usuarios_empresa
 """
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -15,13 +15,29 @@ class CompanyUser(Base):
     Can have different roles: owner, admin, editor, viewer
     """
     __tablename__ = "company_users"
+    __table_args__ = (
+        # list_company_users (with or without inactive users)
+        Index("ix_company_users_company_id_is_active", "company_id", "is_active"),
+        # get_users_by_role and admin seat counting: active users only
+        Index(
+            "ix_company_users_active_company_id_role", "company_id", "role",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Invitation sweeper: pending invitations only
+        Index(
+            "ix_company_users_pending_invitation_expires_at", "invitation_expires_at",
+            postgresql_where=text("invitation_token IS NOT NULL"),
+            sqlite_where=text("invitation_token IS NOT NULL"),
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("empresas.id"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, ForeignKey("empresas.id"), nullable=False)
     
     # Basic Info
     email = Column(String(255), unique=True, nullable=False, index=True)
-    password_hash = Column(String(255), nullable=False)
+    password_hash = Column(String(255), comment="NULL until the invitation is accepted")
     full_name = Column(String(200), nullable=False)
     position = Column(String(100), comment="Recruiter, Content Manager, HR Director")
     phone = Column(String(20))
@@ -30,7 +46,7 @@ class CompanyUser(Base):
     avatar_url = Column(String(500))
     
     # Roles
-    role = Column(String(50), nullable=False, default='viewer', index=True,
+    role = Column(String(50), nullable=False, default='viewer',
                  comment="owner, admin, editor, viewer")
     
     # Granular Permissions
@@ -54,7 +70,8 @@ class CompanyUser(Base):
     
     # Invitation
     invited_by_user_id = Column(Integer, ForeignKey("company_users.id"), nullable=True)
-    invitation_token = Column(String(100), unique=True, index=True)
+    invitation_token = Column(String(100), unique=True, index=True, comment="SHA-256 of the token sent")
+    invitation_expires_at = Column(DateTime(timezone=True))
     invitation_accepted_at = Column(DateTime(timezone=True))
     
     # Status
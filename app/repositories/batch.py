@@ -0,0 +1,38 @@
+"""
+Batch lookups by primary key
+"""
+from typing import List, Sequence, Type, TypeVar
+
+from sqlalchemy.orm import Session
+
+ModelT = TypeVar("ModelT")
+
+
+def get_many_by_ids(
+    db: Session,
+    model: Type[ModelT],
+    ids: Sequence[int],
+    options: Sequence = (),
+    criteria: Sequence = (),
+) -> List[ModelT]:
+    """
+    Obtener varias filas por id con un único SELECT ... WHERE id IN (...)
+
+    Args:
+        db: Sesión de SQLAlchemy
+        model: Modelo con columna `id`
+        ids: Ids solicitados
+        options: Opciones de carga (selectinload, noload, ...) para la consulta
+        criteria: Condiciones WHERE adicionales (p.ej. excluir filas eliminadas)
+
+    Returns:
+        Filas en el mismo orden que `ids` (sin duplicados; los ids
+        inexistentes se omiten)
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if not unique_ids:
+        return []
+
+    rows = db.query(model).options(*options).filter(model.id.in_(unique_ids), *criteria).all()
+    by_id = {row.id: row for row in rows}
+    return [by_id[i] for i in unique_ids if i in by_id]
@@ -0,0 +1,98 @@
+"""
+Unicidad atómica apoyada en los índices únicos de la base de datos
+
+En lugar de SELECT + INSERT (una ida extra y una carrera entre requests
+concurrentes), se inserta directamente y la violación del índice único se
+traduce al mismo error 400 de siempre.
+"""
+import re
+from typing import Dict, List
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+
+# SQLite: "UNIQUE constraint failed: users.email"
+_SQLITE_UNIQUE = re.compile(r"UNIQUE constraint failed: ([\w.]+(?:, [\w.]+)*)")
+# PostgreSQL: "DETAIL:  Key (email)=(a@b.c) already exists."
+_PG_KEY = re.compile(r"Key \(([^)]+)\)=")
+
+
+def _constraint_columns() -> Dict[str, List[str]]:
+    """Nombre de índice/constraint único -> columnas, desde los modelos"""
+    names: Dict[str, List[str]] = {}
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            if index.unique:
+                names[index.name] = [c.name for c in index.columns]
+        for constraint in table.constraints:
+            if constraint.name:
+                names[constraint.name] = [c.name for c in constraint.columns]
+    return names
+
+
+def violated_columns(exc: IntegrityError) -> List[str]:
+    """
+    Columnas del índice único que violó un INSERT/UPDATE
+
+    Args:
+        exc: IntegrityError lanzado por el flush/commit
+
+    Returns:
+        Nombres de columna (lista vacía si no es una violación de unicidad
+        reconocible, p.ej. una foreign key)
+    """
+    diag = getattr(exc.orig, "diag", None)
+    constraint_name = getattr(diag, "constraint_name", None)
+    if constraint_name:
+        columns = _constraint_columns().get(constraint_name)
+        if columns:
+            return columns
+
+    message = str(exc.orig)
+    match = _SQLITE_UNIQUE.search(message)
+    if match:
+        return [qualified.split(".")[-1] for qualified in match.group(1).split(", ")]
+    match = _PG_KEY.search(message)
+    if match:
+        return [column.strip() for column in match.group(1).split(",")]
+    return []
+
+
+def raise_unique_violation(db: Session, exc: IntegrityError, messages: Dict[str, str]) -> None:
+    """
+    Rollback y traducir una violación de unicidad a HTTP 400
+
+    Args:
+        db: Sesión donde falló el INSERT/UPDATE
+        exc: IntegrityError capturado
+        messages: Columna única -> mensaje de error (p.ej. {"email": "Email ya registrado"})
+
+    Raises:
+        HTTPException 400 con el mensaje de la columna violada; cualquier
+        otro IntegrityError se propaga tal cual (después del rollback)
+    """
+    db.rollback()
+    for column in violated_columns(exc):
+        if column in messages:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=messages[column]
+            ) from None
+    raise exc
+
+
+def commit_unique(db: Session, messages: Dict[str, str]) -> None:
+    """
+    Hacer commit traduciendo violaciones de unicidad a HTTP 400
+
+    Args:
+        db: Sesión con los objetos nuevos/modificados pendientes
+        messages: Columna única -> mensaje de error
+    """
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        raise_unique_violation(db, exc, messages)
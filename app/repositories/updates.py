@@ -0,0 +1,122 @@
+"""
+Actualizaciones parciales en una sola ida a la base de datos
+"""
+from typing import Any, Collection, Dict, Optional, Sequence, Type, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.repositories.unique import raise_unique_violation
+from app.services import outbox
+
+ModelT = TypeVar("ModelT")
+
+
+def commit_keeping_state(db: Session) -> None:
+    """
+    Commit sin expirar los objetos de la sesión
+
+    Las filas devueltas por RETURNING ya están al día; expirarlas haría que
+    la serialización de la respuesta vuelva a leerlas con otro SELECT.
+    """
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
+def version_column(model):
+    """Columna version_id_col del modelo (None si no tiene concurrencia optimista)"""
+    return inspect(model).version_id_col
+
+
+def update_returning(
+    db: Session,
+    model: Type[ModelT],
+    criteria: Sequence,
+    values: Dict[str, Any],
+    not_found_detail: str,
+    unique_messages: Optional[Dict[str, str]] = None,
+    commit: bool = True,
+    event: str = outbox.UPDATED,
+    expected_versions: Optional[Collection[int]] = None,
+) -> ModelT:
+    """
+    UPDATE ... WHERE <criteria> RETURNING * con los campos enviados
+
+    Pensado para `schema.model_dump(exclude_unset=True)`: reemplaza el
+    SELECT + setattr + COMMIT + refresh por un único UPDATE. Los `onupdate`
+    de las columnas (updated_at, actualizado_en) se aplican igual.
+
+    En modelos con `version_id_col` el UPDATE suma 1 a la versión (el ORM
+    solo lo hace en el flush) y, con `expected_versions` (If-Match), exige
+    en el WHERE que la fila siga en una de esas versiones: sin locks, el
+    que llega segundo recibe 409.
+
+    Args:
+        db: Sesión de SQLAlchemy
+        model: Modelo a actualizar
+        criteria: Condiciones WHERE (p.ej. [Simulation.id == id])
+        values: Columnas a modificar; si está vacío solo se lee la fila
+        not_found_detail: Mensaje del 404 cuando ninguna fila coincide
+        unique_messages: Columna única -> mensaje 400 (ver repositories.unique)
+        commit: Hacer commit (sin expirar la fila devuelta)
+        event: Acción del evento de outbox (el UPDATE no pasa por el flush)
+        expected_versions: Versiones aceptadas (None: sin chequeo)
+
+    Returns:
+        La fila actualizada como instancia del modelo
+
+    Raises:
+        HTTPException 404 si ninguna fila coincide, 409 si la fila existe pero
+        cambió de versión, 400 si viola un índice único
+    """
+    version = version_column(model)
+    statement_criteria = list(criteria)
+    statement_values = dict(values)
+    if version is not None:
+        if expected_versions is not None:
+            statement_criteria.append(version.in_(list(expected_versions)))
+        if values:
+            statement_values[version.key] = version + 1
+
+    if values:
+        statement = (
+            update(model)
+            .where(*statement_criteria)
+            .values(**statement_values)
+            .returning(model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+    else:
+        statement = select(model).where(*statement_criteria)
+
+    try:
+        row = db.execute(statement).scalars().first()
+    except IntegrityError as exc:
+        raise_unique_violation(db, exc, unique_messages or {})
+
+    if row is None:
+        # Solo en el camino de error: ¿no existe o la ganó otro request?
+        conflict = (
+            version is not None and expected_versions is not None
+            and db.scalar(select(version).where(*criteria)) is not None
+        )
+        db.rollback()
+        if conflict:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Resource was modified by another request; reload it and retry",
+            )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+
+    if values:
+        outbox.record(db, model, row.id, event, {key: getattr(row, key) for key in values})
+
+    if commit:
+        commit_keeping_state(db)
+    return row
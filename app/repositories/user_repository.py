@@ -53,7 +53,7 @@ class UserRepository:
         Returns:
             Usuario encontrado o None
         """
-        return self.db.query(User).filter(User.id == user_id).first()
+        return self.db.query(User).filter(User.id == user_id, User.deleted_at.is_(None)).first()
     
     def get_all_users(self, skip: int = 0, limit: int = 10) -> list[User]:
         """
@@ -66,7 +66,7 @@ class UserRepository:
         Returns:
             Lista de usuarios
         """
-        return self.db.query(User).offset(skip).limit(limit).all()
+        return self.db.query(User).filter(User.deleted_at.is_(None)).offset(skip).limit(limit).all()
     
     def create_user(self, user_create: UserCreate) -> User:
         """
@@ -0,0 +1,14 @@
+"""
+Common Schemas
+Shared request bodies used across routers
+"""
+from pydantic import BaseModel, Field
+from typing import List
+
+# Upper bound for id-list lookups (query string and POST body)
+MAX_BATCH_IDS = 500
+
+
+class IdBatch(BaseModel):
+    """Body for batch lookups: POST /<entity>/batch"""
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
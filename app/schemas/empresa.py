@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, field_validator
 from typing import Optional
 from datetime import datetime
 from decimal import Decimal
@@ -20,6 +20,18 @@ class EmpresaUpdate(BaseModel):
     pais: Optional[str] = None
     ciudad: Optional[str] = None
 
+class EmpresaPlanUpdate(BaseModel):
+    """Límites del plan (PUT /empresas/{id}/plan, solo PLAN_ADMINS); null no se acepta: no hay "sin límite" por API"""
+    max_simulaciones_activas: Optional[int] = Field(None, ge=0)
+    max_usuarios_admin: Optional[int] = Field(None, ge=0)
+
+    @field_validator("max_simulaciones_activas", "max_usuarios_admin", mode="before")
+    @classmethod
+    def no_null(cls, value):
+        if value is None:
+            raise ValueError("El límite no puede ser null")
+        return value
+
 class EmpresaOut(EmpresaBase):
     id: int
     industria_secundaria: Optional[str] = None
@@ -30,9 +42,21 @@ class EmpresaOut(EmpresaBase):
     verificado: bool = False
     total_simulaciones: int = 0
     total_usuarios_inscritos: int = 0
+    max_simulaciones_activas: Optional[int] = None
+    max_usuarios_admin: Optional[int] = None
     calificacion_promedio: Decimal = Decimal("0.0")
     esta_activo: bool = True
     creado_en: datetime
     actualizado_en: Optional[datetime] = None
     
     model_config = ConfigDict(from_attributes=True)
+
+class EmpresaResumen(BaseModel):
+    """Datos mínimos de la empresa para respuestas anidadas (?include=company)"""
+    id: int
+    nombre_empresa: str
+    slug: str
+    url_logo: Optional[str] = None
+    verificado: Optional[bool] = False
+    
+    model_config = ConfigDict(from_attributes=True)
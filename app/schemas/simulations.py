@@ -6,6 +6,10 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List, Any
 from datetime import datetime
 
+from app.schemas.catalog import ContentCategoryOut
+from app.schemas.common import MAX_BATCH_IDS
+from app.schemas.empresa import EmpresaResumen
+
 # ===========================
 # RESOURCE SCHEMAS
 # ===========================
@@ -81,6 +85,70 @@ class SimulationModuleOut(SimulationModuleBase):
     tasks: List[ModuleTaskOut] = []
     model_config = ConfigDict(from_attributes=True)
 
+# ===========================
+# STRUCTURE EDIT SCHEMAS
+# ===========================
+# Order keys are assigned by the server (sparse, see services.simulation_structure);
+# clients say where a node goes with `position` or by its place in a list.
+
+class ModuleTaskAdd(BaseModel):
+    title: str
+    description: Optional[str] = None
+    task_type: str = "submission"
+    instructor_name: Optional[str] = None
+    instructor_role: Optional[str] = None
+    instructor_video_url: Optional[str] = None
+    estimated_minutes: Optional[int] = 30
+    xp_reward: int = 50
+    resources: Optional[List[TaskResourceCreate]] = []
+    model_answer: Optional[ModelAnswerCreate] = None
+    # 0-based place among the module's tasks (default: last)
+    position: Optional[int] = Field(None, ge=0)
+
+class ModuleTaskEdit(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    task_type: Optional[str] = None
+    instructor_name: Optional[str] = None
+    instructor_role: Optional[str] = None
+    instructor_video_url: Optional[str] = None
+    estimated_minutes: Optional[int] = None
+    xp_reward: Optional[int] = None
+
+class SimulationModuleAdd(BaseModel):
+    title: str
+    description: Optional[str] = None
+    intro_video_url: Optional[str] = None
+    estimated_hours: Optional[float] = 1.0
+    tasks: Optional[List[ModuleTaskAdd]] = []
+    # 0-based place among the simulation's modules (default: last)
+    position: Optional[int] = Field(None, ge=0)
+
+class SimulationModuleEdit(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    intro_video_url: Optional[str] = None
+    estimated_hours: Optional[float] = None
+
+class NodeOrder(BaseModel):
+    """Body for bulk reorder: every sibling id, in the new order"""
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+
+class ModuleTaskNode(ModuleTaskEdit):
+    """Task in a structure PATCH: with `id` it is kept (and moved/edited), without it is created"""
+    id: Optional[int] = None
+    resources: Optional[List[TaskResourceCreate]] = None
+    model_answer: Optional[ModelAnswerCreate] = None
+
+class SimulationModuleNode(SimulationModuleEdit):
+    """Module in a structure PATCH; `tasks` omitted leaves its tasks untouched"""
+    id: Optional[int] = None
+    tasks: Optional[List[ModuleTaskNode]] = None
+
+class SimulationStructurePatch(BaseModel):
+    """Desired module/task tree: modules and tasks left out are deleted"""
+    modules: List[SimulationModuleNode]
+
 # ===========================
 # SIMULATION SCHEMAS
 # ===========================
@@ -102,6 +170,15 @@ class SimulationCreate(SimulationBase):
     # Allow creating full structure at once
     modules: Optional[List[SimulationModuleCreate]] = []
 
+class SimulationClone(BaseModel):
+    """Body for POST /simulations/{id}/clone"""
+    slug: str
+    title: Optional[str] = None
+    # Target company (default: the source's)
+    company_id: Optional[int] = None
+    # Language of the copy, e.g. "en" for a translation template (default: the source's languages)
+    language: Optional[str] = None
+
 class SimulationUpdate(BaseModel):
     title: Optional[str] = None
     state: Optional[str] = None
@@ -112,6 +189,8 @@ class SimulationOut(SimulationBase):
     company_id: int
     category_id: int
     created_at: datetime
+    languages: Optional[List[str]] = None
+    cloned_from_id: Optional[int] = None
     modules: List[SimulationModuleOut] = []
     
     model_config = ConfigDict(from_attributes=True)
@@ -125,5 +204,8 @@ class SimulationList(BaseModel):
     company_id: int
     category_id: int
     state: str
+    # Only present when requested with ?include=company,category
+    company: Optional[EmpresaResumen] = None
+    category: Optional[ContentCategoryOut] = None
     
     model_config = ConfigDict(from_attributes=True)
@@ -42,3 +42,8 @@ class CareerOut(CareerBase):
 
 class UniversityWithCareers(UniversityOut):
     careers: List[CareerOut] = []
+
+
+class UniversityListOut(UniversityOut):
+    # Only present when requested with ?include=careers
+    careers: Optional[List[CareerOut]] = None
@@ -3,7 +3,7 @@ Company Users Schemas
 Pydantic models for company user validation
 """
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -62,6 +62,17 @@ class CompanyUserInvite(BaseModel):
     position: Optional[str] = Field(None, max_length=100)
 
 
+class CompanyUserBulkInvite(BaseModel):
+    """Schema for inviting several users in one transaction"""
+    invitations: List[CompanyUserInvite] = Field(..., min_length=1)
+
+
+class CompanyUserInvitationAccept(BaseModel):
+    """Schema for accepting an invitation"""
+    token: str = Field(..., min_length=1, max_length=200)
+    password: str = Field(..., min_length=8, max_length=100)
+
+
 # ============================================
 # UPDATE SCHEMAS
 # ============================================
@@ -117,6 +128,10 @@ class CompanyUserOut(CompanyUserBase):
     last_access: Optional[datetime] = None
     total_accesses: int
     
+    # Invitation
+    invitation_expires_at: Optional[datetime] = None
+    invitation_accepted_at: Optional[datetime] = None
+    
     # Status
     is_active: bool
     
@@ -133,6 +148,12 @@ class CompanyUserWithCompany(CompanyUserOut):
     company_slug: str = Field(..., description="Company slug")
 
 
+class CompanyUserInvitationOut(BaseModel):
+    """Invited user with the invitation token (returned only once)"""
+    user: CompanyUserOut
+    invitation_token: str
+
+
 class CompanyUserList(BaseModel):
     """List of company users"""
     total: int
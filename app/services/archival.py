@@ -0,0 +1,192 @@
+"""
+Archival Service
+Soft delete de simulaciones, empresas y usuarios, y purga por lotes
+
+Los DELETE de la API solo marcan la fila (deleted_at / eliminado_en) con un
+UPDATE y responden enseguida; las lecturas ignoran las filas marcadas. Este
+job borra definitivamente lo eliminado hace más de PURGE_RETENTION_DAYS, de
+hojas a raíz (model_answers/task_resources -> module_tasks ->
+simulation_modules -> simulations), un lote pequeño por transacción para no
+mantener locks largos sobre tablas calientes. El worker de jobs lo encola
+cada PURGE_EVERY_SECONDS (job archival.purge).
+
+Los valores únicos (slug, email, username) siguen reservados hasta la purga.
+
+Usage: python -m app.services.archival [--dry-run] [--retention-days N] [--batch-size N]
+"""
+import argparse
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.empresa import Empresa
+from app.models.simulations import ModelAnswer, ModuleTask, Simulation, SimulationModule, TaskResource
+from app.models.user import User
+from app.models.usuarios_empresa import CompanyUser
+from app.services import outbox, plan_limits
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PurgeResult:
+    """Filas raíz purgadas (o purgables, en dry-run) por tabla"""
+    simulations: int = 0
+    empresas: int = 0
+    users: int = 0
+
+
+# ============================================
+# SOFT DELETE
+# ============================================
+
+def archive_company_content(db: Session, company_id: int) -> None:
+    """
+    Marca como eliminadas las simulaciones de la empresa y desactiva sus usuarios
+
+    No hace commit: viaja en la transacción que elimina la empresa. Son dos
+    UPDATE (más los eventos de outbox) sin importar cuántos módulos/tareas
+    cuelguen de las simulaciones.
+    """
+    simulation_ids = db.scalars(
+        update(Simulation)
+        .where(Simulation.company_id == company_id, Simulation.deleted_at.is_(None))
+        .values(deleted_at=func.now())
+        .returning(Simulation.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    user_ids = db.scalars(
+        update(CompanyUser)
+        .where(CompanyUser.company_id == company_id, CompanyUser.is_active.is_(True))
+        .values(is_active=False)
+        .returning(CompanyUser.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    outbox.record_many(db, Simulation, simulation_ids, outbox.DELETED)
+    outbox.record_many(db, CompanyUser, user_ids, outbox.UPDATED, {"is_active": False})
+    plan_limits.usage_cache.invalidate(company_id)
+
+
+# ============================================
+# PURGE
+# ============================================
+
+def _expired_ids(db: Session, column, cutoff: datetime, batch_size: int, *criteria) -> List[int]:
+    model = column.class_
+    return db.scalars(
+        select(model.id)
+        .where(column < cutoff, *criteria)
+        .order_by(model.id)
+        .limit(batch_size)
+    ).all()
+
+
+def _delete_where(db: Session, model, *criteria) -> None:
+    db.execute(delete(model).where(*criteria).execution_options(synchronize_session=False))
+
+
+def purge_simulations(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Borra las simulaciones eliminadas antes de `cutoff` con todo su contenido"""
+    purged = 0
+    while True:
+        ids = _expired_ids(db, Simulation.deleted_at, cutoff, batch_size)
+        if not ids:
+            return purged
+
+        module_ids = select(SimulationModule.id).where(SimulationModule.simulation_id.in_(ids))
+        task_ids = select(ModuleTask.id).where(ModuleTask.module_id.in_(module_ids))
+        _delete_where(db, ModelAnswer, ModelAnswer.task_id.in_(task_ids))
+        _delete_where(db, TaskResource, TaskResource.task_id.in_(task_ids))
+        _delete_where(db, ModuleTask, ModuleTask.module_id.in_(module_ids))
+        _delete_where(db, SimulationModule, SimulationModule.simulation_id.in_(ids))
+        _delete_where(db, Simulation, Simulation.id.in_(ids))
+        db.commit()
+        purged += len(ids)
+
+
+def purge_empresas(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Borra empresas eliminadas antes de `cutoff` que ya no tienen simulaciones"""
+    no_simulations = ~exists().where(Simulation.company_id == Empresa.id)
+    purged = 0
+    while True:
+        ids = _expired_ids(db, Empresa.eliminado_en, cutoff, batch_size, no_simulations)
+        if not ids:
+            return purged
+
+        _delete_where(db, CompanyUser, CompanyUser.company_id.in_(ids))
+        _delete_where(db, Empresa, Empresa.id.in_(ids))
+        db.commit()
+        purged += len(ids)
+
+
+def purge_users(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Borra usuarios eliminados antes de `cutoff`"""
+    purged = 0
+    while True:
+        ids = _expired_ids(db, User.deleted_at, cutoff, batch_size)
+        if not ids:
+            return purged
+
+        _delete_where(db, User, User.id.in_(ids))
+        db.commit()
+        purged += len(ids)
+
+
+def purge_deleted(
+    db: Session,
+    retention_days: int = settings.PURGE_RETENTION_DAYS,
+    batch_size: int = settings.PURGE_BATCH_SIZE,
+    apply: bool = True,
+) -> PurgeResult:
+    """
+    Purga todo lo eliminado hace más de `retention_days`
+
+    Las simulaciones van primero para que las empresas eliminadas queden sin
+    simulaciones y se puedan purgar en la misma pasada. Con apply=False solo
+    cuenta.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+    if not apply:
+        def count(column):
+            return db.scalar(select(func.count()).where(column < cutoff))
+        return PurgeResult(
+            simulations=count(Simulation.deleted_at),
+            empresas=count(Empresa.eliminado_en),
+            users=count(User.deleted_at),
+        )
+
+    return PurgeResult(
+        simulations=purge_simulations(db, cutoff, batch_size),
+        empresas=purge_empresas(db, cutoff, batch_size),
+        users=purge_users(db, cutoff, batch_size),
+    )
+
+
+def main():
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Purga filas eliminadas (soft delete) por lotes")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar, no borrar")
+    parser.add_argument("--retention-days", type=int, default=settings.PURGE_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.PURGE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        result = purge_deleted(db, args.retention_days, args.batch_size, apply=not args.dry_run)
+        for table, count in asdict(result).items():
+            logger.info(f"{table}: {count}")
+        logger.info("✅ Purga completada" if not args.dry_run else "✅ Dry-run completado")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Company Metrics Service
+Mantiene las métricas agregadas de Empresa de forma incremental y
+ofrece un job de reconciliación que las recalcula por lotes.
+
+- total_simulaciones: simulaciones en estado 'published' (no eliminadas) de la empresa
+- total_usuarios_inscritos: inscripciones en simulaciones de la empresa
+
+Usage: python -m app.services.company_metrics [--dry-run] [--batch-size N]
+"""
+import argparse
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.empresa import Empresa
+from app.models.simulations import Simulation
+from app.services import plan_limits
+
+logger = logging.getLogger(__name__)
+
+PUBLISHED_STATE = "published"
+
+
+@dataclass
+class MetricsDrift:
+    """Diferencia detectada entre el contador guardado y el recalculado"""
+    company_id: int
+    field: str
+    stored: int
+    actual: int
+
+
+# ============================================
+# INCREMENTAL UPDATES
+# ============================================
+
+def adjust_company_counters(
+    db: Session,
+    company_id: int,
+    simulaciones: int = 0,
+    inscritos: int = 0,
+) -> None:
+    """
+    Aplica deltas atómicos (UPDATE ... SET col = col + delta) sobre la empresa.
+
+    No hace commit: el cambio viaja en la misma transacción que la escritura
+    que lo originó, así que un rollback deshace también el contador.
+    """
+    values = {}
+    if simulaciones:
+        values["total_simulaciones"] = func.coalesce(Empresa.total_simulaciones, 0) + simulaciones
+    if inscritos:
+        values["total_usuarios_inscritos"] = func.coalesce(Empresa.total_usuarios_inscritos, 0) + inscritos
+    if not values:
+        return
+
+    db.execute(
+        update(Empresa)
+        .where(Empresa.id == company_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def on_simulation_created(db: Session, simulation: Simulation) -> None:
+    """Hook para una simulación nueva (solo cuenta si nace publicada; 404 si la empresa está archivada)"""
+    if simulation.state == PUBLISHED_STATE:
+        plan_limits.reserve_simulation_slot(db, simulation.company_id)
+    else:
+        plan_limits.ensure_company_active(db, simulation.company_id)
+
+
+def on_simulation_deleted(db: Session, simulation: Simulation) -> None:
+    """Hook para una simulación eliminada"""
+    if simulation.state == PUBLISHED_STATE:
+        adjust_company_counters(db, simulation.company_id, simulaciones=-1)
+        plan_limits.usage_cache.invalidate(simulation.company_id)
+
+
+def on_simulation_state_changed(
+    db: Session,
+    company_id: int,
+    old_state: Optional[str],
+    new_state: Optional[str],
+) -> None:
+    """
+    Hook para transiciones de estado (draft -> published, published -> archived, ...)
+
+    Publicar reserva un cupo del plan (409 si no hay cupo).
+    """
+    if old_state == new_state:
+        return
+    if new_state == PUBLISHED_STATE:
+        plan_limits.reserve_simulation_slot(db, company_id)
+    elif old_state == PUBLISHED_STATE:
+        adjust_company_counters(db, company_id, simulaciones=-1)
+        plan_limits.usage_cache.invalidate(company_id)
+
+
+def on_enrollment(db: Session, company_id: int, delta: int = 1) -> None:
+    """Hook para inscripciones (delta=-1 al cancelar una inscripción)"""
+    adjust_company_counters(db, company_id, inscritos=delta)
+
+
+# ============================================
+# RECONCILIATION
+# ============================================
+
+def reconcile_company_metrics(
+    db: Session,
+    batch_size: int = 500,
+    apply: bool = True,
+) -> List[MetricsDrift]:
+    """
+    Recalcula total_simulaciones para todas las empresas por lotes.
+
+    Cada lote hace un SELECT de empresas (keyset sobre id), un único
+    COUNT ... GROUP BY sobre simulations y, si hay drift, un UPDATE por
+    lote (executemany). Con apply=False solo reporta.
+
+    Returns:
+        Lista de diferencias encontradas
+    """
+    drifts: List[MetricsDrift] = []
+    last_id = 0
+
+    while True:
+        rows = db.execute(
+            select(Empresa.id, Empresa.total_simulaciones)
+            .where(Empresa.id > last_id)
+            .order_by(Empresa.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        ids = [row.id for row in rows]
+        last_id = ids[-1]
+
+        counts = dict(
+            db.execute(
+                select(Simulation.company_id, func.count(Simulation.id))
+                .where(
+                    Simulation.company_id.in_(ids),
+                    Simulation.state == PUBLISHED_STATE,
+                    Simulation.deleted_at.is_(None),
+                )
+                .group_by(Simulation.company_id)
+            ).all()
+        )
+
+        batch_drifts = []
+        for row in rows:
+            stored = row.total_simulaciones or 0
+            actual = counts.get(row.id, 0)
+            if stored != actual:
+                batch_drifts.append(
+                    MetricsDrift(row.id, "total_simulaciones", stored, actual)
+                )
+
+        if batch_drifts and apply:
+            # UPDATE de tabla (no ORM por PK): los contadores no cambian la
+            # versión de la empresa, así que no chocan con un If-Match
+            empresas = Empresa.__table__
+            db.execute(
+                update(empresas)
+                .where(empresas.c.id == bindparam("empresa_id"))
+                .values(total_simulaciones=bindparam("total")),
+                [{"empresa_id": d.company_id, "total": d.actual} for d in batch_drifts],
+            )
+            db.commit()
+
+        drifts.extend(batch_drifts)
+
+    return drifts
+
+
+def main():
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reconcilia métricas agregadas de empresas")
+    parser.add_argument("--dry-run", action="store_true", help="Solo reportar, no corregir")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        drifts = reconcile_company_metrics(db, batch_size=args.batch_size, apply=not args.dry_run)
+        for d in drifts:
+            logger.info(f"Empresa {d.company_id}: {d.field} {d.stored} -> {d.actual}")
+        logger.info(f"✅ Reconciliación completada: {len(drifts)} diferencias")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Invitations Service
+Company user invitations with hashed, expiring tokens
+
+- The token sent to the invitee is 32 random bytes (urlsafe); only its
+  SHA-256 is stored in CompanyUser.invitation_token, so lookups are a plain
+  unique-index probe and a leaked table gives no usable tokens.
+- Invited users have no password until they accept. Accepting sets the
+  password and invitation_accepted_at with one UPDATE ... RETURNING that
+  also checks the token is still pending and not expired.
+- sweep_expired() deletes never-accepted invitations past their expiry in
+  small batches (job "invitations.sweep", enqueued by the worker every
+  INVITATION_SWEEP_EVERY_SECONDS).
+"""
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.models.usuarios_empresa import CompanyUser
+from app.repositories.updates import update_returning
+from app.services import outbox, plan_limits
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BYTES = 32
+INVITATION_NOT_FOUND = "Invitation not found or expired"
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def new_token() -> Tuple[str, str]:
+    """Return (token for the invitee, SHA-256 hex to store)"""
+    token = secrets.token_urlsafe(TOKEN_BYTES)
+    return token, hash_token(token)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def invite_users(
+    db: Session,
+    company_id: int,
+    invites: Sequence,
+    invited_by_user_id: Optional[int] = None,
+) -> List[Tuple[CompanyUser, str]]:
+    """
+    Create pending company users for `invites` (CompanyUserInvite) and flush
+
+    All invitations share the caller's transaction: either every row is
+    created or none. Admin invitations take an admin seat right away.
+
+    Raises:
+        HTTPException 409 (after rollback) if the admins don't fit the plan
+
+    Returns:
+        (user, token) pairs; the token is not stored and cannot be recovered
+    """
+    expires_at = utcnow() + timedelta(hours=settings.INVITATION_EXPIRE_HOURS)
+    invited = []
+    for invite in invites:
+        token, token_hash = new_token()
+        user = CompanyUser(
+            **invite.model_dump(),
+            company_id=company_id,
+            invited_by_user_id=invited_by_user_id,
+            invitation_token=token_hash,
+            invitation_expires_at=expires_at,
+        )
+        db.add(user)
+        if user.role in plan_limits.ADMIN_ROLES:
+            # The seat count must see the admins invited earlier in this batch
+            try:
+                plan_limits.ensure_admin_seat(db, company_id)
+            except HTTPException:
+                db.rollback()
+                raise
+            db.flush()
+        invited.append((user, token))
+    db.flush()
+    return invited
+
+
+def accept_invitation(db: Session, token: str, password: str) -> CompanyUser:
+    """
+    Set the password of a pending invitation and clear its token (commits)
+
+    The token is looked up first (one unique-index probe): unknown tokens
+    get their 404 without paying for a bcrypt hash.
+
+    Raises:
+        HTTPException 404 if the token is unknown, already used or expired
+    """
+    now = utcnow()
+    pending = [
+        CompanyUser.invitation_token == hash_token(token),
+        CompanyUser.invitation_expires_at > now,
+        CompanyUser.invitation_accepted_at.is_(None),
+        CompanyUser.is_active.is_(True),
+    ]
+    user_id = db.scalar(select(CompanyUser.id).where(*pending))
+    if user_id is None:
+        raise HTTPException(status_code=404, detail=INVITATION_NOT_FOUND)
+    # The UPDATE checks again: a concurrent accept of the same token gets the 404
+    return update_returning(
+        db, CompanyUser,
+        [CompanyUser.id == user_id, *pending],
+        {
+            "password_hash": security.hash_password(password),
+            "invitation_token": None,
+            "invitation_expires_at": None,
+            "invitation_accepted_at": now,
+            "email_verified": True,
+            "email_verified_at": now,
+        },
+        not_found_detail=INVITATION_NOT_FOUND,
+    )
+
+
+def sweep_expired(db: Session, batch_size: int = settings.INVITATION_SWEEP_BATCH_SIZE) -> int:
+    """
+    Delete invitations that expired without being accepted, one batch per commit
+
+    Frees their emails and admin seats.
+
+    Returns:
+        Number of invitations deleted
+    """
+    now = utcnow()
+    swept = 0
+    while True:
+        rows = db.execute(
+            select(CompanyUser.id, CompanyUser.company_id)
+            .where(
+                CompanyUser.invitation_token.is_not(None),
+                CompanyUser.invitation_expires_at < now,
+            )
+            .order_by(CompanyUser.invitation_expires_at)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return swept
+
+        ids = [row.id for row in rows]
+        db.execute(
+            delete(CompanyUser)
+            .where(CompanyUser.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        outbox.record_many(db, CompanyUser, ids, outbox.DELETED)
+        db.commit()
+        for company_id in {row.company_id for row in rows}:
+            plan_limits.usage_cache.invalidate(company_id)
+        swept += len(ids)
+        logger.info(f"Swept {len(ids)} expired invitations")
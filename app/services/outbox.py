@@ -0,0 +1,272 @@
+"""
+Outbox Service
+Eventos de dominio escritos en la misma transacción que el cambio
+
+- Un listener `after_flush` registra un evento por cada alta, modificación
+  o borrado ORM de los agregados en TRACKED (simulation, empresa,
+  company_user, user) con los campos cambiados como payload.
+- Las escrituras que no pasan por el flush (UPDATE ... RETURNING de
+  repositories.updates, soft deletes masivos) llaman a record() / record_many().
+- dispatch_pending() entrega los eventos pendientes por lotes, en orden de
+  id, a los suscriptores registrados con @subscribe, y los marca como
+  despachados en la misma transacción que los efectos del suscriptor.
+  Un solo dispatcher corre a la vez (advisory lock en PostgreSQL), así el
+  orden por agregado se mantiene aunque haya varios workers.
+
+El worker de jobs (python -m app.jobs.worker) ejecuta el dispatcher.
+
+Por ahora es solo infraestructura: la app no registra suscriptores, los
+eventos se marcan como despachados sin efectos. Cachés, índices de
+búsqueda o integraciones externas se conectan con @subscribe.
+"""
+import enum
+import fnmatch
+import logging
+import threading
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import registry, trace_id_var
+from app.db.locks import try_transaction_lock
+from app.models.empresa import Empresa
+from app.models.outbox import OutboxEvent
+from app.models.simulations import Simulation
+from app.models.user import User
+from app.models.usuarios_empresa import CompanyUser
+
+logger = logging.getLogger(__name__)
+
+# Modelo -> tipo de agregado (prefijo del event_type)
+TRACKED = {
+    Simulation: "simulation",
+    Empresa: "empresa",
+    CompanyUser: "company_user",
+    User: "user",
+}
+
+# Nunca salen de la base de datos en un payload
+EXCLUDED_FIELDS = {"hashed_password", "password_hash", "invitation_token"}
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+Subscriber = Callable[[Session, OutboxEvent], None]
+subscribers: List[Tuple[str, Subscriber]] = []
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _event_row(model, aggregate_id: int, action: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    aggregate = TRACKED[model]
+    return {
+        "aggregate_type": aggregate,
+        "aggregate_id": aggregate_id,
+        "event_type": f"{aggregate}.{action}",
+        "payload": {k: _jsonable(v) for k, v in payload.items() if k not in EXCLUDED_FIELDS},
+        "trace_id": trace_id_var.get(),
+    }
+
+
+# ============================================
+# CAPTURE
+# ============================================
+
+def _loaded_columns(obj) -> Dict[str, Any]:
+    """Columnas ya cargadas (sin disparar SELECT dentro del flush)"""
+    state = inspect(obj)
+    return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
+
+def _changed_columns(obj) -> Dict[str, Any]:
+    state = inspect(obj)
+    changed = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.added:
+            changed[attr.key] = history.added[0]
+    return changed
+
+
+def capture_flush(session: Session, flush_context) -> None:
+    """after_flush: un evento por objeto rastreado insertado/modificado/borrado"""
+    rows = []
+    for obj in session.new:
+        if type(obj) in TRACKED:
+            rows.append(_event_row(type(obj), obj.id, CREATED, _loaded_columns(obj)))
+    for obj in session.dirty:
+        if type(obj) in TRACKED and session.is_modified(obj, include_collections=False):
+            changed = _changed_columns(obj)
+            if changed:
+                rows.append(_event_row(type(obj), obj.id, UPDATED, changed))
+    for obj in session.deleted:
+        if type(obj) in TRACKED:
+            rows.append(_event_row(type(obj), obj.id, DELETED, {}))
+    if rows:
+        session.connection().execute(insert(OutboxEvent), rows)
+
+
+def install() -> None:
+    """Registrar el listener en todas las sesiones (idempotente)"""
+    if not event.contains(Session, "after_flush", capture_flush):
+        event.listen(Session, "after_flush", capture_flush)
+
+
+def is_installed() -> bool:
+    return event.contains(Session, "after_flush", capture_flush)
+
+
+def record(db: Session, model, aggregate_id: int, action: str, payload: Optional[Dict[str, Any]] = None) -> None:
+    """Evento explícito para escrituras fuera del flush (no hace commit)"""
+    record_many(db, model, [aggregate_id], action, payload)
+
+
+def record_many(
+    db: Session,
+    model,
+    aggregate_ids: Iterable[int],
+    action: str,
+    payload: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Mismo evento para varios agregados en un único INSERT (executemany)"""
+    if model not in TRACKED or not is_installed():
+        return
+    rows = [_event_row(model, aggregate_id, action, payload or {}) for aggregate_id in aggregate_ids]
+    if rows:
+        db.execute(insert(OutboxEvent), rows)
+
+
+# ============================================
+# DISPATCH
+# ============================================
+
+def subscribe(pattern: str):
+    """Registrar un suscriptor para event_types que coinciden con `pattern` (p.ej. "simulation.*")"""
+    def decorator(func: Subscriber) -> Subscriber:
+        subscribers.append((pattern, func))
+        return func
+    return decorator
+
+
+def subscribers_for(event_type: str) -> List[Subscriber]:
+    return [func for pattern, func in subscribers if fnmatch.fnmatchcase(event_type, pattern)]
+
+
+class OutboxMetrics:
+    """Eventos despachados y atraso del outbox, exportados en /metrics"""
+
+    def __init__(self):
+        self.dispatched = 0
+        self.dropped = 0
+        self.pending = 0
+        self.oldest_pending_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [
+                "# HELP outbox_events_dispatched_total Outbox events delivered to subscribers",
+                "# TYPE outbox_events_dispatched_total counter",
+                f"outbox_events_dispatched_total {self.dispatched}",
+                "# HELP outbox_events_dropped_total Outbox events given up after OUTBOX_MAX_ATTEMPTS",
+                "# TYPE outbox_events_dropped_total counter",
+                f"outbox_events_dropped_total {self.dropped}",
+                "# HELP outbox_events_pending Outbox events not yet dispatched",
+                "# TYPE outbox_events_pending gauge",
+                f"outbox_events_pending {self.pending}",
+                "# HELP outbox_oldest_pending_seconds Age of the oldest pending outbox event",
+                "# TYPE outbox_oldest_pending_seconds gauge",
+                f"outbox_oldest_pending_seconds {self.oldest_pending_seconds:.3f}",
+            ]
+
+
+outbox_metrics = OutboxMetrics()
+registry.register_collector(outbox_metrics.render)
+
+
+def dispatch_pending(db: Session, batch_size: int = settings.OUTBOX_BATCH_SIZE) -> int:
+    """
+    Entregar un lote de eventos pendientes y hacer commit
+
+    Toma el lock "outbox.dispatch" hasta el commit; si otro dispatcher lo
+    tiene, no entrega nada. Cada evento corre en un savepoint: si un
+    suscriptor falla se deshacen solo sus efectos, se suma un intento y el
+    lote se corta ahí para no adelantar eventos posteriores (del mismo
+    agregado o no). Tras OUTBOX_MAX_ATTEMPTS el evento se marca como
+    despachado con last_error.
+
+    Con SQLite (sin advisory locks) se asume un único worker.
+
+    Returns:
+        Eventos despachados (o descartados) en este lote
+    """
+    if not try_transaction_lock(db, "outbox.dispatch"):
+        db.rollback()
+        return 0
+
+    events = db.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.dispatched_at.is_(None))
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+    ).all()
+
+    handled = dropped = 0
+    for outbox_event in events:
+        try:
+            with db.begin_nested():
+                for subscriber in subscribers_for(outbox_event.event_type):
+                    subscriber(db, outbox_event)
+        except Exception as exc:
+            outbox_event.attempts += 1
+            outbox_event.last_error = repr(exc)[:2000]
+            if outbox_event.attempts < settings.OUTBOX_MAX_ATTEMPTS:
+                logger.warning(f"Outbox event {outbox_event.id} ({outbox_event.event_type}) failed: {exc!r}")
+                break
+            logger.error(f"Outbox event {outbox_event.id} dropped after {outbox_event.attempts} attempts")
+            dropped += 1
+        outbox_event.dispatched_at = func.now()
+        handled += 1
+
+    db.commit()
+    with outbox_metrics._lock:
+        outbox_metrics.dispatched += handled - dropped
+        outbox_metrics.dropped += dropped
+    return handled
+
+
+def housekeeping(db: Session) -> None:
+    """Borrar eventos despachados viejos y refrescar los gauges de atraso"""
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=settings.OUTBOX_KEEP_HOURS)
+    db.execute(
+        delete(OutboxEvent)
+        .where(OutboxEvent.dispatched_at.is_not(None), OutboxEvent.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    pending, oldest = db.execute(
+        select(func.count(), func.min(OutboxEvent.created_at)).where(OutboxEvent.dispatched_at.is_(None))
+    ).one()
+    age = 0.0
+    if oldest is not None:
+        # SQLite devuelve datetimes naive (en UTC)
+        oldest = oldest if oldest.tzinfo else oldest.replace(tzinfo=timezone.utc)
+        age = max((now - oldest).total_seconds(), 0.0)
+    with outbox_metrics._lock:
+        outbox_metrics.pending = pending
+        outbox_metrics.oldest_pending_seconds = age
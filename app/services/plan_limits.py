@@ -0,0 +1,193 @@
+"""
+Plan Limits Service
+Enforces Empresa.max_simulaciones_activas and Empresa.max_usuarios_admin
+
+- Active simulations are reserved with a conditional atomic increment of
+  Empresa.total_simulaciones (UPDATE ... WHERE total < max), so concurrent
+  publishes can never overshoot the limit.
+- Admin seats are checked while holding the company row lock.
+- A short-lived in-process cache remembers companies found at their limit,
+  so repeated attempts are rejected without touching the company row.
+- Archived companies (eliminado_en set) take no new content: 404.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.empresa import Empresa
+from app.models.usuarios_empresa import CompanyUser
+
+ADMIN_ROLES = ("owner", "admin")
+
+ACTIVE_COMPANY = Empresa.eliminado_en.is_(None)
+
+SIMULATIONS = "simulations"
+ADMINS = "admins"
+
+
+@dataclass
+class PlanUsage:
+    used: int
+    limit: Optional[int]
+    expires_at: float
+
+    @property
+    def is_full(self) -> bool:
+        return self.limit is not None and self.used >= self.limit
+
+
+class PlanUsageCache:
+    """
+    Per-company usage counters cached in process
+
+    Entries are invalidated on every state change made by this process and
+    expire after a short TTL to bound staleness across workers.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[int, str], PlanUsage] = {}
+        self._lock = threading.Lock()
+
+    def get(self, company_id: int, kind: str) -> Optional[PlanUsage]:
+        entry = self._entries.get((company_id, kind))
+        if entry is None or entry.expires_at < time.monotonic():
+            return None
+        return entry
+
+    def set(self, company_id: int, kind: str, used: int, limit: Optional[int]) -> None:
+        with self._lock:
+            self._entries[(company_id, kind)] = PlanUsage(
+                used=used,
+                limit=limit,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+
+    def invalidate(self, company_id: int) -> None:
+        with self._lock:
+            self._entries.pop((company_id, SIMULATIONS), None)
+            self._entries.pop((company_id, ADMINS), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+usage_cache = PlanUsageCache(ttl_seconds=settings.PLAN_USAGE_CACHE_TTL_SECONDS)
+
+
+def _limit_exceeded(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+def _company_not_found(company_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Company with id {company_id} not found"
+    )
+
+
+def ensure_company_active(db: Session, company_id: int) -> None:
+    """404 unless the company exists and is not archived"""
+    if db.scalar(select(Empresa.id).where(Empresa.id == company_id, ACTIVE_COMPANY)) is None:
+        raise _company_not_found(company_id)
+
+
+# ============================================
+# ACTIVE SIMULATIONS
+# ============================================
+
+def reserve_simulation_slot(db: Session, company_id: int) -> None:
+    """
+    Count one more published simulation for the company, or raise 409
+
+    The increment is part of the caller's transaction; a rollback releases
+    the slot.
+    """
+    cached = usage_cache.get(company_id, SIMULATIONS)
+    if cached and cached.is_full:
+        raise _limit_exceeded(f"Active simulations limit reached ({cached.limit})")
+
+    total = func.coalesce(Empresa.total_simulaciones, 0)
+    row = db.execute(
+        update(Empresa)
+        .where(
+            Empresa.id == company_id,
+            ACTIVE_COMPANY,
+            or_(Empresa.max_simulaciones_activas.is_(None), total < Empresa.max_simulaciones_activas),
+        )
+        .values(total_simulaciones=total + 1)
+        .returning(Empresa.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    if row is not None:
+        return
+
+    current = db.execute(
+        select(Empresa.total_simulaciones, Empresa.max_simulaciones_activas)
+        .where(Empresa.id == company_id, ACTIVE_COMPANY)
+    ).first()
+    if current is None:
+        raise _company_not_found(company_id)
+    usage_cache.set(company_id, SIMULATIONS, current.total_simulaciones or 0, current.max_simulaciones_activas)
+    raise _limit_exceeded(f"Active simulations limit reached ({current.max_simulaciones_activas})")
+
+
+# ============================================
+# ADMIN SEATS
+# ============================================
+
+def lock_company(db: Session, company_id: int) -> Optional[Empresa]:
+    """
+    Take the company row lock for the rest of the transaction
+
+    SELECT ... FOR UPDATE where supported; SQLite ignores FOR UPDATE, so a
+    no-op UPDATE is used there to grab the database write lock instead.
+    Archived companies are not returned.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return db.query(Empresa).filter(Empresa.id == company_id, ACTIVE_COMPANY).with_for_update().first()
+
+    db.execute(
+        update(Empresa)
+        .where(Empresa.id == company_id, ACTIVE_COMPANY)
+        .values(
+            max_usuarios_admin=Empresa.max_usuarios_admin,
+            actualizado_en=Empresa.actualizado_en,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.query(Empresa).filter(Empresa.id == company_id, ACTIVE_COMPANY).first()
+
+
+def ensure_admin_seat(db: Session, company_id: int) -> None:
+    """
+    Check that one more active owner/admin fits in the company plan
+
+    Must run right before the INSERT/UPDATE that adds the admin, in the same
+    transaction; the company row stays locked until commit.
+    """
+    cached = usage_cache.get(company_id, ADMINS)
+    if cached and cached.is_full:
+        raise _limit_exceeded(f"Admin users limit reached ({cached.limit})")
+
+    company = lock_company(db, company_id)
+    if company is None:
+        raise _company_not_found(company_id)
+
+    admins = db.query(func.count(CompanyUser.id)).filter(
+        CompanyUser.company_id == company_id,
+        CompanyUser.role.in_(ADMIN_ROLES),
+        CompanyUser.is_active == True
+    ).scalar()
+
+    if company.max_usuarios_admin is not None and admins >= company.max_usuarios_admin:
+        usage_cache.set(company_id, ADMINS, admins, company.max_usuarios_admin)
+        raise _limit_exceeded(f"Admin users limit reached ({company.max_usuarios_admin})")
@@ -0,0 +1,489 @@
+"""
+Simulation Structure Service
+Ediciones incrementales de módulos y tareas de una simulación
+
+- Claves de orden dispersas (ORDER_STEP entre hermanos): insertar o mover un
+  nodo toma un valor intermedio y no renumera a los demás; solo cuando ya no
+  queda hueco se reparte de nuevo toda la lista.
+- Los cambios de `order` de varias filas van en una sola sentencia
+  (UPDATE ... FROM (VALUES ...) en PostgreSQL, CASE en los demás motores) y
+  solo incluyen las filas cuyo valor cambia.
+- apply_tree() recibe el árbol deseado y escribe solo la diferencia: altas,
+  campos modificados, movimientos y bajas.
+- Toda edición sube primero la versión de la simulación (If-Match contra su
+  ETag, 409 si cambió): invalida los ETag de GET /simulations/{id} y, en
+  PostgreSQL, serializa las ediciones concurrentes de la misma estructura.
+
+Nada hace commit: lo hace el endpoint.
+"""
+from bisect import bisect_left
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Collection, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, case, column, delete, func, select, update, values
+from sqlalchemy.orm import Session
+
+from app.models.simulations import ModelAnswer, ModuleTask, Simulation, SimulationModule, TaskResource
+from app.repositories.updates import update_returning
+
+ORDER_STEP = 1024
+
+MODULE_FIELDS = ("title", "description", "intro_video_url", "estimated_hours")
+TASK_FIELDS = (
+    "title", "description", "task_type", "instructor_name", "instructor_role",
+    "instructor_video_url", "estimated_minutes", "xp_reward",
+)
+
+
+@dataclass
+class TreeDiff:
+    """Filas escritas por apply_tree()"""
+    inserted: int = 0
+    updated: int = 0
+    reordered: int = 0
+    deleted: int = 0
+
+
+# ============================================
+# CLAVES DE ORDEN
+# ============================================
+
+def _longest_increasing(keys: Sequence[Optional[int]]) -> List[int]:
+    """Índices de la subsecuencia estrictamente creciente más larga (ignora None)"""
+    tails: List[int] = []      # menor clave final de cada largo
+    tail_index: List[int] = []
+    previous: Dict[int, Optional[int]] = {}
+    for index, key in enumerate(keys):
+        if key is None:
+            continue
+        pos = bisect_left(tails, key)
+        previous[index] = tail_index[pos - 1] if pos else None
+        if pos == len(tails):
+            tails.append(key)
+            tail_index.append(index)
+        else:
+            tails[pos] = key
+            tail_index[pos] = index
+    result = []
+    index = tail_index[-1] if tail_index else None
+    while index is not None:
+        result.append(index)
+        index = previous[index]
+    return result[::-1]
+
+
+def sparse_orders(keys: Sequence[Optional[int]], step: int = ORDER_STEP) -> List[int]:
+    """
+    Claves para una lista de hermanos en su nuevo orden
+
+    `keys` trae la clave actual de cada nodo (None si es nuevo o viene de
+    otro padre). Se conservan las de la subsecuencia creciente más larga y
+    los demás nodos se reparten en los huecos; si algún hueco no alcanza, se
+    renumera toda la lista (step, 2*step, ...).
+    """
+    anchors = _longest_increasing(keys)
+    result: List[Optional[int]] = [None] * len(keys)
+    for index in anchors:
+        result[index] = keys[index]
+
+    bounds = [-1] + anchors + [len(keys)]
+    for lower_index, upper_index in zip(bounds, bounds[1:]):
+        gap = range(lower_index + 1, upper_index)
+        if not gap:
+            continue
+        lower = keys[lower_index] if lower_index >= 0 else 0
+        upper = keys[upper_index] if upper_index < len(keys) else lower + step * (len(gap) + 1)
+        spacing = (upper - lower) // (len(gap) + 1)
+        if spacing < 1:
+            return [step * (i + 1) for i in range(len(keys))]
+        for offset, index in enumerate(gap, start=1):
+            result[index] = lower + spacing * offset
+    return result
+
+
+def rewrite_orders(db: Session, model, orders: Dict[int, int]) -> None:
+    """Nuevo `order` para varias filas en una sola sentencia (sube su versión)"""
+    if not orders:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        new_orders = values(
+            column("id", Integer), column("order", Integer), name="new_orders"
+        ).data(list(orders.items()))
+        statement = (
+            update(model)
+            .where(model.id == new_orders.c.id)
+            .values(order=new_orders.c.order, version=model.version + 1)
+        )
+    else:
+        statement = (
+            update(model)
+            .where(model.id.in_(list(orders)))
+            .values(order=case(orders, value=model.id), version=model.version + 1)
+        )
+    db.execute(statement.execution_options(synchronize_session=False))
+
+
+def _place(db: Session, model, parent_column, parent_id: int, position: Optional[int]) -> int:
+    """Clave para un nodo nuevo en `position` (reparte los hermanos si no hay hueco)"""
+    siblings = db.execute(
+        select(model.id, model.order).where(parent_column == parent_id).order_by(model.order, model.id)
+    ).all()
+    position = len(siblings) if position is None else min(position, len(siblings))
+    keys = [row.order for row in siblings]
+    keys.insert(position, None)
+    new_keys = sparse_orders(keys)
+    new_key = new_keys.pop(position)
+    rewrite_orders(db, model, {
+        row.id: key for row, key in zip(siblings, new_keys) if key != row.order
+    })
+    return new_key
+
+
+def _reorder(db: Session, model, parent_column, parent_id: int, ids: List[int]) -> int:
+    current = dict(db.execute(select(model.id, model.order).where(parent_column == parent_id)).all())
+    if len(ids) != len(set(ids)) or set(ids) != set(current):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must list every sibling exactly once"
+        )
+    new_keys = sparse_orders([current[i] for i in ids])
+    changed = {i: key for i, key in zip(ids, new_keys) if key != current[i]}
+    rewrite_orders(db, model, changed)
+    return len(changed)
+
+
+# ============================================
+# VERSIÓN DE LA SIMULACIÓN
+# ============================================
+
+def touch_simulation(db: Session, simulation_id: int, expected_versions: Optional[Collection[int]] = None) -> Simulation:
+    """
+    Sube la versión (y updated_at) de la simulación antes de editar su estructura
+
+    Raises:
+        HTTPException 404 si no existe, 409 si no está en `expected_versions`
+    """
+    return update_returning(
+        db, Simulation, [Simulation.id == simulation_id, Simulation.deleted_at.is_(None)],
+        {"updated_at": func.now()},
+        not_found_detail="Simulation not found",
+        commit=False,
+        expected_versions=expected_versions,
+    )
+
+
+def _module_or_404(db: Session, simulation_id: int, module_id: int) -> SimulationModule:
+    module = db.scalar(select(SimulationModule).where(
+        SimulationModule.id == module_id, SimulationModule.simulation_id == simulation_id
+    ))
+    if module is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Module not found")
+    return module
+
+
+def _task_criteria(simulation_id: int, task_id: int) -> list:
+    module_ids = select(SimulationModule.id).where(SimulationModule.simulation_id == simulation_id)
+    return [ModuleTask.id == task_id, ModuleTask.module_id.in_(module_ids)]
+
+
+# ============================================
+# ALTAS
+# ============================================
+
+def _insert_task(db: Session, module_id: int, data: Dict[str, Any], order: int) -> ModuleTask:
+    resources = data.pop("resources", None) or []
+    answer = data.pop("model_answer", None)
+    task = ModuleTask(**data, module_id=module_id, order=order)
+    task.resources = [TaskResource(**resource) for resource in resources]
+    if answer:
+        task.model_answer = ModelAnswer(**answer)
+    db.add(task)
+    return task
+
+
+def add_module(
+    db: Session,
+    simulation_id: int,
+    data: Dict[str, Any],
+    position: Optional[int] = None,
+    expected_versions: Optional[Collection[int]] = None,
+) -> SimulationModule:
+    """Módulo (con sus tareas) en `position`; un INSERT por fila, sin commit intermedio"""
+    touch_simulation(db, simulation_id, expected_versions)
+    tasks = data.pop("tasks", None) or []
+    order = _place(db, SimulationModule, SimulationModule.simulation_id, simulation_id, position)
+    module = SimulationModule(**data, simulation_id=simulation_id, order=order)
+    db.add(module)
+    db.flush()
+    for index, task_data in enumerate(tasks, start=1):
+        task_data.pop("position", None)
+        _insert_task(db, module.id, task_data, ORDER_STEP * index)
+    db.flush()
+    return module
+
+
+def add_task(
+    db: Session,
+    simulation_id: int,
+    module_id: int,
+    data: Dict[str, Any],
+    position: Optional[int] = None,
+    expected_versions: Optional[Collection[int]] = None,
+) -> ModuleTask:
+    touch_simulation(db, simulation_id, expected_versions)
+    _module_or_404(db, simulation_id, module_id)
+    order = _place(db, ModuleTask, ModuleTask.module_id, module_id, position)
+    task = _insert_task(db, module_id, data, order)
+    db.flush()
+    return task
+
+
+# ============================================
+# MODIFICACIONES Y BAJAS
+# ============================================
+
+def update_module(
+    db: Session,
+    simulation_id: int,
+    module_id: int,
+    changes: Dict[str, Any],
+    expected_versions: Optional[Collection[int]] = None,
+) -> SimulationModule:
+    touch_simulation(db, simulation_id, expected_versions)
+    return update_returning(
+        db, SimulationModule,
+        [SimulationModule.id == module_id, SimulationModule.simulation_id == simulation_id],
+        changes, not_found_detail="Module not found", commit=False,
+    )
+
+
+def update_task(
+    db: Session,
+    simulation_id: int,
+    task_id: int,
+    changes: Dict[str, Any],
+    expected_versions: Optional[Collection[int]] = None,
+) -> ModuleTask:
+    touch_simulation(db, simulation_id, expected_versions)
+    return update_returning(
+        db, ModuleTask, _task_criteria(simulation_id, task_id),
+        changes, not_found_detail="Task not found", commit=False,
+    )
+
+
+def _delete_tasks(db: Session, task_ids) -> None:
+    """Tareas con sus recursos y respuesta modelo (`task_ids`: lista o SELECT)"""
+    for model, criterion in (
+        (ModelAnswer, ModelAnswer.task_id.in_(task_ids)),
+        (TaskResource, TaskResource.task_id.in_(task_ids)),
+        (ModuleTask, ModuleTask.id.in_(task_ids)),
+    ):
+        db.execute(delete(model).where(criterion).execution_options(synchronize_session=False))
+
+
+def _delete_modules(db: Session, module_ids: List[int]) -> None:
+    _delete_tasks(db, select(ModuleTask.id).where(ModuleTask.module_id.in_(module_ids)))
+    db.execute(
+        delete(SimulationModule)
+        .where(SimulationModule.id.in_(module_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_module(
+    db: Session,
+    simulation_id: int,
+    module_id: int,
+    expected_versions: Optional[Collection[int]] = None,
+) -> None:
+    """Borra el módulo y su contenido; los hermanos conservan sus claves"""
+    touch_simulation(db, simulation_id, expected_versions)
+    _module_or_404(db, simulation_id, module_id)
+    _delete_modules(db, [module_id])
+
+
+def delete_task(
+    db: Session,
+    simulation_id: int,
+    task_id: int,
+    expected_versions: Optional[Collection[int]] = None,
+) -> None:
+    touch_simulation(db, simulation_id, expected_versions)
+    if db.scalar(select(ModuleTask.id).where(*_task_criteria(simulation_id, task_id))) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    _delete_tasks(db, [task_id])
+
+
+def reorder_modules(
+    db: Session,
+    simulation_id: int,
+    ids: List[int],
+    expected_versions: Optional[Collection[int]] = None,
+) -> int:
+    """Reordena los módulos (un UPDATE); devuelve cuántas filas cambiaron de clave"""
+    touch_simulation(db, simulation_id, expected_versions)
+    return _reorder(db, SimulationModule, SimulationModule.simulation_id, simulation_id, ids)
+
+
+def reorder_tasks(
+    db: Session,
+    simulation_id: int,
+    module_id: int,
+    ids: List[int],
+    expected_versions: Optional[Collection[int]] = None,
+) -> int:
+    touch_simulation(db, simulation_id, expected_versions)
+    _module_or_404(db, simulation_id, module_id)
+    return _reorder(db, ModuleTask, ModuleTask.module_id, module_id, ids)
+
+
+# ============================================
+# PATCH DEL ÁRBOL COMPLETO
+# ============================================
+
+def _differs(current: Any, new: Any) -> bool:
+    if isinstance(current, Decimal) and new is not None:
+        return float(current) != float(new)
+    return current != new
+
+
+def _columns(model, fields: Sequence[str]) -> List[Any]:
+    return [getattr(model, name) for name in fields]
+
+
+def _changes(current, node: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    return {name: node[name] for name in fields if name in node and _differs(getattr(current, name), node[name])}
+
+
+def _update_row(db: Session, model, row_id: int, changes: Dict[str, Any]) -> None:
+    db.execute(
+        update(model)
+        .where(model.id == row_id)
+        .values(**changes, version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def apply_tree(
+    db: Session,
+    simulation_id: int,
+    modules: List[Dict[str, Any]],
+    expected_versions: Optional[Collection[int]] = None,
+) -> TreeDiff:
+    """
+    Lleva la estructura al árbol `modules` escribiendo solo lo que cambia
+
+    `modules` es el dump (exclude_unset) de SimulationStructurePatch.modules:
+    nodos con `id` se conservan (campos enviados y distintos se actualizan,
+    una tarea puede cambiar de módulo), nodos sin `id` se crean, y los que
+    no aparecen se borran. Un módulo sin `tasks` conserva las suyas.
+
+    Raises:
+        HTTPException 400 con ids ajenos o repetidos o nodos nuevos sin título
+    """
+    touch_simulation(db, simulation_id, expected_versions)
+    diff = TreeDiff()
+
+    # Solo las columnas que se comparan (filas, no entidades): los ids borrados
+    # no quedan en el identity map cuando SQLite los reutiliza en las altas
+    current_modules = {
+        module.id: module for module in db.execute(
+            select(SimulationModule.id, SimulationModule.order, *_columns(SimulationModule, MODULE_FIELDS))
+            .where(SimulationModule.simulation_id == simulation_id)
+        )
+    }
+    current_tasks = {
+        task.id: task for task in db.execute(
+            select(ModuleTask.id, ModuleTask.module_id, ModuleTask.order, *_columns(ModuleTask, TASK_FIELDS))
+            .where(ModuleTask.module_id.in_(list(current_modules)))
+        )
+    } if current_modules else {}
+
+    module_ids = [node["id"] for node in modules if node.get("id") is not None]
+    task_nodes = [task for node in modules for task in (node.get("tasks") or [])]
+    task_ids = [task["id"] for task in task_nodes if task.get("id") is not None]
+    if len(module_ids) != len(set(module_ids)) or not set(module_ids) <= current_modules.keys():
+        raise _bad_request("Module ids must be unique and belong to this simulation")
+    if len(task_ids) != len(set(task_ids)) or not set(task_ids) <= current_tasks.keys():
+        raise _bad_request("Task ids must be unique and belong to this simulation")
+    if any(not node.get("title") for node in modules + task_nodes if node.get("id") is None):
+        raise _bad_request("New modules and tasks need a title")
+
+    # Bajas antes de las altas: tareas no listadas de módulos con `tasks` o
+    # borrados. Los módulos se borran al final, cuando ya salieron las tareas
+    # que se mueven a otro módulo
+    kept_modules = set(module_ids)
+    replaced = {node["id"] for node in modules if node.get("id") is not None and node.get("tasks") is not None}
+    dropped_tasks = [
+        task.id for task in current_tasks.values()
+        if task.id not in task_ids and (task.module_id in replaced or task.module_id not in kept_modules)
+    ]
+    dropped_modules = [module_id for module_id in current_modules if module_id not in kept_modules]
+    if dropped_tasks:
+        _delete_tasks(db, dropped_tasks)
+
+    # Módulos: altas, campos, claves de orden
+    module_keys = sparse_orders([current_modules[node["id"]].order if node.get("id") else None for node in modules])
+    order_changes: Dict[int, int] = {}
+    for node, key in zip(modules, module_keys):
+        if node.get("id") is None:
+            module = SimulationModule(
+                **{name: node[name] for name in MODULE_FIELDS if name in node},
+                simulation_id=simulation_id, order=key,
+            )
+            db.add(module)
+            db.flush()
+            node["id"] = module.id
+            diff.inserted += 1
+            continue
+        current = current_modules[node["id"]]
+        changes = _changes(current, node, MODULE_FIELDS)
+        if changes:
+            _update_row(db, SimulationModule, current.id, changes)
+            diff.updated += 1
+        if key != current.order:
+            order_changes[current.id] = key
+    rewrite_orders(db, SimulationModule, order_changes)
+    diff.reordered += len(order_changes)
+
+    # Tareas de los módulos que traen `tasks`
+    order_changes = {}
+    for node in modules:
+        if node.get("tasks") is None:
+            continue
+        tasks = node["tasks"]
+        keys = sparse_orders([
+            current_tasks[task["id"]].order
+            if task.get("id") and current_tasks[task["id"]].module_id == node["id"] else None
+            for task in tasks
+        ])
+        for task, key in zip(tasks, keys):
+            if task.get("id") is None:
+                _insert_task(db, node["id"], {name: task[name] for name in (*TASK_FIELDS, "resources", "model_answer")
+                                              if task.get(name) is not None}, key)
+                diff.inserted += 1
+                continue
+            current = current_tasks[task["id"]]
+            changes = _changes(current, task, TASK_FIELDS)
+            if current.module_id != node["id"]:
+                changes.update(module_id=node["id"], order=key)
+            elif key != current.order:
+                order_changes[current.id] = key
+            if changes:
+                _update_row(db, ModuleTask, current.id, changes)
+                diff.updated += 1
+    rewrite_orders(db, ModuleTask, order_changes)
+    diff.reordered += len(order_changes)
+
+    # Módulos borrados: sus tareas ya se borraron o se movieron
+    if dropped_modules:
+        _delete_modules(db, dropped_modules)
+    diff.deleted += len(dropped_tasks) + len(dropped_modules)
+    db.flush()
+    return diff
@@ -0,0 +1,238 @@
+"""
+API load benchmark
+
+Loads a synthetic data set (benchmarks.datagen) into a dedicated database,
+then drives the real FastAPI app with concurrent clients, either in process
+through httpx.ASGITransport or over HTTP against uvicorn started in a
+background thread. Reports p50/p95/p99 latency and requests per second per
+endpoint, and writes them as JSON for comparison across commits.
+
+Usage:
+    python -m benchmarks.bench_api --mode inprocess --requests 500 --concurrency 16 --output api.json
+    python -m benchmarks.bench_api --mode uvicorn --compare api.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import httpx
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.rate_limit import rate_limiter
+from app.db.base import Base
+from app.db.session import get_db, get_read_db
+from app.main import app
+from app.models.empresa import Empresa
+from app.models.simulations import Simulation
+from benchmarks.datagen import add_scale_arguments, generate, scale_from_args
+
+# (name, path template); placeholders are filled from the generated data
+ENDPOINTS = [
+    ("regions", "/api/v1/regions"),
+    ("cities", "/api/v1/cities"),
+    ("empresas_list", "/api/v1/empresas/"),
+    ("empresa_detail", "/api/v1/empresas/{company_id}"),
+    ("company_users", "/api/v1/companies/{company_id}/users"),
+    ("simulations_list", "/api/v1/simulations?limit=50"),
+    ("simulations_by_company", "/api/v1/simulations?company_id={company_id}&state=published"),
+    ("simulations_include", "/api/v1/simulations?limit=50&include=company,category"),
+    ("simulation_detail", "/api/v1/simulations/{simulation_id}"),
+    ("universities", "/api/v1/universities/"),
+]
+
+
+@dataclass
+class EndpointResult:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed_s: float = 0.0
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies_ms)
+        return {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+            "rps": round(len(ordered) / self.elapsed_s, 1) if self.elapsed_s else 0.0,
+        }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# ============================================
+# SETUP
+# ============================================
+
+def prepare_database(url: str, scale) -> dict:
+    """Recreate the schema, load the data set and route the app to it"""
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(url, pool_size=32, max_overflow=32)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with SessionLocal() as db:
+        counts = generate(db, scale)
+        params = {
+            "company_id": db.scalar(select(Empresa.id).order_by(Empresa.id)),
+            "simulation_id": db.scalar(select(Simulation.id).order_by(Simulation.id)),
+        }
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    rate_limiter.enabled = False
+    return {"counts": counts, "params": params}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn():
+    """Run uvicorn in a daemon thread; returns (base_url, server)"""
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+# ============================================
+# LOAD
+# ============================================
+
+async def run_endpoint(client: httpx.AsyncClient, url: str, requests: int, concurrency: int) -> EndpointResult:
+    result = EndpointResult()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.get(url)
+            result.latencies_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                result.errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed_s = time.perf_counter() - start
+    return result
+
+
+async def run_all(base_url: str, transport, params: dict, requests: int, concurrency: int, warmup: int) -> dict:
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+        for name, template in ENDPOINTS:
+            url = template.format(**params)
+            await run_endpoint(client, url, warmup, min(concurrency, max(warmup, 1)))
+            results[name] = (await run_endpoint(client, url, requests, concurrency)).summary()
+            print(f"{name:25s} " + "  ".join(f"{k}={v}" for k, v in results[name].items()))
+    return results
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)["endpoints"]
+    print(f"\n{'endpoint':25s} {'p95 base':>10s} {'p95 now':>10s} {'delta':>8s}")
+    for name, stats in current.items():
+        if name not in baseline:
+            continue
+        before, now = baseline[name]["p95_ms"], stats["p95_ms"]
+        delta = (now - before) / before * 100 if before else 0.0
+        print(f"{name:25s} {before:10.2f} {now:10.2f} {delta:+7.1f}%")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db"))
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare p95 against")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    scale = scale_from_args(args)
+    setup = prepare_database(args.database_url, scale)
+
+    server = None
+    if args.mode == "uvicorn":
+        base_url, server = start_uvicorn()
+        transport = None
+    else:
+        base_url, transport = "http://bench", httpx.ASGITransport(app=app)
+
+    try:
+        endpoints = asyncio.run(run_all(
+            base_url, transport, setup["params"], args.requests, args.concurrency, args.warmup
+        ))
+    finally:
+        if server is not None:
+            server.should_exit = True
+        app.dependency_overrides.clear()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "mode": args.mode,
+            "database": args.database_url.split("://")[0],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "scale": vars(scale),
+            "rows": setup["counts"],
+        },
+        "endpoints": endpoints,
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        compare(endpoints, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Simulation cloning benchmark
+
+Builds one large simulation (modules x tasks, each task with resources and a
+model answer) and compares the set-based clone (app.services.
+simulation_cloning: five INSERT ... SELECT) with the round trip it replaces:
+load the whole tree into Python (what GET /simulations/{id} does) and write
+it back as new ORM objects (what POST /simulations does, in one flush).
+
+Usage: python -m benchmarks.bench_clone [--modules 50] [--tasks 40] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.db.base import Base
+from app.models.catalog import ContentCategory
+from app.models.empresa import Empresa
+from app.models.simulations import ModelAnswer, ModuleTask, Simulation, SimulationModule, TaskResource
+from app.services import simulation_cloning
+
+RESOURCES_PER_TASK = 2
+
+
+def build_source(db: Session, modules: int, tasks: int) -> int:
+    """One simulation with modules x tasks, written with executemany inserts"""
+    company = Empresa(nombre_empresa="Clone Bench", slug="clone-bench")
+    category = ContentCategory(name="Clone Bench", slug="clone-bench")
+    db.add_all([company, category])
+    db.flush()
+    source = Simulation(company_id=company.id, category_id=category.id, title="Source",
+                        slug="clone-source", short_description="Large template", state="published")
+    db.add(source)
+    db.flush()
+
+    db.execute(insert(SimulationModule), [
+        {"simulation_id": source.id, "title": f"Module {m}", "order": (m + 1) * 1024} for m in range(modules)
+    ])
+    module_ids = db.scalars(select(SimulationModule.id).where(SimulationModule.simulation_id == source.id)).all()
+    db.execute(insert(ModuleTask), [
+        {"module_id": module_id, "title": f"Task {t}", "description": "x" * 400, "order": (t + 1) * 1024}
+        for module_id in module_ids for t in range(tasks)
+    ])
+    task_ids = db.scalars(select(ModuleTask.id).where(ModuleTask.module_id.in_(module_ids))).all()
+    db.execute(insert(TaskResource), [
+        {"task_id": task_id, "name": f"Resource {r}", "url": f"https://cdn.aurum.ec/{task_id}/{r}.pdf"}
+        for task_id in task_ids for r in range(RESOURCES_PER_TASK)
+    ])
+    db.execute(insert(ModelAnswer), [
+        {"task_id": task_id, "description": "y" * 400, "key_learnings": ["a", "b", "c"]} for task_id in task_ids
+    ])
+    db.commit()
+    return source.id
+
+
+def clone_set_based(db: Session, source_id: int, slug: str) -> None:
+    simulation_cloning.clone_simulation(db, source_id, slug)
+    db.commit()
+
+
+def clone_round_trip(db: Session, source_id: int, slug: str) -> None:
+    source = db.scalars(
+        select(Simulation).where(Simulation.id == source_id).options(
+            selectinload(Simulation.modules).selectinload(SimulationModule.tasks).selectinload(ModuleTask.resources),
+            selectinload(Simulation.modules).selectinload(SimulationModule.tasks).selectinload(ModuleTask.model_answer),
+        )
+    ).one()
+
+    def columns(obj, *skip):
+        return {
+            attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs
+            if attr.key not in {"id", "created_at", "updated_at", "version", "cloned_from_id", *skip}
+        }
+
+    clone = Simulation(**columns(source, "slug", "state", "published_at", "deleted_at"), slug=slug, state="draft")
+    for module in source.modules:
+        new_module = SimulationModule(**columns(module, "simulation_id"))
+        clone.modules.append(new_module)
+        for task in module.tasks:
+            new_task = ModuleTask(**columns(task, "module_id"))
+            new_module.tasks.append(new_task)
+            new_task.resources = [TaskResource(**columns(r, "task_id")) for r in task.resources]
+            if task.model_answer:
+                new_task.model_answer = ModelAnswer(**columns(task.model_answer, "task_id"))
+    db.add(clone)
+    db.commit()
+
+
+def timed(fn, engine, source_id: int, prefix: str, runs: int) -> list:
+    timings = []
+    for run in range(runs):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            fn(db, source_id, f"{prefix}-{run}")
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db"))
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=40, help="Tasks per module")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        source_id = build_source(db, args.modules, args.tasks)
+
+    tasks = args.modules * args.tasks
+    rows = 1 + args.modules + tasks * (2 + RESOURCES_PER_TASK)
+    results = {"rows_per_clone": rows}
+    for name, fn in (("set_based", clone_set_based), ("round_trip", clone_round_trip)):
+        timings = timed(fn, engine, source_id, name.replace("_", "-"), args.runs)
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 1),
+            "min_ms": round(min(timings), 1),
+        }
+        print(f"{name:12s} median={results[name]['median_ms']:9.1f} ms  min={results[name]['min_ms']:9.1f} ms  ({rows} rows)")
+    results["speedup"] = round(results["round_trip"]["median_ms"] / results["set_based"]["median_ms"], 1)
+    print(f"speedup      {results['speedup']}x")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
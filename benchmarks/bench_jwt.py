@@ -0,0 +1,68 @@
+"""
+JWT sign/verify throughput benchmark
+
+Compares the ES256 KeySet (key objects parsed once) with ES256 passing the
+PEM on every call (what re-deserializing per request costs) and with the
+previous HS256 shared secret, reporting operations per second.
+
+Usage: python -m benchmarks.bench_jwt [--iterations 2000]
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from jose import jwt
+
+from app.core import tokens
+
+CLAIMS = {"sub": "bench-user", "exp": 4102444800}
+HS256_SECRET = "bench-secret-" + "x" * 32
+
+
+def _rate(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+def run(iterations: int, keys_dir: str) -> dict:
+    key_set = tokens.KeySet(keys_dir, reload_seconds=3600)
+    es_token = key_set.sign(CLAIMS)
+    kid = key_set.signing.kid
+    with open(f"{key_set.keys_dir}/{kid}{tokens.PRIVATE_SUFFIX}") as fh:
+        private_pem = fh.read()
+    public_pem = key_set.verification[kid].key.public_key().to_pem().decode()
+    hs_token = jwt.encode(CLAIMS, HS256_SECRET, algorithm="HS256")
+
+    return {
+        "es256_keyset_sign_per_s": _rate(lambda: key_set.sign(CLAIMS), iterations),
+        "es256_keyset_verify_per_s": _rate(lambda: key_set.verify(es_token), iterations),
+        "es256_pem_verify_per_s": _rate(
+            lambda: jwt.decode(es_token, public_pem, algorithms=["ES256"]), iterations),
+        "es256_pem_sign_per_s": _rate(
+            lambda: jwt.encode(CLAIMS, private_pem, algorithm="ES256"), iterations),
+        "hs256_sign_per_s": _rate(lambda: jwt.encode(CLAIMS, HS256_SECRET, algorithm="HS256"), iterations),
+        "hs256_verify_per_s": _rate(
+            lambda: jwt.decode(hs_token, HS256_SECRET, algorithms=["HS256"]), iterations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-jwt-") as keys_dir:
+        results = {name: round(value, 1) for name, value in run(args.iterations, keys_dir).items()}
+    for name, value in results.items():
+        print(f"{name:30s} {value:12.1f}")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Metrics middleware overhead benchmark
+
+Drives MetricsMiddleware around a no-op ASGI app (with a fake matched route
+in the scope, as FastAPI leaves it) and reports the added microseconds per
+request, failing when it exceeds the budget. Also times a /metrics render
+with many routes.
+
+Usage: python -m benchmarks.bench_metrics [--requests 100000] [--budget-us 25] [--output metrics.json]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from types import SimpleNamespace
+
+from app.core.metrics import MetricsMiddleware, MetricsRegistry
+
+ROUTE = SimpleNamespace(path="/simulations/{id}")
+
+
+async def noop_app(scope, receive, send):
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(requests):
+        scope = {"type": "http", "method": "GET", "path": f"/api/v1/simulations/{i}", "headers": []}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def bench_middleware(requests: int) -> float:
+    wrapped = MetricsMiddleware(noop_app, metrics=MetricsRegistry())
+    baseline = asyncio.run(_drive(noop_app, requests))
+    with_metrics = asyncio.run(_drive(wrapped, requests))
+    return with_metrics - baseline
+
+
+def bench_render(routes: int) -> float:
+    metrics = MetricsRegistry()
+    for r in range(routes):
+        scope = {"method": "GET", "path": f"/api/v1/r{r}", "route": SimpleNamespace(path=f"/api/v1/r{r}")}
+        for value in range(1, 2000, 7):
+            metrics.finish(scope, 200, value * 50)
+    start = time.perf_counter()
+    metrics.render_prometheus()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--routes", type=int, default=100, help="Routes in the /metrics render benchmark")
+    parser.add_argument("--budget-us", type=float, default=25.0, help="Max middleware overhead per request")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {
+        "middleware_overhead_us_per_request": round(bench_middleware(args.requests), 3),
+        f"render_{args.routes}_routes_ms": round(bench_render(args.routes), 3),
+        "budget_us_per_request": args.budget_us,
+    }
+    for name, value in results.items():
+        print(f"{name:40s} {value:10.3f}")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if results["middleware_overhead_us_per_request"] > args.budget_us:
+        sys.exit(f"❌ Overhead above budget ({args.budget_us} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Rate limiter overhead benchmark
+
+Measures the in-memory backend alone (single thread and N threads on
+distinct keys) and the full RateLimitMiddleware wrapped around a no-op
+ASGI app, reporting microseconds per request.
+
+Usage: python -m benchmarks.bench_rate_limiter [--requests 100000] [--threads 8]
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend, RateLimiter, RateLimitMiddleware, RateLimitRule
+)
+
+RULE = RateLimitRule("bench", capacity=1_000_000_000, per_minute=1_000_000_000)
+
+
+def bench_backend(requests: int) -> float:
+    backend = InMemoryRateLimitBackend()
+    keys = [f"ip:10.0.{i // 256}.{i % 256}" for i in range(1024)]
+    start = time.perf_counter()
+    for i in range(requests):
+        backend.consume(keys[i & 1023], RULE)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def bench_backend_threads(requests: int, threads: int) -> float:
+    backend = InMemoryRateLimitBackend()
+    per_thread = requests // threads
+
+    def worker(t):
+        for i in range(per_thread):
+            backend.consume(f"ip:{t}:{i & 255}", RULE)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return (time.perf_counter() - start) / (per_thread * threads) * 1e6
+
+
+async def _drive(app, requests: int) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/api/v1/regions",
+             "headers": [], "client": ("10.0.0.1", 1234)}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def bench_middleware(requests: int) -> float:
+    limiter = RateLimiter(InMemoryRateLimitBackend())
+    limiter.enabled = True
+    limiter.rules["write"] = RULE
+    wrapped = RateLimitMiddleware(noop_app, limiter=limiter)
+
+    baseline = asyncio.run(_drive(noop_app, requests))
+    with_limiter = asyncio.run(_drive(wrapped, requests))
+    return with_limiter - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {
+        "backend_us_per_check": round(bench_backend(args.requests), 3),
+        f"backend_{args.threads}_threads_us_per_check": round(bench_backend_threads(args.requests, args.threads), 3),
+        "middleware_overhead_us_per_request": round(bench_middleware(args.requests), 3),
+    }
+    for name, value in results.items():
+        print(f"{name:45s} {value:10.3f}")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
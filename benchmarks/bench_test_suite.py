@@ -0,0 +1,58 @@
+"""
+Test suite wall-time benchmark
+
+Runs the pytest suite `--runs` times (optionally with pytest-xdist workers)
+and reports min/median/max wall time, so fixture changes can be compared.
+
+Usage: python -m benchmarks.bench_test_suite [--runs 3] [--workers 4] [--output suite.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def run_suite(workers: int, extra: list) -> float:
+    cmd = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider"]
+    if workers:
+        cmd += ["-n", str(workers)]
+    cmd += extra
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"pytest failed (exit code {result.returncode}): {' '.join(cmd)}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=0, help="pytest-xdist workers (0 = serial)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("pytest_args", nargs="*", help="Extra arguments passed to pytest")
+    args = parser.parse_args()
+
+    times = [run_suite(args.workers, args.pytest_args) for _ in range(args.runs)]
+    results = {
+        "runs": args.runs,
+        "workers": args.workers,
+        "test_database_url": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        "wall_seconds_min": round(min(times), 3),
+        "wall_seconds_median": round(statistics.median(times), 3),
+        "wall_seconds_max": round(max(times), 3),
+    }
+    for name, value in results.items():
+        print(f"{name:25s} {value}")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Multi-worker scaling benchmark
+
+Loads the synthetic data set (benchmarks.datagen), then starts the app
+under gunicorn (gunicorn.conf.py) with 1..N uvicorn workers and drives a
+list endpoint and /token (bcrypt-bound) with concurrent HTTP clients,
+reporting requests per second and the speedup over the first run.
+
+Usage:
+    python -m benchmarks.bench_workers --workers 1,2,4 --requests 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core import passwords, tokens
+from app.models.user import User
+from benchmarks.bench_api import EndpointResult, _free_port, git_commit, prepare_database
+from benchmarks.datagen import add_scale_arguments, scale_from_args
+
+LOGIN_USERNAME = "bench-login"
+LOGIN_PASSWORD = "bench-password"
+
+
+def create_login_user(url: str) -> None:
+    engine = create_engine(url)
+    with Session(engine) as db:
+        db.add(User(
+            username=LOGIN_USERNAME,
+            email="bench-login@aurum.ec",
+            hashed_password=passwords.hash_password(LOGIN_PASSWORD),
+        ))
+        db.commit()
+    engine.dispose()
+
+
+def start_gunicorn(workers: int, database_url: str, keys_dir: str):
+    """Start gunicorn in a subprocess and wait for /health; returns (base_url, process)"""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY=str(workers),
+        DATABASE_URL=database_url,
+        JWT_KEYS_DIR=keys_dir,
+        RATE_LIMIT_ENABLED="False",
+        LOGIN_LOCKOUT_ENABLED="False",
+        METRICS_SQL_COMMENTS="False",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return base_url, process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def stop_gunicorn(process) -> None:
+    """SIGTERM: graceful shutdown, as in a deploy"""
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def drive(send: Callable, requests: int, concurrency: int) -> EndpointResult:
+    result = EndpointResult()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await send()
+            result.latencies_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                result.errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed_s = time.perf_counter() - start
+    return result
+
+
+async def run_workload(base_url: str, requests: int, concurrency: int, warmup: int) -> Dict[str, dict]:
+    login_form = {"username": LOGIN_USERNAME, "password": LOGIN_PASSWORD}
+    workload = {
+        "simulations_list": lambda client: client.get("/api/v1/simulations?limit=50"),
+        "login": lambda client: client.post("/token", data=login_form),
+    }
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        for name, request in workload.items():
+            await drive(lambda: request(client), warmup, min(concurrency, max(warmup, 1)))
+            results[name] = (await drive(lambda: request(client), requests, concurrency)).summary()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite:///./bench.db"))
+    parser.add_argument("--requests", type=int, default=400, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    worker_counts: List[int] = [int(n) for n in args.workers.split(",")]
+    setup = prepare_database(args.database_url, scale_from_args(args))
+    create_login_user(args.database_url)
+
+    runs = {}
+    with tempfile.TemporaryDirectory(prefix="bench-jwt-") as keys_dir:
+        # One key before any worker starts: all of them sign with the same kid
+        tokens.generate_key(keys_dir)
+        for workers in worker_counts:
+            base_url, process = start_gunicorn(workers, args.database_url, keys_dir)
+            try:
+                runs[workers] = asyncio.run(run_workload(base_url, args.requests, args.concurrency, args.warmup))
+            finally:
+                stop_gunicorn(process)
+
+    first = runs[worker_counts[0]]
+    print(f"\n{'workers':>7s} {'endpoint':18s} {'rps':>9s} {'p95_ms':>9s} {'speedup':>8s}")
+    for workers, endpoints in runs.items():
+        for name, stats in endpoints.items():
+            base_rps = first[name]["rps"]
+            stats["speedup"] = round(stats["rps"] / base_rps, 2) if base_rps else 0.0
+            print(f"{workers:7d} {name:18s} {stats['rps']:9.1f} {stats['p95_ms']:9.2f} {stats['speedup']:7.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({
+                "meta": {
+                    "commit": git_commit(),
+                    "cpus": os.cpu_count(),
+                    "database": args.database_url.split("://")[0],
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "rows": setup["counts"],
+                },
+                "runs": {str(workers): endpoints for workers, endpoints in runs.items()},
+            }, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Synthetic data sets for the API benchmarks
+
+Generates a reproducible data set (fixed random seed) at a configurable
+scale: the full Ecuador geography from scripts/seed_ecuador.py, content
+categories, companies with company users, users and simulations with
+modules and tasks. Rows are written with executemany Core inserts so large
+scales load in seconds.
+
+Usage: python -m benchmarks.datagen --database-url sqlite:///./bench.db [--companies 50] ...
+"""
+import argparse
+import contextlib
+import io
+import random
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.security import hash_password
+from app.db.base import Base
+from app.models.catalog import City, ContentCategory
+from app.models.empresa import Empresa
+from app.models.simulations import ModuleTask, Simulation, SimulationModule
+from app.models.user import User
+from app.models.usuarios_empresa import CompanyUser
+from scripts.seed_ecuador import seed_ecuador
+
+STATES = ["draft", "published", "published", "archived"]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+ROLES = ["owner", "admin", "editor", "viewer"]
+CATEGORIES = ["Finanzas", "Marketing", "Tecnología", "Consultoría", "Recursos Humanos", "Legal"]
+
+# Every generated user shares this password, hashed once
+BENCH_PASSWORD = "bench-password"
+
+
+@dataclass
+class Scale:
+    users: int = 1000
+    companies: int = 50
+    users_per_company: int = 5
+    simulations_per_company: int = 10
+    modules_per_simulation: int = 5
+    tasks_per_module: int = 4
+    seed: int = 42
+
+
+def _insert(db: Session, model, rows, chunk: int = 5000) -> None:
+    for start in range(0, len(rows), chunk):
+        db.execute(insert(model), rows[start:start + chunk])
+
+
+def generate(db: Session, scale: Scale, quiet: bool = True) -> dict:
+    """
+    Populate an empty schema and return the row counts per table
+
+    The same `scale` (including `seed`) always produces the same data set.
+    """
+    rng = random.Random(scale.seed)
+
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        seed_ecuador(db)
+    city_ids = db.scalars(select(City.id).order_by(City.id)).all()
+
+    _insert(db, ContentCategory, [
+        {"name": name, "slug": name.lower().replace(" ", "-"), "order": i}
+        for i, name in enumerate(CATEGORIES)
+    ])
+    category_ids = db.scalars(select(ContentCategory.id).order_by(ContentCategory.id)).all()
+
+    password_hash = hash_password(BENCH_PASSWORD)
+    _insert(db, User, [
+        {
+            "username": f"user{i}",
+            "email": f"user{i}@bench.ec",
+            "full_name": f"Usuario {i}",
+            "hashed_password": password_hash,
+            "city_id": rng.choice(city_ids),
+            "xp_total": rng.randint(0, 5000),
+        }
+        for i in range(scale.users)
+    ])
+
+    _insert(db, Empresa, [
+        {
+            "nombre_empresa": f"Empresa {i}",
+            "slug": f"empresa-{i}",
+            "industria": rng.choice(CATEGORIES),
+            "descripcion_corta": f"Empresa sintética {i}",
+            "es_partner_activo": rng.random() < 0.3,
+        }
+        for i in range(scale.companies)
+    ])
+    company_ids = db.scalars(select(Empresa.id).order_by(Empresa.id)).all()
+
+    _insert(db, CompanyUser, [
+        {
+            "company_id": company_id,
+            "email": f"staff{j}@empresa-{company_id}.ec",
+            "password_hash": password_hash,
+            "full_name": f"Staff {j}",
+            "role": ROLES[j % len(ROLES)],
+            "is_active": rng.random() < 0.9,
+        }
+        for company_id in company_ids
+        for j in range(scale.users_per_company)
+    ])
+
+    _insert(db, Simulation, [
+        {
+            "company_id": company_id,
+            "category_id": rng.choice(category_ids),
+            "title": f"Simulación {company_id}-{j}",
+            "slug": f"sim-{company_id}-{j}",
+            "short_description": "Simulación sintética para benchmarks",
+            "difficulty_level": rng.choice(DIFFICULTIES),
+            "xp_reward": rng.randint(50, 500),
+            "state": rng.choice(STATES),
+        }
+        for company_id in company_ids
+        for j in range(scale.simulations_per_company)
+    ])
+    simulation_ids = db.scalars(select(Simulation.id).order_by(Simulation.id)).all()
+
+    _insert(db, SimulationModule, [
+        {"simulation_id": sim_id, "title": f"Módulo {k}", "order": k}
+        for sim_id in simulation_ids
+        for k in range(scale.modules_per_simulation)
+    ])
+    module_ids = db.scalars(select(SimulationModule.id).order_by(SimulationModule.id)).all()
+
+    _insert(db, ModuleTask, [
+        {"module_id": module_id, "title": f"Tarea {t}", "order": t, "task_type": "submission"}
+        for module_id in module_ids
+        for t in range(scale.tasks_per_module)
+    ])
+    db.commit()
+
+    return {
+        "cities": len(city_ids),
+        "users": scale.users,
+        "companies": len(company_ids),
+        "company_users": len(company_ids) * scale.users_per_company,
+        "simulations": len(simulation_ids),
+        "modules": len(module_ids),
+        "tasks": len(module_ids) * scale.tasks_per_module,
+    }
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = Scale()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+
+
+def scale_from_args(args: argparse.Namespace) -> Scale:
+    return Scale(**{name: getattr(args, name) for name in asdict(Scale())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        counts = generate(db, scale_from_args(args))
+    for table, count in counts.items():
+        print(f"{table:15s} {count:10d}")
+
+
+if __name__ == "__main__":
+    main()
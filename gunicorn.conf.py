@@ -0,0 +1,66 @@
+# ============================================
+# AURUM DAO API - GUNICORN (PRODUCCIÓN)
+# ============================================
+# gunicorn -c gunicorn.conf.py app.main:app
+#
+# - N workers uvicorn (WEB_CONCURRENCY, por defecto un worker por core)
+# - preload_app: la app se importa una vez en el master y los workers la
+#   comparten copy-on-write; gc.freeze() evita que el GC de los hijos toque
+#   (y copie) esas páginas
+# - post_fork: cada worker descarta los pools heredados y abre sus propias
+#   conexiones (un socket no se puede compartir entre procesos)
+# - SIGTERM: los workers dejan de aceptar conexiones y terminan los requests
+#   en curso durante graceful_timeout antes de salir
+#
+# Conexiones a Postgres: workers x (pool_size + max_overflow) del engine.
+#
+# Estado por worker: lo que vive en memoria del proceso no se comparte.
+# - Rate limiter y bloqueo de login: RATE_LIMIT_BACKEND / LOGIN_LOCKOUT_BACKEND
+#   = redis (así corre docker-compose.prod.yml); con memory cada worker cuenta
+#   por su lado.
+# - /metrics: cada scrape lo contesta un solo worker con sus propios números
+#   (la serie aurum_worker_info{pid} dice cuál). Para totales exactos, un
+#   worker por contenedor (WEB_CONCURRENCY=1) escalando contenedores, cada
+#   uno scrapeado como target propio.
+import gc
+import multiprocessing
+import os
+
+# Sin GC en el master mientras se importa la app (menos huecos en páginas compartidas)
+gc.disable()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Reciclar workers de a poco (acota fugas de memoria sin reiniciar todos juntos)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+# Heartbeat de los workers en memoria (en Docker /tmp puede ser overlayfs)
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # Todo lo importado hasta acá queda fuera del GC; el master vuelve a recolectar
+    gc.freeze()
+    gc.enable()
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.db.session import dispose_engines
+
+    dispose_engines()
@@ -0,0 +1,170 @@
+# scripts/index_advisor.py
+"""
+Index advisor: captura las queries SQL que emite cada endpoint GET y las
+pasa por EXPLAIN para detectar sequential scans.
+
+- PostgreSQL: EXPLAIN (FORMAT JSON), marca nodos "Seq Scan"
+- SQLite: EXPLAIN QUERY PLAN, marca "SCAN <tabla>" sin índice
+
+Usa la base configurada (DATABASE_URL / POSTGRES_*), idealmente el Postgres
+local con datos de seed; en tablas casi vacías Postgres puede preferir un
+Seq Scan aunque exista el índice, así que conviene correrlo con volumen.
+
+Usage:
+    python scripts/index_advisor.py
+    python scripts/index_advisor.py --path-param company_id=3 --only /api/v1/simulations
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db.session import engine
+from app.main import app
+
+# Variantes de query string que reproducen las formas reales de los filtros
+QUERY_VARIANTS: Dict[str, List[str]] = {
+    "/api/v1/simulations": ["", "company_id={company_id}", "company_id={company_id}&state=published"],
+    "/api/v1/universities/": ["", "city_id=1"],
+    "/api/v1/companies/{company_id}/users": ["", "include_inactive=true"],
+}
+
+PATH_PARAM = re.compile(r"{(\w+)(?::\w+)?}")
+
+
+@dataclass
+class CapturedQuery:
+    statement: str
+    parameters: object
+    plan: List[str] = field(default_factory=list)
+    seq_scans: List[str] = field(default_factory=list)
+
+
+@dataclass
+class EndpointReport:
+    method: str
+    url: str
+    status_code: Optional[int] = None
+    queries: List[CapturedQuery] = field(default_factory=list)
+
+
+# ============================================
+# EXPLAIN
+# ============================================
+
+def _walk_pg_plan(node: dict, out: List[str]) -> None:
+    out.append(f"{node.get('Node Type')} {node.get('Relation Name', '')} {node.get('Index Name', '')}".strip())
+    for child in node.get("Plans", []):
+        _walk_pg_plan(child, out)
+
+
+def explain(conn, query: CapturedQuery) -> None:
+    """Completa query.plan y query.seq_scans según el dialecto"""
+    cursor = conn.connection.cursor()
+    try:
+        if conn.dialect.name == "postgresql":
+            cursor.execute("EXPLAIN (FORMAT JSON) " + query.statement, query.parameters)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            _walk_pg_plan(plan[0]["Plan"], query.plan)
+            query.seq_scans = [line for line in query.plan if line.startswith("Seq Scan")]
+        else:
+            cursor.execute("EXPLAIN QUERY PLAN " + query.statement, query.parameters)
+            query.plan = [row[-1] for row in cursor.fetchall()]
+            query.seq_scans = [
+                line for line in query.plan
+                if line.startswith("SCAN ") and "USING" not in line
+            ]
+    finally:
+        cursor.close()
+
+
+# ============================================
+# CAPTURE
+# ============================================
+
+def discover_urls(path_params: Dict[str, str], only: Optional[str]) -> List[str]:
+    """URLs a ejecutar: cada ruta GET del esquema OpenAPI con sus variantes"""
+    urls = []
+    for route_path, operations in app.openapi()["paths"].items():
+        if "get" not in operations:
+            continue
+        if only and not route_path.startswith(only):
+            continue
+        path = PATH_PARAM.sub(lambda m: path_params.get(m.group(1), "1"), route_path)
+        for variant in QUERY_VARIANTS.get(route_path, [""]):
+            query = variant.format(**path_params) if variant else ""
+            urls.append(f"{path}?{query}" if query else path)
+    return urls
+
+
+def run(path_params: Dict[str, str], only: Optional[str]) -> List[EndpointReport]:
+    reports: List[EndpointReport] = []
+    current: List[CapturedQuery] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            current.append(CapturedQuery(statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with TestClient(app) as client:
+            for url in discover_urls(path_params, only):
+                current.clear()
+                report = EndpointReport("GET", url)
+                report.status_code = client.get(url).status_code
+                report.queries = list(current)
+                reports.append(report)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        for report in reports:
+            for query in report.queries:
+                explain(conn, query)
+    return reports
+
+
+def print_report(reports: List[EndpointReport]) -> int:
+    flagged = 0
+    for report in reports:
+        print(f"\n{report.method} {report.url} -> {report.status_code} ({len(report.queries)} queries)")
+        for query in report.queries:
+            marker = "⚠️ " if query.seq_scans else "✅"
+            print(f"  {marker} {' '.join(query.statement.split())[:160]}")
+            for line in query.plan:
+                print(f"       {line}")
+            flagged += bool(query.seq_scans)
+    print(f"\n📊 {flagged} queries con sequential scan")
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN de las queries de cada endpoint GET")
+    parser.add_argument("--path-param", action="append", default=[],
+                        help="Valor para un parámetro de ruta, ej: company_id=3 (default 1)")
+    parser.add_argument("--only", help="Prefijo de ruta a analizar, ej: /api/v1/simulations")
+    parser.add_argument("--fail-on-seq-scan", action="store_true",
+                        help="Exit code 1 si alguna query hace sequential scan")
+    args = parser.parse_args()
+
+    path_params = dict(p.split("=", 1) for p in args.path_param)
+    path_params.setdefault("company_id", "1")
+
+    flagged = print_report(run(path_params, args.only))
+
+    if args.fail_on_seq_scan and flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
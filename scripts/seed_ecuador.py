@@ -8,11 +8,18 @@ from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.models.catalog import Region, Province, City
 
-def seed_ecuador():
-    """Poblar la base de datos con regiones, provincias y ciudades de Ecuador"""
+def seed_ecuador(db: Session = None):
+    """
+    Poblar la base de datos con regiones, provincias y ciudades de Ecuador
+
+    Args:
+        db: Sesión a usar (por defecto abre y cierra una propia)
+    """
     print("🌱 Iniciando seed de Ecuador...")
     
-    db: Session = SessionLocal()
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
     
     try:
         # Verificar conexión
@@ -202,7 +209,8 @@ def seed_ecuador():
         db.rollback()
         raise
     finally:
-        db.close()
+        if owns_session:
+            db.close()
 
 if __name__ == "__main__":
     seed_ecuador()
\ No newline at end of file
@@ -19,5 +19,10 @@ echo "🔄 Ejecutando migraciones..."
 alembic upgrade head
 
 # Iniciar servidor
-echo "✓ Iniciando servidor FastAPI..."
+if [ "$ENVIRONMENT" = "production" ]; then
+  # N workers con la app precargada (ver gunicorn.conf.py)
+  echo "✓ Iniciando servidor FastAPI (gunicorn, ${WEB_CONCURRENCY:-1 por core} workers)..."
+  exec gunicorn -c gunicorn.conf.py app.main:app
+fi
+echo "✓ Iniciando servidor FastAPI (desarrollo, --reload)..."
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
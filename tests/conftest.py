@@ -1,46 +1,124 @@
 """
 Pytest Configuration and Fixtures
-Versión corregida con SQLite en memoria para tests
+SQLite en memoria, esquema creado una vez por sesión y cada test
+aislado en una transacción que se revierte al terminar
 """
+import os
+import tempfile
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
+from app.core import tokens
+from app.core.config import settings
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.main import app
+from app.services.plan_limits import usage_cache
+from app.core.rate_limit import rate_limiter
+from app.core.lockout import failed_logins
 
 # ============================================
-# FIX: Usar SQLite en memoria para tests
+# Base de datos de tests
 # ============================================
-# Esto evita depender de PostgreSQL durante las pruebas
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test_aurum.db"
+# Por defecto SQLite en memoria (una sola conexión compartida vía StaticPool).
+# TEST_DATABASE_URL permite apuntar a un Postgres local; con pytest-xdist
+# cada worker usa su propia base (<nombre>_gw0, <nombre>_gw1, ...).
+SQLALCHEMY_TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite://")
 
-engine = create_engine(
-    SQLALCHEMY_TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Solo para SQLite
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Costo bcrypt mínimo: los tests no miden la seguridad del hash
+settings.BCRYPT_ROUNDS = 4
 
+# Claves JWT de la sesión de tests en un directorio temporal
+tokens.key_set.keys_dir = tempfile.mkdtemp(prefix="aurum-jwt-keys-")
 
-@pytest.fixture(scope="function")
-def db_session():
+
+def _worker_url(url: str) -> str:
+    """Base de datos propia para cada worker de pytest-xdist"""
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    parsed = make_url(url)
+    if not worker or not parsed.database or parsed.database == ":memory:":
+        return url
+    if parsed.get_backend_name() == "sqlite":
+        root, ext = os.path.splitext(parsed.database)
+        return parsed.set(database=f"{root}_{worker}{ext}").render_as_string(hide_password=False)
+    return parsed.set(database=f"{parsed.database}_{worker}").render_as_string(hide_password=False)
+
+
+def _create_postgres_database(url: str) -> None:
+    """Crea (o recrea) la base de datos del worker en Postgres"""
+    parsed = make_url(url)
+    admin = create_engine(parsed.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{parsed.database}"'))
+            conn.execute(text(f'CREATE DATABASE "{parsed.database}"'))
+    finally:
+        admin.dispose()
+
+
+def _build_engine(url: str):
+    if make_url(url).get_backend_name() != "sqlite":
+        if os.getenv("PYTEST_XDIST_WORKER"):
+            _create_postgres_database(url)
+        return create_engine(url)
+
+    test_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # Solo para SQLite
+        poolclass=StaticPool,
+    )
+
+    # pysqlite abre las transacciones por su cuenta y rompe los SAVEPOINT;
+    # se desactiva ese comportamiento y SQLAlchemy emite el BEGIN.
+    @event.listens_for(test_engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(test_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return test_engine
+
+
+engine = _build_engine(_worker_url(SQLALCHEMY_TEST_DATABASE_URL))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
     """
-    Crea una sesión de base de datos para cada test
+    Crea el esquema una sola vez por sesión de tests
     """
-    # Crear todas las tablas
     Base.metadata.create_all(bind=engine)
-    
-    # Crear sesión
-    db = TestingSessionLocal()
-    
+    yield
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def db_session(database_schema):
+    """
+    Sesión de base de datos aislada para cada test
+
+    Todo el test corre dentro de una transacción externa que se revierte al
+    final; los commit() del código bajo prueba solo liberan SAVEPOINTs.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+
     try:
         yield db
     finally:
         db.close()
-        # Limpiar la base de datos después de cada test
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
+        usage_cache.clear()
 
 
 @pytest.fixture(scope="function")
@@ -55,6 +133,9 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    rate_limiter.reset()
+    failed_logins.clear()
     
     with TestClient(app) as test_client:
         yield test_client
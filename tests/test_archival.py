@@ -0,0 +1,167 @@
+"""
+Tests for Soft Delete and Purge
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, func, select, update
+
+from app.models.catalog import ContentCategory
+from app.models.empresa import Empresa
+from app.models.simulations import ModelAnswer, ModuleTask, Simulation, SimulationModule, TaskResource
+from app.models.user import User
+from app.models.usuarios_empresa import CompanyUser
+from app.services.archival import purge_deleted
+
+
+@pytest.fixture
+def company(db_session):
+    empresa = Empresa(nombre_empresa="Archive Co", slug="archive-co")
+    category = ContentCategory(name="Archive", slug="archive")
+    db_session.add_all([empresa, category])
+    db_session.commit()
+    return {"company_id": empresa.id, "category_id": category.id}
+
+
+def create_tree(client, company, slug, state="draft"):
+    """Simulation with 2 modules x 2 tasks, each with a resource and a model answer"""
+    task = {
+        "title": "Task", "order": 1, "task_type": "submission",
+        "resources": [{"name": "Doc", "url": "http://file.com"}],
+        "model_answer": {"description": "Solution"},
+    }
+    response = client.post("/api/v1/simulations", json={
+        "title": slug, "slug": slug, "short_description": "Tree", "state": state,
+        "modules": [{"title": f"M{i}", "order": i, "tasks": [task, {**task, "order": 2}]} for i in range(2)],
+        **company,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def count(db_session, model, *criteria):
+    return db_session.scalar(select(func.count()).select_from(model).where(*criteria))
+
+
+def backdate(db_session, column, days=31):
+    model = column.class_
+    db_session.execute(
+        update(model).where(column.is_not(None))
+        .values({column.key: datetime.now(timezone.utc) - timedelta(days=days)})
+    )
+    db_session.commit()
+
+
+def test_delete_simulation_is_a_single_update(client, db_session, company):
+    sim_id = create_tree(client, company, "soft-sim", state="published")
+    statements = []
+    engine = db_session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0].upper())
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.delete(f"/api/v1/simulations/{sim_id}")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 204
+    assert "DELETE" not in statements
+    assert client.get(f"/api/v1/simulations/{sim_id}").status_code == 404
+    assert client.get("/api/v1/simulations").json() == []
+    assert client.delete(f"/api/v1/simulations/{sim_id}").status_code == 404
+    # Content stays until the purge job runs
+    assert count(db_session, ModuleTask) == 4
+    # Published counter released
+    assert client.get(f"/api/v1/empresas/{company['company_id']}").json()["total_simulaciones"] == 0
+
+
+def test_delete_empresa_archives_its_content(client, db_session, company):
+    company_id = company["company_id"]
+    create_tree(client, company, "co-sim")
+    db_session.add(CompanyUser(company_id=company_id, email="staff@co.ec", password_hash="x", full_name="Staff"))
+    db_session.commit()
+
+    assert client.delete(f"/api/v1/empresas/{company_id}").status_code == 204
+
+    assert client.get(f"/api/v1/empresas/{company_id}").status_code == 404
+    assert client.get(f"/api/v1/companies/{company_id}/users").status_code == 404
+    assert client.get("/api/v1/empresas/", params={"ids": str(company_id)}).json() == []
+    assert count(db_session, Simulation, Simulation.deleted_at.is_(None)) == 0
+    assert count(db_session, CompanyUser, CompanyUser.is_active.is_(True)) == 0
+
+
+@pytest.mark.parametrize("state", ["draft", "published"])
+def test_archived_empresa_takes_no_new_content(client, db_session, company, state):
+    company_id = company["company_id"]
+    assert client.delete(f"/api/v1/empresas/{company_id}").status_code == 204
+
+    response = client.post("/api/v1/simulations", json={
+        "title": "Late", "slug": f"late-{state}", "short_description": "x", "state": state, **company,
+    })
+    assert response.status_code == 404
+    response = client.post(f"/api/v1/companies/{company_id}/users", json={
+        "company_id": company_id, "email": f"late-{state}@co.ec", "full_name": "Late",
+        "password": "password123", "role": "admin",
+    })
+    assert response.status_code == 404
+    assert count(db_session, Simulation) == 0
+
+
+def test_deleted_user_cannot_log_in(client, db_session):
+    response = client.post("/api/v1/users", json={
+        "username": "gone", "email": "gone@aurum.ec", "password": "secret123"
+    })
+    user_id = response.json()["id"]
+
+    assert client.delete(f"/api/v1/users/{user_id}").status_code == 204
+
+    assert client.get(f"/api/v1/users/{user_id}").status_code == 404
+    assert client.put(f"/api/v1/users/{user_id}", json={"full_name": "x"}).status_code == 404
+    assert client.post("/token", data={"username": "gone", "password": "secret123"}).status_code == 401
+    # Username stays reserved until the row is purged
+    response = client.post("/api/v1/users", json={
+        "username": "gone", "email": "other@aurum.ec", "password": "secret123"
+    })
+    assert response.status_code == 400
+
+
+def test_purge_removes_expired_trees_in_batches(client, db_session, company):
+    expired = [create_tree(client, company, f"old-{i}") for i in range(3)]
+    recent = create_tree(client, company, "recent")
+    kept = create_tree(client, company, "kept")
+    for sim_id in expired:
+        client.delete(f"/api/v1/simulations/{sim_id}")
+    backdate(db_session, Simulation.deleted_at)
+    client.delete(f"/api/v1/simulations/{recent}")
+
+    dry_run = purge_deleted(db_session, retention_days=30, batch_size=2, apply=False)
+    assert dry_run.simulations == 3
+    assert count(db_session, Simulation) == 5
+
+    result = purge_deleted(db_session, retention_days=30, batch_size=2)
+
+    assert result.simulations == 3
+    assert set(db_session.scalars(select(Simulation.id))) == {recent, kept}
+    assert count(db_session, SimulationModule) == 4
+    assert count(db_session, ModuleTask) == 8
+    assert count(db_session, TaskResource) == 8
+    assert count(db_session, ModelAnswer) == 8
+
+
+def test_purge_empresa_after_its_simulations(client, db_session, company):
+    company_id = company["company_id"]
+    create_tree(client, company, "co-tree")
+    db_session.add(CompanyUser(company_id=company_id, email="staff@co.ec", password_hash="x", full_name="Staff"))
+    db_session.add(User(username="old", email="old@aurum.ec", hashed_password="x"))
+    db_session.commit()
+    client.delete(f"/api/v1/empresas/{company_id}")
+    client.delete(f"/api/v1/users/{db_session.scalar(select(User.id))}")
+    backdate(db_session, Simulation.deleted_at)
+    backdate(db_session, Empresa.eliminado_en)
+    backdate(db_session, User.deleted_at)
+
+    result = purge_deleted(db_session, retention_days=30)
+
+    assert (result.simulations, result.empresas, result.users) == (1, 1, 1)
+    assert count(db_session, Empresa) == 0
+    assert count(db_session, CompanyUser) == 0
+    assert count(db_session, User) == 0
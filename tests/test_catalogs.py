@@ -181,5 +181,61 @@ def test_query_active_regions(db_session):
     print(f"✓ Active regions query works: {len(active_regions)} found")
 
 
+def test_batch_lookup_preserves_order(client, db_session):
+    """Test: ?ids= and POST /batch return rows in request order"""
+    region = Region(name="Costa", code="COS")
+    db_session.add(region)
+    db_session.commit()
+
+    province = Province(region_id=region.id, name="Guayas", code="GUA")
+    db_session.add(province)
+    db_session.commit()
+
+    cities = [City(province_id=province.id, name=name) for name in ("Guayaquil", "Daule", "Milagro")]
+    db_session.add_all(cities)
+    db_session.commit()
+    ids = [cities[2].id, cities[0].id, 9999, cities[2].id]
+
+    response = client.get("/api/v1/cities", params={"ids": ",".join(map(str, ids))})
+    assert response.status_code == 200
+    assert [c["name"] for c in response.json()] == ["Milagro", "Guayaquil"]
+
+    response = client.post("/api/v1/cities/batch", json={"ids": ids})
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()] == [cities[2].id, cities[0].id]
+    print(f"✓ Batch lookup returned {len(response.json())} cities")
+
+
+def test_batch_lookup_rejects_invalid_ids(client):
+    """Test: malformed id lists are rejected"""
+    assert client.get("/api/v1/regions", params={"ids": "1,abc"}).status_code == 400
+    assert client.post("/api/v1/skills/batch", json={"ids": []}).status_code == 422
+
+
+def test_universities_include_careers(client, db_session):
+    """Test: ?include=careers embeds careers in the university list"""
+    from app.models.university import University, Career, UniversityType
+    from app.schemas.university import UniversityOut
+
+    university = University(code="EPN", name="Escuela Politécnica Nacional",
+                            university_type=UniversityType.public)
+    db_session.add(university)
+    db_session.commit()
+    db_session.add(Career(code="EPN-SIS", name="Software", university_id=university.id))
+    db_session.commit()
+
+    plain = client.get("/api/v1/universities/").json()
+    # Same shape as before ?include= existed: every UniversityOut field, no careers key
+    assert set(plain[0]) == set(UniversityOut.model_fields)
+
+    expanded = client.get("/api/v1/universities/", params={"include": "careers"}).json()
+    assert [c["code"] for c in expanded[0]["careers"]] == ["EPN-SIS"]
+
+    batch = client.post("/api/v1/universities/batch", params={"include": "careers"}, json={"ids": [university.id]})
+    assert [c["code"] for c in batch.json()[0]["careers"]] == ["EPN-SIS"]
+    assert "careers" not in client.post("/api/v1/universities/batch", json={"ids": [university.id]}).json()[0]
+    print(f"✓ University with {len(expanded[0]['careers'])} career(s)")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,94 @@
+"""
+Tests for Conditional GETs
+Single-entity GETs carry ETag/Last-Modified and answer 304 for a current copy
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.models.catalog import ContentCategory, SkillCatalog
+from app.models.empresa import Empresa
+from app.models.simulations import Simulation
+from app.models.usuarios_empresa import CompanyUser
+from tests.test_updates import captured_statements
+
+
+@pytest.fixture
+def simulation(db_session):
+    company = Empresa(nombre_empresa="Etag Co", slug="etag-co")
+    category = ContentCategory(name="Etags", slug="etags")
+    db_session.add_all([company, category])
+    db_session.commit()
+    sim = Simulation(company_id=company.id, category_id=category.id, title="Cached",
+                     slug="cached", short_description="Polled by clients", state="draft")
+    db_session.add(sim)
+    db_session.commit()
+    return sim
+
+
+def test_matching_etag_returns_304_without_loading_the_entity(client, db_session, simulation):
+    url = f"/api/v1/simulations/{simulation.id}"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+
+    with captured_statements(db_session) as captured:
+        response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # Only the version lookup: no entity row, no modules
+    assert captured == ["SELECT"]
+
+    # Same validators through the slug
+    assert client.get("/api/v1/simulations/cached", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    print(f"✓ 304 with one SELECT, ETag {etag}")
+
+
+def test_update_changes_validators(client, db_session, simulation):
+    url = f"/api/v1/simulations/{simulation.id}"
+    etag = client.get(url).headers["etag"]
+
+    # SQLite timestamps have one-second resolution: move the version explicitly
+    later = datetime.now(timezone.utc) + timedelta(minutes=1)
+    db_session.execute(update(Simulation).where(Simulation.id == simulation.id).values(updated_at=later))
+    db_session.commit()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["title"] == "Cached"
+
+
+def test_if_modified_since(client, db_session):
+    company = Empresa(nombre_empresa="Since Co", slug="since-co")
+    db_session.add(company)
+    db_session.commit()
+    url = f"/api/v1/empresas/{company.id}"
+
+    last_modified = client.get(url).headers["last-modified"]
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+    # If-None-Match wins over If-Modified-Since
+    assert client.get(url, headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}).status_code == 200
+    assert client.get(url, headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+
+def test_skill_and_company_user_validators(client, db_session):
+    company = Empresa(nombre_empresa="Roles Co", slug="roles-co")
+    skill = SkillCatalog(name="Caching", slug="caching", category="technical")
+    db_session.add_all([company, skill])
+    db_session.commit()
+    user = CompanyUser(company_id=company.id, email="etag@roles.co", full_name="Etag User",
+                       password_hash="x", role="viewer")
+    db_session.add(user)
+    db_session.commit()
+
+    for url in (f"/api/v1/skills/{skill.id}", f"/api/v1/companies/{company.id}/users/{user.id}"):
+        etag = client.get(url).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    assert client.get("/api/v1/skills/999999", headers={"If-None-Match": "*"}).status_code == 404
@@ -48,6 +48,20 @@ class TestLeerEmpresas:
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["id"] == empresa_id
 
+    def test_obtener_lote(self, client, empresa_creada):
+        otra = client.post("/api/v1/empresas", json={
+            "nombre_empresa": "Otra Empresa",
+            "slug": "otra-empresa"
+        }).json()
+        ids = [otra["id"], empresa_creada["id"]]
+
+        response = client.get("/api/v1/empresas", params={"ids": f"{ids[0]},{ids[1]}"})
+        assert response.status_code == status.HTTP_200_OK
+        assert [e["id"] for e in response.json()] == ids
+
+        response = client.post("/api/v1/empresas/batch", json={"ids": ids})
+        assert [e["id"] for e in response.json()] == ids
+
 class TestActualizar:
     def test_update_nombre(self, client, empresa_creada):
         empresa_id = empresa_creada["id"]
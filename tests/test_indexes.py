@@ -0,0 +1,123 @@
+"""
+Index regression tests
+Capture the SQL issued by the hot endpoints and assert that SQLite's
+EXPLAIN QUERY PLAN uses the composite/partial indexes for it.
+"""
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, text
+
+from app.models.empresa import Empresa
+from app.models.university import Career, University, UniversityType
+from app.models.usuarios_empresa import CompanyUser
+
+ROLES = ["owner", "admin", "editor", "viewer"]
+
+
+@contextmanager
+def captured_selects(db_session):
+    """Collect (statement, parameters) of every SELECT sent to the database"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(db_session, statement, parameters):
+    cursor = db_session.connection().connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return " | ".join(row[-1] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def uses_index(plan, name):
+    return re.search(rf"USING (COVERING )?INDEX {name}\b", plan) is not None
+
+
+def plan_for(db_session, captured, table):
+    """Plan of the captured SELECT whose FROM is `table`"""
+    for statement, parameters in captured:
+        if f"FROM {table}" in statement:
+            return query_plan(db_session, statement, parameters)
+    pytest.fail(f"No SELECT on {table} captured")
+
+
+@pytest.fixture
+def company(db_session):
+    company = Empresa(nombre_empresa="Index Co", slug="index-co", industria="Tech")
+    db_session.add(company)
+    db_session.commit()
+    db_session.add_all([
+        CompanyUser(company_id=company.id, email=f"u{i}@index.co", password_hash="x",
+                    full_name=f"User {i}", role=ROLES[i % len(ROLES)],
+                    is_active=i % 3 != 0)
+        for i in range(40)
+    ])
+    db_session.commit()
+    # Planner statistics, as a production database would have them
+    db_session.execute(text("ANALYZE"))
+    db_session.commit()
+    return company
+
+
+def test_company_users_list_uses_company_active_index(client, db_session, company):
+    with captured_selects(db_session) as captured:
+        assert client.get(f"/api/v1/companies/{company.id}/users").status_code == 200
+
+    assert uses_index(plan_for(db_session, captured, "company_users"), "ix_company_users_company_id_is_active")
+
+
+def test_users_by_role_uses_partial_index(client, db_session, company):
+    with captured_selects(db_session) as captured:
+        assert client.get(f"/api/v1/companies/{company.id}/users/role/admin").status_code == 200
+
+    assert uses_index(plan_for(db_session, captured, "company_users"), "ix_company_users_active_company_id_role")
+
+
+def test_simulations_by_company_and_state_uses_composite_index(client, db_session, company):
+    with captured_selects(db_session) as captured:
+        response = client.get(f"/api/v1/simulations?company_id={company.id}&state=published")
+        assert response.status_code == 200
+
+    assert uses_index(plan_for(db_session, captured, "simulations"), "ix_simulations_company_id_state")
+
+
+def test_university_careers_uses_composite_index(client, db_session):
+    university = University(code="IDX", name="Index University", university_type=UniversityType.public)
+    db_session.add(university)
+    db_session.commit()
+    db_session.add(Career(code="IDX-1", name="Ingeniería", university_id=university.id))
+    db_session.commit()
+
+    with captured_selects(db_session) as captured:
+        assert client.get(f"/api/v1/universities/{university.id}/careers").status_code == 200
+
+    assert uses_index(plan_for(db_session, captured, "careers"), "ix_careers_university_id_is_active")
+
+
+def test_universities_by_city_uses_composite_index(client, db_session):
+    with captured_selects(db_session) as captured:
+        assert client.get("/api/v1/universities/?city_id=1").status_code == 200
+
+    assert uses_index(plan_for(db_session, captured, "universities"), "ix_universities_is_active_city_id")
+
+
+def test_primary_keys_have_no_duplicate_index(db_session):
+    from app.db.base import Base
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            columns = [c.name for c in index.columns]
+            assert columns != ["id"], f"{index.name} duplicates the primary key of {table.name}"
@@ -0,0 +1,113 @@
+"""
+Tests for Company User Invitations
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core import security
+from app.models.empresa import Empresa
+from app.models.usuarios_empresa import CompanyUser
+from app.services import invitations
+from app.services.plan_limits import usage_cache
+
+
+@pytest.fixture
+def company_id(db_session):
+    usage_cache.clear()
+    company = Empresa(nombre_empresa="Invite Co", slug="invite-co", max_usuarios_admin=1)
+    db_session.add(company)
+    db_session.commit()
+    return company.id
+
+
+def invite(client, company_id, email="new@invite.ec", role="viewer"):
+    return client.post(f"/api/v1/companies/{company_id}/invitations", json={
+        "email": email, "full_name": "Invitee", "role": role,
+    })
+
+
+def stored(db_session, email):
+    db_session.expire_all()
+    return db_session.scalar(select(CompanyUser).where(CompanyUser.email == email))
+
+
+def test_invite_stores_only_the_token_hash(client, db_session, company_id):
+    response = invite(client, company_id)
+
+    assert response.status_code == 201
+    body = response.json()
+    token = body["invitation_token"]
+    assert len(token) >= 43
+    assert body["user"]["invitation_expires_at"] is not None
+
+    user = stored(db_session, "new@invite.ec")
+    assert user.invitation_token == invitations.hash_token(token)
+    assert user.password_hash is None
+
+
+def test_accept_sets_password_and_consumes_token(client, db_session, company_id):
+    token = invite(client, company_id).json()["invitation_token"]
+
+    response = client.post("/api/v1/company-users/invitations/accept",
+                           json={"token": token, "password": "s3cret-pass"})
+
+    assert response.status_code == 200
+    assert response.json()["invitation_accepted_at"] is not None
+    user = stored(db_session, "new@invite.ec")
+    assert security.verify_password("s3cret-pass", user.password_hash)
+    assert (user.invitation_token, user.email_verified) == (None, True)
+
+    again = client.post("/api/v1/company-users/invitations/accept",
+                        json={"token": token, "password": "other-pass"})
+    assert again.status_code == 404
+
+
+def test_unknown_token_is_rejected_before_hashing(client, company_id, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(security, "hash_password", lambda password: hashed.append(password))
+
+    response = client.post("/api/v1/company-users/invitations/accept",
+                           json={"token": "made-up-token", "password": "s3cret-pass"})
+
+    assert response.status_code == 404
+    assert hashed == []
+
+
+def test_expired_invitation_cannot_be_accepted_and_is_swept(client, db_session, company_id):
+    token = invite(client, company_id).json()["invitation_token"]
+    accepted = invite(client, company_id, email="kept@invite.ec").json()["invitation_token"]
+    client.post("/api/v1/company-users/invitations/accept", json={"token": accepted, "password": "s3cret-pass"})
+    db_session.execute(
+        update(CompanyUser).values(invitation_expires_at=invitations.utcnow() - timedelta(hours=1))
+    )
+    db_session.commit()
+
+    response = client.post("/api/v1/company-users/invitations/accept",
+                           json={"token": token, "password": "s3cret-pass"})
+    assert response.status_code == 404
+
+    assert invitations.sweep_expired(db_session, batch_size=1) == 1
+    assert stored(db_session, "new@invite.ec") is None
+    assert stored(db_session, "kept@invite.ec") is not None
+    # The email is free again
+    assert invite(client, company_id).status_code == 201
+
+
+def test_bulk_invite_is_all_or_nothing(client, db_session, company_id):
+    url = f"/api/v1/companies/{company_id}/invitations/bulk"
+    people = [{"email": f"p{i}@invite.ec", "full_name": f"P{i}"} for i in range(3)]
+
+    response = client.post(url, json={"invitations": people})
+    assert response.status_code == 201
+    assert len({item["invitation_token"] for item in response.json()}) == 3
+
+    retry = client.post(url, json={"invitations": [{"email": "p9@invite.ec", "full_name": "P9"}, people[0]]})
+    assert retry.status_code == 400
+    assert stored(db_session, "p9@invite.ec") is None
+
+    # Admin seats are checked across the batch (max_usuarios_admin=1)
+    admins = [{"email": f"a{i}@invite.ec", "full_name": "A", "role": "admin"} for i in range(2)]
+    assert client.post(url, json={"invitations": admins}).status_code == 409
+    assert stored(db_session, "a0@invite.ec") is None
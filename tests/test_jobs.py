@@ -0,0 +1,188 @@
+"""
+Tests for Background Jobs
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.jobs import enqueue, job
+from app.jobs import queue as job_queue
+from app.jobs.registry import handlers
+from app.jobs.worker import JobMetrics, Worker
+from app.models.catalog import ContentCategory
+from app.models.jobs import BackgroundJob
+
+calls = []
+
+
+@pytest.fixture(autouse=True)
+def test_handlers():
+    calls.clear()
+
+    @job("test.create_category")
+    def create_category(db, slug):
+        db.add(ContentCategory(name=slug, slug=slug))
+        calls.append(slug)
+
+    @job("test.fail", max_attempts=2)
+    def fail(db):
+        calls.append("fail")
+        raise RuntimeError("boom")
+
+    yield
+    for name in [n for n in handlers if n.startswith("test.")]:
+        del handlers[name]
+
+
+@pytest.fixture
+def worker(db_session):
+    factory = sessionmaker(bind=db_session.get_bind(), join_transaction_mode="create_savepoint")
+    return Worker(session_factory=factory, queues=["default"], metrics=JobMetrics())
+
+
+def jobs(db_session):
+    db_session.expire_all()
+    return db_session.scalars(select(BackgroundJob).order_by(BackgroundJob.id)).all()
+
+
+def make_ready(db_session):
+    db_session.execute(update(BackgroundJob).values(run_at=job_queue.utcnow() - timedelta(minutes=1)))
+    db_session.commit()
+
+
+def test_enqueued_job_runs_in_its_own_transaction(db_session, worker):
+    enqueue(db_session, "test.create_category", {"slug": "from-job"})
+    db_session.commit()
+
+    assert worker.drain() == 1
+
+    [done] = jobs(db_session)
+    assert (done.status, done.attempts, done.finished_at is not None) == ("done", 1, True)
+    assert db_session.scalar(select(ContentCategory.slug)) == "from-job"
+    assert worker.drain() == 0
+
+
+def test_enqueue_is_part_of_the_callers_transaction(db_session):
+    enqueue(db_session, "test.create_category", {"slug": "never"})
+    db_session.rollback()
+
+    assert jobs(db_session) == []
+    with pytest.raises(ValueError):
+        enqueue(db_session, "test.unknown")
+
+
+def test_failed_job_is_retried_with_backoff_then_fails(db_session, worker):
+    enqueue(db_session, "test.fail")
+    db_session.commit()
+
+    worker.drain()
+    [retry] = jobs(db_session)
+    assert (retry.status, retry.attempts) == ("queued", 1)
+    assert "boom" in retry.last_error
+    delay = (job_queue.as_utc(retry.run_at) - job_queue.utcnow()).total_seconds()
+    assert 0 < delay <= settings.JOBS_BACKOFF_BASE_SECONDS
+    # Not ready until the backoff expires
+    assert worker.drain() == 0
+
+    make_ready(db_session)
+    worker.drain()
+    [failed] = jobs(db_session)
+    assert (failed.status, failed.attempts) == ("failed", 2)
+    assert calls == ["fail", "fail"]
+    assert worker.metrics.outcomes == {("test.fail", "retry"): 1, ("test.fail", "failed"): 1}
+
+
+def test_unknown_handler_fails_without_retry(db_session, worker):
+    db_session.add(BackgroundJob(name="test.removed", queue="default", payload={}))
+    db_session.commit()
+
+    worker.drain()
+
+    [failed] = jobs(db_session)
+    assert (failed.status, failed.attempts) == ("failed", 1)
+
+
+def test_claim_takes_each_ready_job_once(db_session):
+    for i in range(3):
+        enqueue(db_session, "test.create_category", {"slug": f"c{i}"})
+    enqueue(db_session, "test.create_category", {"slug": "later"}, delay_seconds=3600)
+    db_session.commit()
+
+    first = job_queue.claim(db_session, "default", 2, "w1")
+    second = job_queue.claim(db_session, "default", 2, "w2")
+
+    assert [j.payload["slug"] for j in first] == ["c0", "c1"]
+    assert [j.payload["slug"] for j in second] == ["c2"]
+    assert job_queue.claim(db_session, "default", 2, "w3") == []
+
+
+def test_stale_running_jobs_are_requeued(db_session):
+    enqueue(db_session, "test.create_category", {"slug": "stale"})
+    db_session.commit()
+    job_queue.claim(db_session, "default", 1, "dead-worker")
+    db_session.execute(update(BackgroundJob).values(locked_at=job_queue.utcnow() - timedelta(hours=1)))
+    db_session.commit()
+
+    assert job_queue.requeue_stale(db_session, timeout_seconds=600) == 1
+    assert jobs(db_session)[0].status == "queued"
+
+
+def test_queue_lag_metrics(client, db_session, worker):
+    enqueue(db_session, "test.create_category", {"slug": "lagged"})
+    db_session.commit()
+    make_ready(db_session)
+
+    worker.housekeeping(force=True)
+    assert worker.metrics.ready["default"][0] == 1
+    assert worker.metrics.ready["default"][1] >= 60
+    worker.run_once()
+    worker.housekeeping(force=True)
+
+    text = "\n".join(worker.metrics.render())
+    assert 'background_jobs_total{name="test.create_category",outcome="done"} 1' in text
+    assert 'background_job_lag_seconds_count{queue="default"} 1' in text
+    assert 'background_jobs_ready{queue="default"} 0' in text
+    assert "background_job_lag_seconds" in client.get("/metrics").text
+
+
+def test_periodic_jobs_are_scheduled_once(db_session, worker):
+    @job("test.periodic", every_seconds=3600)
+    def periodic(db):
+        calls.append("periodic")
+
+    worker.housekeeping(force=True)
+    worker.housekeeping(force=True)
+    [first] = jobs(db_session)
+    assert first.name == "test.periodic"
+
+    # Runs now (never ran before); the next run is due every_seconds after it finished
+    worker.drain()
+    assert calls == ["periodic"]
+    done, following = jobs(db_session)
+    assert (done.status, following.status) == ("done", "queued")
+    delay = (job_queue.as_utc(following.run_at) - job_queue.as_utc(done.finished_at)).total_seconds()
+    assert delay == pytest.approx(3600, abs=1)
+    assert worker.drain() == 0
+
+
+def test_purge_job_keeps_explicit_zero_retention(db_session, monkeypatch):
+    from app.jobs import tasks
+
+    received = []
+    monkeypatch.setattr(tasks.archival, "purge_deleted", lambda db, retention_days: received.append(retention_days))
+    tasks.purge_deleted(db_session, retention_days=0)
+    tasks.purge_deleted(db_session)
+
+    assert received == [0, settings.PURGE_RETENTION_DAYS]
+
+
+def test_maintenance_jobs_are_periodic():
+    from app.jobs.registry import periodic_specs
+    import app.jobs.tasks  # noqa: F401
+
+    assert {spec.name for spec in periodic_specs(["maintenance"])} == {
+        "company_metrics.reconcile", "archival.purge", "invitations.sweep",
+    }
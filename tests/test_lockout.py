@@ -0,0 +1,107 @@
+"""
+Tests for Account Lockout
+Failed logins counted in memory, lock persisted only at the threshold
+"""
+import pytest
+from fastapi import status
+from sqlalchemy import event, select
+
+from app.api.v1 import auth
+from app.core import passwords
+from app.core.config import settings
+from app.core.lockout import FailedLoginTracker
+from app.core.rate_limit import RateLimitRule, rate_limiter
+from app.models.user import User
+
+
+@pytest.fixture
+def account(client, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_LOCKOUT_THRESHOLD", 3)
+    monkeypatch.setitem(rate_limiter.rules, "login_user", RateLimitRule("login_user", 100, 0))
+    monkeypatch.setitem(rate_limiter.rules, "auth", RateLimitRule("auth", 100, 0))
+    client.post("/api/v1/users", json={"username": "locky", "email": "locky@aurum.ec", "password": "right-pass"})
+    return "locky"
+
+
+def login(client, password):
+    return client.post("/token", data={"username": "locky", "password": password})
+
+
+def test_failures_below_threshold_do_not_write(client, db_session, account):
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement.split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        codes = [login(client, "wrong").status_code for _ in range(2)]
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert codes == [status.HTTP_401_UNAUTHORIZED] * 2
+    assert set(statements) == {"SELECT"}
+
+
+def test_threshold_locks_before_bcrypt(client, db_session, account, monkeypatch):
+    codes = [login(client, "wrong").status_code for _ in range(3)]
+    assert codes == [401, 401, status.HTTP_423_LOCKED]
+
+    user = db_session.scalar(select(User).where(User.username == "locky"))
+    db_session.refresh(user)
+    assert (user.failed_login_attempts, user.locked_until is not None) == (3, True)
+
+    calls = []
+    monkeypatch.setattr(auth, "verify_password", lambda *args: calls.append(args) or True)
+    locked = login(client, "right-pass")
+    assert locked.status_code == status.HTTP_423_LOCKED
+    assert int(locked.headers["Retry-After"]) > 0
+    assert calls == []
+
+
+def test_unknown_username_gets_the_same_answers(client, account):
+    def codes(username):
+        return [client.post("/token", data={"username": username, "password": "wrong"}).status_code
+                for _ in range(4)]
+
+    # Existing and missing accounts are indistinguishable: 401, 401, then 423
+    assert codes("locky") == codes("nobody") == [401, 401, 423, 423]
+
+
+def test_unknown_username_pays_the_same_bcrypt(client, account, monkeypatch):
+    checked = []
+    checkpw = passwords.bcrypt.checkpw
+
+    def spy(password, hashed):
+        checked.append(hashed)
+        return checkpw(password, hashed)
+
+    monkeypatch.setattr(passwords.bcrypt, "checkpw", spy)
+
+    assert client.post("/token", data={"username": "nobody", "password": "wrong"}).status_code == 401
+    assert len(checked) == 1
+    assert passwords.hash_rounds(checked[0].decode()) == settings.BCRYPT_ROUNDS
+
+
+def test_success_after_lock_expires_clears_it(client, db_session, account, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_LOCKOUT_SECONDS", -1)
+    [login(client, "wrong") for _ in range(3)]
+
+    assert login(client, "right-pass").status_code == 200
+
+    user = db_session.scalar(select(User).where(User.username == "locky"))
+    db_session.refresh(user)
+    assert (user.failed_login_attempts, user.locked_until) == (0, None)
+
+
+def test_tracker_window_slides(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.core.lockout.time.monotonic", lambda: clock[0])
+    tracker = FailedLoginTracker(window_seconds=60, shards=2)
+
+    assert [tracker.record_failure("a") for _ in range(2)] == [1, 2]
+    clock[0] += 61
+    assert tracker.record_failure("a") == 1
+    tracker.forget("a")
+    assert tracker.record_failure("a") == 1
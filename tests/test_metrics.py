@@ -0,0 +1,94 @@
+"""
+Tests for Request Metrics
+Route-templated histograms, status counters, trace ids in logs and SQL
+"""
+import logging
+import os
+
+import pytest
+from sqlalchemy import event
+
+from app.core.metrics import LatencyHistogram, registry, trace_id_var
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_histogram_percentiles_within_bucket_error():
+    hist = LatencyHistogram()
+    for value in range(1, 10_001):
+        hist.record(value)
+
+    for pct in (50, 95, 99):
+        exact = pct * 100
+        assert exact <= hist.percentile(pct) <= exact * 1.07
+    assert hist.count_le(1000) <= 1000
+    print("✓ Percentiles within 7% of exact values")
+
+
+def test_metrics_use_templated_route(client, empresa_data):
+    created = client.post("/api/v1/empresas/", json=empresa_data).json()
+    for _ in range(3):
+        client.get(f"/api/v1/empresas/{created['id']}")
+    client.get("/api/v1/empresas/999999")
+
+    body = client.get("/metrics").text
+
+    route = 'method="GET",route="/api/v1/empresas/{id}"'
+    assert f"http_request_duration_seconds_count{{{route}}} 4" in body
+    assert f'http_responses_total{{{route},status="200"}} 3' in body
+    assert f'http_responses_total{{{route},status="404"}} 1' in body
+    assert f'/api/v1/empresas/{created["id"]}"' not in body
+    # /metrics itself is being served while rendering
+    assert 'http_requests_in_flight{method="GET",route="/metrics"} 1' in body
+    # Per-process registry: the scrape says which worker answered
+    assert f'aurum_worker_info{{pid="{os.getpid()}"}} 1' in body
+    print("✓ Metrics keyed by templated route")
+
+
+def test_unmatched_paths_share_one_label(client):
+    client.get("/no-such-path/1")
+    client.get("/no-such-path/2")
+
+    assert 'http_responses_total{method="GET",route="<unmatched>",status="404"} 2' in client.get("/metrics").text
+
+
+def test_trace_id_propagates_to_response_logs_and_sql(client, db_session):
+    statements = []
+    seen_in_logs = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    class Probe(logging.Handler):
+        def emit(self, record):
+            seen_in_logs.append(record.trace_id)
+
+    logger = logging.getLogger("app.tests.trace")
+    probe = Probe()
+    logger.addHandler(probe)
+    engine = db_session.get_bind()
+    event.listen(engine, "after_cursor_execute", capture)
+    try:
+        response = client.get("/api/v1/regions", headers={"X-Request-ID": "abc-123"})
+        token = trace_id_var.set("abc-123")
+        logger.warning("inside request context")
+        trace_id_var.reset(token)
+    finally:
+        event.remove(engine, "after_cursor_execute", capture)
+        logger.removeHandler(probe)
+
+    assert response.headers["x-request-id"] == "abc-123"
+    assert any(s.endswith("/* trace_id=abc-123 */") for s in statements)
+    assert seen_in_logs == ["abc-123"]
+
+
+def test_unsafe_trace_id_is_replaced(client):
+    response = client.get("/", headers={"X-Request-ID": "x */ DROP TABLE users; --"})
+
+    assert response.status_code == 200
+    assert len(response.headers["x-request-id"]) == 32
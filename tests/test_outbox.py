@@ -0,0 +1,163 @@
+"""
+Tests for the Transactional Outbox
+"""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.jobs.worker import JobMetrics, Worker
+from app.models.catalog import ContentCategory
+from app.models.empresa import Empresa
+from app.models.outbox import OutboxEvent
+from app.models.usuarios_empresa import CompanyUser
+from app.services import outbox
+
+
+@pytest.fixture
+def company(db_session):
+    empresa = Empresa(nombre_empresa="Outbox Co", slug="outbox-co")
+    category = ContentCategory(name="Outbox", slug="outbox")
+    db_session.add_all([empresa, category])
+    db_session.commit()
+    return {"company_id": empresa.id, "category_id": category.id}
+
+
+@pytest.fixture
+def received():
+    events = []
+    pattern_subscriber = ("*", lambda db, event: events.append((event.event_type, event.aggregate_id)))
+    outbox.subscribers.append(pattern_subscriber)
+    yield events
+    outbox.subscribers.remove(pattern_subscriber)
+
+
+def events(db_session, since=0):
+    db_session.expire_all()
+    return db_session.scalars(
+        select(OutboxEvent).where(OutboxEvent.id > since).order_by(OutboxEvent.id)
+    ).all()
+
+
+def last_id(db_session):
+    return db_session.scalar(select(OutboxEvent.id).order_by(OutboxEvent.id.desc()).limit(1)) or 0
+
+
+def create_simulation(client, company, slug="outbox-sim"):
+    response = client.post("/api/v1/simulations", json={
+        "title": "Outbox", "slug": slug, "short_description": "Events", **company,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_insert_and_update_emit_events(client, db_session, company):
+    mark = last_id(db_session)
+    sim_id = create_simulation(client, company)
+    response = client.patch(f"/api/v1/simulations/{sim_id}", json={"title": "Renamed"},
+                            headers={"X-Request-ID": "trace-outbox-1"})
+    assert response.status_code == 200
+
+    created, updated = events(db_session, mark)
+    assert (created.event_type, created.aggregate_id) == ("simulation.created", sim_id)
+    assert created.payload["slug"] == "outbox-sim"
+    assert (updated.event_type, updated.payload) == ("simulation.updated", {"title": "Renamed"})
+    assert updated.trace_id == "trace-outbox-1"
+    assert updated.dispatched_at is None
+
+
+def test_rolled_back_write_leaves_no_event(client, db_session, company):
+    create_simulation(client, company, slug="taken")
+    mark = last_id(db_session)
+
+    response = client.post("/api/v1/simulations", json={
+        "title": "Dup", "slug": "taken", "short_description": "x", **company,
+    })
+
+    assert response.status_code == 400
+    assert events(db_session, mark) == []
+
+
+def test_secrets_are_not_in_payloads(client, db_session):
+    mark = last_id(db_session)
+    client.post("/api/v1/users", json={"username": "evt", "email": "evt@aurum.ec", "password": "secret123"})
+
+    [created] = events(db_session, mark)
+    assert created.event_type == "user.created"
+    assert created.payload["username"] == "evt"
+    assert "hashed_password" not in created.payload
+
+
+def test_empresa_delete_emits_events_for_archived_content(client, db_session, company):
+    company_id = company["company_id"]
+    sim_id = create_simulation(client, company)
+    staff = CompanyUser(company_id=company_id, email="evt@co.ec", password_hash="x", full_name="Staff")
+    db_session.add(staff)
+    db_session.commit()
+    mark = last_id(db_session)
+
+    client.delete(f"/api/v1/empresas/{company_id}")
+
+    assert [(e.event_type, e.aggregate_id) for e in events(db_session, mark)] == [
+        ("empresa.deleted", company_id),
+        ("simulation.deleted", sim_id),
+        ("company_user.updated", staff.id),
+    ]
+
+
+def test_dispatch_delivers_each_event_once(client, db_session, company, received):
+    sim_id = create_simulation(client, company)
+    client.patch(f"/api/v1/simulations/{sim_id}", json={"state": "published"})
+    pending = len(events(db_session))
+
+    assert outbox.dispatch_pending(db_session, batch_size=pending) == pending
+    assert outbox.dispatch_pending(db_session) == 0
+
+    assert received[-2:] == [("simulation.created", sim_id), ("simulation.updated", sim_id)]
+    assert all(e.dispatched_at is not None for e in events(db_session))
+
+
+def test_only_one_dispatcher_runs_at_a_time(client, db_session, company, received, monkeypatch):
+    create_simulation(client, company)
+    monkeypatch.setattr(outbox, "try_transaction_lock", lambda db, name: False)
+
+    assert outbox.dispatch_pending(db_session) == 0
+    assert received == []
+
+
+def test_failing_subscriber_blocks_then_drops_event(client, db_session, company, received, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    outbox.dispatch_pending(db_session)
+    sim_id = create_simulation(client, company)
+    client.patch(f"/api/v1/simulations/{sim_id}", json={"title": "After"})
+
+    @outbox.subscribe("simulation.created")
+    def broken(db, event):
+        raise RuntimeError("index unavailable")
+
+    try:
+        # First failure: nothing after the failing event is delivered
+        assert outbox.dispatch_pending(db_session) == 0
+        created, updated = events(db_session)[-2:]
+        assert (created.attempts, created.dispatched_at, updated.dispatched_at) == (1, None, None)
+        assert "index unavailable" in created.last_error
+
+        # Second failure reaches OUTBOX_MAX_ATTEMPTS: dropped, the rest flows
+        assert outbox.dispatch_pending(db_session) == 2
+    finally:
+        outbox.subscribers.remove(("simulation.created", broken))
+
+    assert received[-1] == ("simulation.updated", sim_id)
+    dropped = events(db_session)[-2]
+    assert (dropped.attempts, dropped.dispatched_at is not None) == (2, True)
+
+
+def test_worker_drains_the_outbox(client, db_session, company, received):
+    sim_id = create_simulation(client, company)
+    factory = sessionmaker(bind=db_session.get_bind(), join_transaction_mode="create_savepoint")
+    worker = Worker(session_factory=factory, queues=[], metrics=JobMetrics(), dispatch_outbox=True)
+
+    worker.drain()
+
+    assert ("simulation.created", sim_id) in received
+    assert outbox.outbox_metrics.pending == 0
@@ -0,0 +1,65 @@
+"""
+Tests for the Password Policy
+Configurable bcrypt cost, rehash-on-login and calibration
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import passwords
+from app.core.config import settings
+from app.db import session as session_module
+from app.models.user import User
+
+
+def test_hash_uses_configured_rounds(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    hashed = passwords.hash_password("secret123")
+
+    assert passwords.hash_rounds(hashed) == 5
+    assert passwords.verify_password("secret123", hashed)
+    assert not passwords.needs_rehash(hashed)
+    assert passwords.needs_rehash(passwords.hash_password("secret123", rounds=4))
+    # Long passwords are truncated to bcrypt's 72 bytes instead of raising
+    assert passwords.verify_password("x" * 100, passwords.hash_password("x" * 72))
+    assert not passwords.verify_password("secret123", "not-a-hash")
+
+
+def test_login_rehashes_outdated_hash_after_response(client, db_session, monkeypatch):
+    # The background task opens its own session (the request's one is closed by then)
+    fresh_sessions = sessionmaker(
+        bind=db_session.connection(), autoflush=False, join_transaction_mode="create_savepoint"
+    )
+    monkeypatch.setattr(session_module, "SessionLocal", fresh_sessions)
+
+    client.post("/api/v1/users", json={"username": "old", "email": "old@aurum.ec", "password": "secret123"})
+    old_hash = db_session.scalar(select(User.hashed_password).where(User.username == "old"))
+    assert passwords.hash_rounds(old_hash) == settings.BCRYPT_ROUNDS
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", settings.BCRYPT_ROUNDS + 1)
+    response = client.post("/token", data={"username": "old", "password": "secret123"})
+    assert response.status_code == 200
+
+    with fresh_sessions() as db:
+        new_hash = db.scalar(select(User.hashed_password).where(User.username == "old"))
+    assert new_hash != old_hash
+    assert passwords.hash_rounds(new_hash) == settings.BCRYPT_ROUNDS
+    assert client.post("/token", data={"username": "old", "password": "secret123"}).status_code == 200
+
+
+def test_rehash_loses_to_concurrent_password_change(db_session):
+    user = User(username="race", email="race@aurum.ec", hashed_password=passwords.hash_password("new-pass"))
+    db_session.add(user)
+    db_session.commit()
+
+    assert not passwords.rehash_user_password(db_session, user.id, "old-pass", "stale-hash")
+    db_session.refresh(user)
+    assert passwords.verify_password("new-pass", user.hashed_password)
+
+
+def test_calibrate_stops_past_target(monkeypatch):
+    monkeypatch.setattr(passwords, "measure", lambda rounds, samples: 2 ** (rounds - 4) * 10.0)
+
+    rounds, timings = passwords.calibrate(target_ms=100)
+
+    assert rounds == 7
+    assert [r for r, _ in timings] == [4, 5, 6, 7, 8]
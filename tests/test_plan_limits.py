@@ -0,0 +1,223 @@
+"""
+Tests for Plan Limits
+max_simulaciones_activas / max_usuarios_admin, including concurrent creates
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException, status
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.auth import create_access_token
+from app.api.v1.company_users import create_company_user
+from app.api.v1.simulations import create_simulation
+from app.core.config import settings
+from app.core.security import hash_password
+from app.db.base import Base
+from app.models.catalog import ContentCategory
+from app.models.empresa import Empresa
+from app.models.simulations import Simulation
+from app.models.user import User
+from app.models.usuarios_empresa import CompanyUser
+from app.schemas.simulations import SimulationCreate
+from app.schemas.usuarios_empresa import CompanyUserCreate
+from app.services.plan_limits import usage_cache
+
+
+@pytest.fixture
+def limited_company(client, db_session):
+    company = Empresa(
+        nombre_empresa="Limited Corp",
+        slug="limited-corp",
+        max_simulaciones_activas=2,
+        max_usuarios_admin=1
+    )
+    category = ContentCategory(name="Limits", slug="limits")
+    db_session.add_all([company, category])
+    db_session.commit()
+    return {"company_id": company.id, "category_id": category.id}
+
+
+@pytest.fixture
+def plan_admin(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "PLAN_ADMINS", "billing")
+    db_session.add(User(username="billing", email="billing@aurum.ec", hashed_password=hash_password("x")))
+    db_session.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'billing'})}"}
+
+
+def _sim_payload(setup, state="published"):
+    return {
+        "title": "Limited Sim",
+        "slug": f"limited-{uuid.uuid4().hex[:8]}",
+        "short_description": "Plan limits",
+        "company_id": setup["company_id"],
+        "category_id": setup["category_id"],
+        "state": state
+    }
+
+
+def _admin_payload(setup, role="admin"):
+    return {
+        "company_id": setup["company_id"],
+        "email": f"{uuid.uuid4().hex[:8]}@limited.com",
+        "full_name": "Admin",
+        "password": "password123",
+        "role": role
+    }
+
+
+class TestSimulationLimit:
+
+    def test_publish_beyond_limit_is_rejected(self, client, limited_company):
+        for _ in range(2):
+            response = client.post("/api/v1/simulations", json=_sim_payload(limited_company))
+            assert response.status_code == status.HTTP_201_CREATED
+
+        response = client.post("/api/v1/simulations", json=_sim_payload(limited_company))
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+        # Drafts don't count and can't be published while the plan is full
+        draft = client.post("/api/v1/simulations", json=_sim_payload(limited_company, state="draft"))
+        assert draft.status_code == status.HTTP_201_CREATED
+        response = client.patch(f"/api/v1/simulations/{draft.json()['id']}", json={"state": "published"})
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_archiving_frees_a_slot(self, client, limited_company):
+        sims = [
+            client.post("/api/v1/simulations", json=_sim_payload(limited_company)).json()
+            for _ in range(2)
+        ]
+        assert client.post("/api/v1/simulations", json=_sim_payload(limited_company)).status_code == 409
+
+        client.patch(f"/api/v1/simulations/{sims[0]['id']}", json={"state": "archived"})
+        response = client.post("/api/v1/simulations", json=_sim_payload(limited_company))
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_plan_upgrade_clears_cached_full_state(self, client, limited_company, plan_admin):
+        for _ in range(2):
+            client.post("/api/v1/simulations", json=_sim_payload(limited_company))
+        assert client.post("/api/v1/simulations", json=_sim_payload(limited_company)).status_code == 409
+
+        response = client.put(f"/api/v1/empresas/{limited_company['company_id']}/plan",
+                              json={"max_simulaciones_activas": 3}, headers=plan_admin)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["max_simulaciones_activas"] == 3
+        response = client.post("/api/v1/simulations", json=_sim_payload(limited_company))
+        assert response.status_code == status.HTTP_201_CREATED
+
+
+    def test_limits_are_not_editable_by_clients(self, client, db_session, limited_company, plan_admin):
+        url = f"/api/v1/empresas/{limited_company['company_id']}"
+
+        # The public update ignores plan fields
+        response = client.put(url, json={"max_simulaciones_activas": None, "max_usuarios_admin": None})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["max_simulaciones_activas"] == 2
+
+        assert client.put(f"{url}/plan", json={"max_simulaciones_activas": 5}).status_code == 401
+        db_session.add(User(username="someone", email="someone@aurum.ec", hashed_password=hash_password("x")))
+        db_session.commit()
+        someone = {"Authorization": f"Bearer {create_access_token({'sub': 'someone'})}"}
+        assert client.put(f"{url}/plan", json={"max_simulaciones_activas": 5}, headers=someone).status_code == 403
+
+        for invalid in ({"max_simulaciones_activas": None}, {"max_usuarios_admin": -1}):
+            response = client.put(f"{url}/plan", json=invalid, headers=plan_admin)
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestAdminLimit:
+
+    def test_admin_limit_and_promotion(self, client, limited_company):
+        company_id = limited_company["company_id"]
+        url = f"/api/v1/companies/{company_id}/users"
+
+        assert client.post(url, json=_admin_payload(limited_company)).status_code == 201
+        assert client.post(url, json=_admin_payload(limited_company)).status_code == 409
+
+        viewer = client.post(url, json=_admin_payload(limited_company, role="viewer"))
+        assert viewer.status_code == 201
+        response = client.patch(f"{url}/{viewer.json()['id']}", json={"role": "owner"})
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+
+class TestConcurrentCreates:
+    """Parallel creates on separate connections never exceed the plan"""
+
+    WORKERS = 8
+
+    @pytest.fixture
+    def file_db(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'limits.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30}
+        )
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = SessionLocal()
+        company = Empresa(
+            nombre_empresa="Race Corp",
+            slug="race-corp",
+            max_simulaciones_activas=3,
+            max_usuarios_admin=2
+        )
+        category = ContentCategory(name="Race", slug="race")
+        db.add_all([company, category])
+        db.commit()
+        setup = {"company_id": company.id, "category_id": category.id}
+        db.close()
+
+        yield SessionLocal, setup
+
+        usage_cache.clear()
+        engine.dispose()
+
+    def _run_parallel(self, SessionLocal, fn):
+        def attempt(_):
+            db = SessionLocal()
+            try:
+                fn(db)
+                return True
+            except HTTPException as exc:
+                assert exc.status_code == status.HTTP_409_CONFLICT
+                return False
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            return list(pool.map(attempt, range(self.WORKERS)))
+
+    def test_parallel_publishes_respect_limit(self, file_db):
+        SessionLocal, setup = file_db
+
+        results = self._run_parallel(
+            SessionLocal,
+            lambda db: create_simulation(SimulationCreate(**_sim_payload(setup)), db=db)
+        )
+
+        db = SessionLocal()
+        published = db.query(Simulation).filter(Simulation.state == "published").count()
+        company = db.get(Empresa, setup["company_id"])
+        assert results.count(True) == 3
+        assert published == 3
+        assert company.total_simulaciones == 3
+        db.close()
+
+    def test_parallel_admin_creates_respect_limit(self, file_db):
+        SessionLocal, setup = file_db
+
+        results = self._run_parallel(
+            SessionLocal,
+            lambda db: create_company_user(
+                setup["company_id"], CompanyUserCreate(**_admin_payload(setup)), db=db
+            )
+        )
+
+        db = SessionLocal()
+        admins = db.query(CompanyUser).filter(CompanyUser.role == "admin").count()
+        assert results.count(True) == 2
+        assert admins == 2
+        db.close()
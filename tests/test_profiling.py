@@ -0,0 +1,107 @@
+"""
+Tests for Request Profiling
+Admin opt-in, 1-in-N sampling, storage/download and per-route aggregation
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from app.api.v1.auth import create_access_token
+from app.core.config import settings
+from app.core.profiling import StackSampler, aggregate, store
+from app.core.security import hash_password
+from app.models.user import User
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILING_ADMINS", "root")
+    monkeypatch.setattr(store, "directory", str(tmp_path))
+    return tmp_path
+
+
+def _token(db_session, username):
+    db_session.add(User(username=username, email=f"{username}@aurum.ec", hashed_password=hash_password("x")))
+    db_session.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+def test_sampler_keeps_only_endpoint_stacks():
+    def busy_endpoint():
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            sum(range(100))
+
+    sampler = StackSampler({"endpoint": busy_endpoint}, interval_s=0.002)
+    sampler.start()
+    worker = threading.Thread(target=busy_endpoint)
+    worker.start()
+    worker.join()
+    sampler.stop()
+
+    assert sampler.stacks
+    assert all(stack.startswith("test_sampler_keeps_only_endpoint_stacks.<locals>.busy_endpoint")
+               for stack in sampler.stacks)
+    print(f"✓ {sum(sampler.stacks.values())} stacks sampled")
+
+
+def test_admin_header_profiles_request(client, db_session, profiling):
+    headers = _token(db_session, "root")
+
+    response = client.get("/api/v1/regions", headers={**headers, "X-Profile": "1"})
+    profile_id = response.headers["x-profile-id"]
+
+    listed = client.get("/api/v1/profiles", headers=headers).json()
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["route"] == "/api/v1/regions"
+    assert listed[0]["trigger"] == "admin"
+
+    download = client.get(f"/api/v1/profiles/{profile_id}", headers=headers)
+    assert download.status_code == 200
+    print("✓ Admin profile stored and downloadable")
+
+
+def test_non_admin_cannot_profile_or_list(client, db_session, profiling):
+    headers = _token(db_session, "visitor")
+
+    response = client.get("/api/v1/regions?profile=1", headers=headers)
+    assert "x-profile-id" not in response.headers
+    assert client.get("/api/v1/profiles", headers=headers).status_code == 403
+    assert client.get("/api/v1/regions", headers={"X-Profile": "1"}).headers.get("x-profile-id") is None
+
+
+def test_sampling_mode_profiles_one_in_n(client, profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_EVERY_N", 3)
+
+    profiled = [bool(client.get("/api/v1/regions").headers.get("x-profile-id")) for _ in range(9)]
+
+    assert profiled.count(True) == 3
+    assert {m.trigger for m in store.list()} == {"sampling"}
+
+
+def test_aggregate_merges_profiles_per_route(client, profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_EVERY_N", 1)
+    for _ in range(2):
+        client.get("/api/v1/regions")
+    for meta in store.list():
+        with open(profiling / f"{meta.id}.collapsed", "w") as fh:
+            fh.write("GET /api/v1/regions;list_regions (catalogs.py:1) 5\n")
+
+    merged = aggregate(str(profiling))
+
+    assert merged["GET /api/v1/regions"]["GET /api/v1/regions;list_regions (catalogs.py:1)"] == 10
+
+
+def test_prune_keeps_newest_by_mtime(profiling, monkeypatch):
+    monkeypatch.setattr(store, "max_files", 2)
+    for index, profile_id in enumerate(("old", "mid", "new")):
+        for ext in (".json", ".collapsed"):
+            path = profiling / f"{profile_id}{ext}"
+            path.write_text("not parsed")
+            os.utime(path, (1_000 + index, 1_000 + index))
+
+    store.prune()
+
+    assert sorted(p.name for p in profiling.iterdir()) == ["mid.collapsed", "mid.json", "new.collapsed", "new.json"]
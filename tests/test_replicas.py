@@ -0,0 +1,124 @@
+"""
+Tests for Read Replica Routing
+Two SQLite files stand in for primary and replica (not replicated, so each
+read shows which database answered)
+"""
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.db import replicas, session as db_session_module
+from app.db.replicas import ReadYourWritesMiddleware, Replica, ReplicaRouter
+
+
+def make_db(path, marker):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE marker (name TEXT)"))
+        conn.execute(text("INSERT INTO marker VALUES (:name)"), {"name": marker})
+    return engine
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    primary = make_db(tmp_path / "primary.db", "primary")
+    replica_engines = [make_db(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(2)]
+    lags = {engine: 0.0 for engine in replica_engines}
+
+    def probe(engine):
+        if lags[engine] is None:
+            raise ConnectionError("replica down")
+        return lags[engine]
+
+    router = ReplicaRouter(
+        [Replica(f"replica{i}", engine) for i, engine in enumerate(replica_engines)],
+        max_lag_seconds=5, check_interval_seconds=0, lag_probe=probe, background_checks=False,
+    )
+    monkeypatch.setattr(db_session_module, "replica_router", router)
+    monkeypatch.setattr(db_session_module, "SessionLocal", lambda: Session(bind=primary))
+    replicas.install()
+    yield router, lags, replica_engines
+    for engine in [primary, *replica_engines]:
+        engine.dispose()
+
+
+def read_marker():
+    dependency = db_session_module.get_read_db()
+    db = next(dependency)
+    try:
+        return db.execute(text("SELECT name FROM marker")).scalar()
+    finally:
+        dependency.close()
+
+
+def test_reads_round_robin_over_replicas(databases):
+    assert sorted(read_marker() for _ in range(4)) == ["replica0", "replica0", "replica1", "replica1"]
+
+
+def test_lagging_or_down_replicas_are_skipped(databases):
+    router, lags, (first, second) = databases
+
+    lags[first] = 30.0
+    assert {read_marker() for _ in range(3)} == {"replica1"}
+
+    lags[second] = None
+    assert read_marker() == "primary"
+
+    lags[first] = 0.0
+    assert read_marker() == "replica0"
+
+
+def test_reads_never_wait_for_a_slow_health_check(tmp_path):
+    engine = make_db(tmp_path / "slow.db", "slow")
+    release = threading.Event()
+
+    def slow_probe(engine):
+        release.wait(5)
+        return 0.0
+
+    replica = Replica("slow", engine)
+    router = ReplicaRouter([replica], max_lag_seconds=5, check_interval_seconds=60, lag_probe=slow_probe)
+
+    start = time.monotonic()
+    # The first probe runs in the background; until it succeeds reads go to the primary
+    assert [router.choose() for _ in range(3)] == [None] * 3
+    assert time.monotonic() - start < 1
+    release.set()
+    while replica.probe_lock.locked():
+        time.sleep(0.01)
+    assert router.choose() is replica
+    engine.dispose()
+
+
+def test_read_your_writes_cookie(databases):
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/write")
+    def write():
+        db = db_session_module.SessionLocal()
+        db.execute(text("INSERT INTO marker VALUES ('written')"))
+        db.commit()
+        db.close()
+        return {}
+
+    @app.get("/read")
+    def read():
+        return {"marker": read_marker()}
+
+    client = TestClient(app)
+    assert client.get("/read").json()["marker"].startswith("replica")
+    assert replicas.STICKY_COOKIE not in client.get("/read").headers.get("set-cookie", "")
+
+    response = client.post("/write")
+    assert replicas.STICKY_COOKIE in response.headers["set-cookie"]
+    # The client's cookie jar sends it back: reads stick to the primary
+    assert client.get("/read").json()["marker"] == "primary"
+
+    client.cookies.clear()
+    assert client.get("/read").json()["marker"].startswith("replica")
@@ -0,0 +1,89 @@
+"""
+Tests for Simulation Cloning
+POST /simulations/{id}/clone copies the whole tree with INSERT ... SELECT
+"""
+import pytest
+
+from app.models.catalog import ContentCategory
+from app.models.empresa import Empresa
+from app.models.simulations import ModelAnswer, ModuleTask, Simulation, SimulationModule, TaskResource
+from tests.test_updates import captured_statements
+
+
+@pytest.fixture
+def template(client, db_session):
+    company = Empresa(nombre_empresa="Template Co", slug="template-co")
+    category = ContentCategory(name="Templates", slug="templates")
+    db_session.add_all([company, category])
+    db_session.commit()
+    response = client.post("/api/v1/simulations", json={
+        "company_id": company.id, "category_id": category.id,
+        "title": "Banca", "slug": "banca-es", "short_description": "Plantilla",
+        "state": "published",
+        "modules": [
+            {"title": f"Módulo {m}", "order": m, "tasks": [
+                {"title": f"Tarea {m}.{t}", "order": t,
+                 "resources": [{"name": f"Recurso {m}.{t}", "url": "https://x/r.pdf"}],
+                 "model_answer": {"description": f"Respuesta {m}.{t}", "key_learnings": ["a"]}}
+                for t in (1, 2)
+            ]}
+            for m in (1, 2, 3)
+        ],
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def tree(simulation):
+    return [
+        (m["title"], m["order"], [
+            (t["title"], t["order"], [r["name"] for r in t["resources"]], t["model_answer"]["description"])
+            for t in m["tasks"]
+        ])
+        for m in simulation["modules"]
+    ]
+
+
+def test_clone_copies_the_tree_in_set_based_inserts(client, db_session, template):
+    with captured_statements(db_session) as captured:
+        response = client.post(f"/api/v1/simulations/{template['id']}/clone",
+                               json={"slug": "banca-en", "title": "Banking", "language": "en"})
+
+    assert response.status_code == 201, response.text
+    clone = response.json()
+    assert clone["id"] != template["id"]
+    assert (clone["title"], clone["slug"], clone["state"]) == ("Banking", "banca-en", "draft")
+    assert clone["languages"] == ["en"]
+    assert clone["cloned_from_id"] == template["id"]
+    assert tree(clone) == tree(template)
+
+    # One INSERT per table (+ outbox event), independent of the 3x2 tree
+    assert captured.count("INSERT") == 6
+    assert "UPDATE" not in captured
+
+    # New rows everywhere; the source is untouched
+    source_ids = {m["id"] for m in template["modules"]}
+    assert not source_ids & {m["id"] for m in clone["modules"]}
+    assert db_session.query(SimulationModule).count() == 6
+    assert db_session.query(ModuleTask).count() == 12
+    assert db_session.query(TaskResource).count() == 12
+    assert db_session.query(ModelAnswer).count() == 12
+
+
+def test_clone_of_a_clone_remaps_from_its_own_source(client, db_session, template):
+    first = client.post(f"/api/v1/simulations/{template['id']}/clone", json={"slug": "copy-1"}).json()
+    second = client.post(f"/api/v1/simulations/{first['id']}/clone", json={"slug": "copy-2"}).json()
+
+    assert tree(second) == tree(template)
+    assert second["cloned_from_id"] == first["id"]
+    assert db_session.query(ModuleTask).count() == 18
+
+
+def test_clone_errors(client, db_session, template):
+    url = f"/api/v1/simulations/{template['id']}/clone"
+    duplicate = client.post(url, json={"slug": "banca-es"})
+    assert duplicate.status_code == 400
+    assert duplicate.json()["detail"] == "Slug already exists"
+    assert client.post("/api/v1/simulations/999999/clone", json={"slug": "nope"}).status_code == 404
+    assert client.post(url, json={"slug": "other", "company_id": 999999}).status_code == 404
+    assert db_session.query(Simulation).count() == 1
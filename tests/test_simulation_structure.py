@@ -0,0 +1,139 @@
+"""
+Tests for Incremental Structure Edits
+Modules and tasks are added, moved and removed one by one with sparse order keys
+"""
+import pytest
+
+from app.models.catalog import ContentCategory
+from app.models.empresa import Empresa
+from app.models.simulations import ModuleTask, Simulation, SimulationModule, TaskResource
+from app.services.simulation_structure import ORDER_STEP, sparse_orders
+from tests.test_updates import captured_statements
+
+
+@pytest.fixture
+def simulation(db_session):
+    company = Empresa(nombre_empresa="Tree Co", slug="tree-co")
+    category = ContentCategory(name="Trees", slug="trees")
+    db_session.add_all([company, category])
+    db_session.commit()
+    sim = Simulation(company_id=company.id, category_id=category.id, title="Tree",
+                     slug="tree", short_description="Editable structure", state="draft")
+    db_session.add(sim)
+    db_session.commit()
+    return sim
+
+
+def add_module(client, simulation, title, **extra):
+    response = client.post(f"/api/v1/simulations/{simulation.id}/modules", json={"title": title, **extra})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def module_titles(client, simulation):
+    return [m["title"] for m in client.get(f"/api/v1/simulations/{simulation.id}").json()["modules"]]
+
+
+def test_sparse_orders_keep_existing_keys():
+    # New node between two others: only the new one gets a key
+    assert sparse_orders([1024, None, 2048]) == [1024, 1536, 2048]
+    # Moving the last node to the front keeps the other keys
+    assert sparse_orders([3072, 1024, 2048]) == [512, 1024, 2048]
+    # No room between dense keys: the whole list is renumbered
+    assert sparse_orders([1, None, 2]) == [ORDER_STEP, 2 * ORDER_STEP, 3 * ORDER_STEP]
+    assert sparse_orders([None, None]) == [ORDER_STEP, 2 * ORDER_STEP]
+
+
+def test_insert_between_modules_touches_no_sibling(client, db_session, simulation):
+    first = add_module(client, simulation, "First")
+    last = add_module(client, simulation, "Last")
+    assert (first["order"], last["order"]) == (ORDER_STEP, 2 * ORDER_STEP)
+
+    with captured_statements(db_session) as captured:
+        middle = add_module(client, simulation, "Middle", position=1,
+                            tasks=[{"title": "Read", "resources": [{"name": "Deck", "url": "https://x/deck.pdf"}]}])
+
+    assert middle["order"] == ORDER_STEP + ORDER_STEP // 2
+    assert middle["tasks"][0]["resources"][0]["name"] == "Deck"
+    # Only the simulation version bump is an UPDATE: siblings keep their keys
+    assert captured.count("UPDATE") == 1
+    assert module_titles(client, simulation) == ["First", "Middle", "Last"]
+
+
+def test_reorder_is_one_statement(client, db_session, simulation):
+    ids = [add_module(client, simulation, title)["id"] for title in ("A", "B", "C", "D")]
+    url = f"/api/v1/simulations/{simulation.id}/modules/order"
+
+    with captured_statements(db_session) as captured:
+        response = client.put(url, json={"ids": [ids[3], ids[0], ids[1], ids[2]]})
+
+    assert response.status_code == 204
+    # Version bump + one UPDATE rewriting only the moved module
+    assert captured.count("UPDATE") == 2
+    assert module_titles(client, simulation) == ["D", "A", "B", "C"]
+    orders = dict(db_session.query(SimulationModule.id, SimulationModule.order).all())
+    assert orders[ids[0]] == ORDER_STEP
+
+    assert client.put(url, json={"ids": ids[:3]}).status_code == 400
+
+
+def test_task_endpoints(client, db_session, simulation):
+    module = add_module(client, simulation, "Tasks")
+    base = f"/api/v1/simulations/{simulation.id}"
+    first = client.post(f"{base}/modules/{module['id']}/tasks", json={"title": "One"}).json()
+    second = client.post(f"{base}/modules/{module['id']}/tasks", json={"title": "Zero", "position": 0}).json()
+    assert second["order"] < first["order"]
+
+    assert client.patch(f"{base}/tasks/{first['id']}", json={"xp_reward": 80}).json()["xp_reward"] == 80
+    assert client.put(f"{base}/modules/{module['id']}/tasks/order",
+                      json={"ids": [first["id"], second["id"]]}).status_code == 204
+    assert client.delete(f"{base}/tasks/{second['id']}").status_code == 204
+    assert client.delete(f"{base}/tasks/{second['id']}").status_code == 404
+    assert client.delete(f"{base}/modules/{module['id']}").status_code == 204
+    assert db_session.query(ModuleTask).count() == 0
+
+
+def test_structure_edits_bump_the_simulation_etag(client, simulation):
+    url = f"/api/v1/simulations/{simulation.id}"
+    etag = client.get(url).headers["etag"]
+
+    response = client.post(f"{url}/modules", json={"title": "Fresh"}, headers={"If-Match": etag})
+    assert response.status_code == 201
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    stale = client.post(f"{url}/modules", json={"title": "Stale"}, headers={"If-Match": etag})
+    assert stale.status_code == 409
+    assert module_titles(client, simulation) == ["Fresh"]
+
+
+@pytest.mark.filterwarnings("error::sqlalchemy.exc.SAWarning")
+def test_tree_patch_writes_only_the_difference(client, db_session, simulation):
+    keep = add_module(client, simulation, "Keep", tasks=[{"title": "Stay"}, {"title": "Travel"}])
+    drop = add_module(client, simulation, "Drop", tasks=[{"title": "Gone", "resources": [{"name": "R", "url": "u"}]}])
+    stay, travel = keep["tasks"]
+    url = f"/api/v1/simulations/{simulation.id}/structure"
+
+    # Same tree back: only the version bump
+    same = {"modules": [{"id": keep["id"]}, {"id": drop["id"]}]}
+    with captured_statements(db_session) as captured:
+        assert client.patch(url, json=same).status_code == 200
+    assert captured.count("UPDATE") == 1
+    assert "DELETE" not in captured and captured.count("INSERT") == 1  # outbox event
+
+    tree = {"modules": [
+        {"title": "New", "tasks": [{"id": travel["id"]}, {"title": "Brand new"}]},
+        {"id": keep["id"], "title": "Kept", "tasks": [{"id": stay["id"]}]},
+    ]}
+    response = client.patch(url, json=tree)
+
+    assert response.status_code == 200, response.text
+    modules = response.json()["modules"]
+    assert [m["title"] for m in modules] == ["New", "Kept"]
+    assert [t["title"] for t in modules[0]["tasks"]] == ["Travel", "Brand new"]
+    assert [t["id"] for t in modules[1]["tasks"]] == [stay["id"]]
+    assert modules[1]["tasks"][0]["order"] == stay["order"]
+    assert db_session.get(SimulationModule, drop["id"]) is None
+    assert db_session.query(TaskResource).count() == 0
+
+    foreign = client.patch(url, json={"modules": [{"id": 999999}]})
+    assert foreign.status_code == 400
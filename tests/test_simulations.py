@@ -116,3 +116,108 @@ class TestSimulations:
         response = client.get(f"/api/v1/simulations/{slug}")
         assert response.status_code == status.HTTP_200_OK
         assert response.json()["slug"] == slug
+
+
+class TestCompanyMetrics:
+
+    def _create_sim(self, client, core_setup, state="draft"):
+        import uuid
+        sim_data = {
+            "title": "Metrics Sim",
+            "slug": f"metrics-{uuid.uuid4().hex[:6]}",
+            "short_description": "Counters",
+            "company_id": core_setup["company_id"],
+            "category_id": core_setup["category_id"],
+            "state": state
+        }
+        response = client.post("/api/v1/simulations", json=sim_data)
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+
+    def _total(self, client, company_id):
+        return client.get(f"/api/v1/empresas/{company_id}").json()["total_simulaciones"]
+
+    def test_counters_follow_simulation_lifecycle(self, client, core_setup):
+        company_id = core_setup["company_id"]
+
+        self._create_sim(client, core_setup, state="published")
+        draft = self._create_sim(client, core_setup)
+        assert self._total(client, company_id) == 1
+
+        client.patch(f"/api/v1/simulations/{draft['id']}", json={"state": "published"})
+        assert self._total(client, company_id) == 2
+
+        client.delete(f"/api/v1/simulations/{draft['id']}")
+        assert self._total(client, company_id) == 1
+
+    def test_reconcile_reports_and_fixes_drift(self, client, db_session, core_setup):
+        from app.models.empresa import Empresa
+        from app.services.company_metrics import reconcile_company_metrics
+
+        company_id = core_setup["company_id"]
+        self._create_sim(client, core_setup, state="published")
+
+        empresa = db_session.get(Empresa, company_id)
+        empresa.total_simulaciones = 7
+        db_session.commit()
+
+        drifts = reconcile_company_metrics(db_session, batch_size=1, apply=False)
+        assert [(d.company_id, d.stored, d.actual) for d in drifts] == [(company_id, 7, 1)]
+        assert self._total(client, company_id) == 7
+
+        reconcile_company_metrics(db_session, batch_size=1)
+        assert self._total(client, company_id) == 1
+        assert reconcile_company_metrics(db_session) == []
+
+
+class TestListIncludes:
+
+    def test_include_company_and_category(self, client, core_setup):
+        import uuid
+        client.post("/api/v1/simulations", json={
+            "title": "Include Sim",
+            "slug": f"include-{uuid.uuid4().hex[:6]}",
+            "short_description": "Embeds",
+            "company_id": core_setup["company_id"],
+            "category_id": core_setup["category_id"]
+        })
+
+        plain = client.get("/api/v1/simulations").json()[0]
+        assert "company" not in plain and "category" not in plain
+
+        response = client.get("/api/v1/simulations", params={"include": "company,category"})
+        assert response.status_code == status.HTTP_200_OK
+        item = response.json()[0]
+        assert item["company"]["id"] == core_setup["company_id"]
+        assert item["category"]["id"] == core_setup["category_id"]
+
+    def test_include_is_batched(self, client, db_session, core_setup):
+        """Embedding doesn't add per-row queries (1 + N)"""
+        import uuid
+        from sqlalchemy import event
+
+        for i in range(5):
+            client.post("/api/v1/simulations", json={
+                "title": f"Batch Sim {i}",
+                "slug": f"batch-{uuid.uuid4().hex[:6]}",
+                "short_description": "Embeds",
+                "company_id": core_setup["company_id"],
+                "category_id": core_setup["category_id"]
+            })
+        db_session.expunge_all()
+
+        statements = []
+        bind = db_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(bind, "before_cursor_execute", listener)
+        try:
+            response = client.get("/api/v1/simulations", params={"include": "company,category"})
+        finally:
+            event.remove(bind, "before_cursor_execute", listener)
+
+        assert len(response.json()) == 5
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    def test_unknown_include_is_rejected(self, client):
+        response = client.get("/api/v1/simulations", params={"include": "modules"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
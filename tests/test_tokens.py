@@ -0,0 +1,89 @@
+"""
+Tests for JWT Signing
+ES256 tokens, kid rotation and the JWKS endpoint
+"""
+import json
+from datetime import timedelta
+
+import pytest
+from jose import JWTError, jwt
+
+from app.core import tokens
+
+
+@pytest.fixture
+def key_set(tmp_path):
+    return tokens.KeySet(str(tmp_path), reload_seconds=0)
+
+
+def test_sign_and_verify_with_generated_key(key_set, tmp_path):
+    token = key_set.sign({"sub": "ana"})
+
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "ES256"
+    assert header["kid"] == key_set.signing.kid
+    assert key_set.verify(token)["sub"] == "ana"
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_rotation_keeps_old_tokens_valid_until_pruned(key_set, tmp_path):
+    old_token = key_set.sign({"sub": "ana"})
+    old_kid = key_set.signing.kid
+
+    new_kid = tokens.generate_key(str(tmp_path))
+    new_token = key_set.sign({"sub": "ana"})
+
+    assert jwt.get_unverified_header(new_token)["kid"] == new_kid != old_kid
+    assert key_set.verify(old_token)["sub"] == "ana"
+
+    assert tokens.prune(str(tmp_path), keep=1) == [old_kid]
+    with pytest.raises(JWTError):
+        key_set.verify(old_token)
+    assert key_set.verify(new_token)["sub"] == "ana"
+
+
+def test_forged_or_foreign_tokens_are_rejected(key_set, tmp_path):
+    other = tokens.KeySet(str(tmp_path / "other"), reload_seconds=0)
+    foreign = other.sign({"sub": "mallory"})
+
+    with pytest.raises(JWTError):
+        key_set.verify(foreign)
+    with pytest.raises(JWTError):
+        key_set.verify(jwt.encode({"sub": "mallory"}, "secret", algorithm="HS256"))
+
+
+def test_jwks_endpoint_lets_others_verify_locally(client):
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    jwks = response.json()
+    assert all("d" not in key for key in jwks["keys"])
+
+    client.post("/api/v1/users", json={"username": "jwks", "email": "jwks@aurum.ec", "password": "secret123"})
+    token = client.post("/token", data={"username": "jwks", "password": "secret123"}).json()["access_token"]
+    assert jwt.decode(token, jwks, algorithms=["ES256"])["sub"] == "jwks"
+
+    cached = client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_rotated_key_is_published_before_it_signs(key_set, tmp_path):
+    current_kid = jwt.get_unverified_header(key_set.sign({"sub": "ana"}))["kid"]
+    pending_kid = tokens.generate_key(str(tmp_path), activate_after=300)
+    key_set.refresh(force=True)
+
+    # In the JWKS right away, but the current key keeps signing until activation
+    assert pending_kid in {key["kid"] for key in json.loads(key_set.jwks_body)["keys"]}
+    assert jwt.get_unverified_header(key_set.sign({"sub": "ana"}))["kid"] == current_kid
+
+    later = tokens.activation_time(pending_kid) + timedelta(seconds=1)
+    assert key_set.signing_key_at(later).kid == pending_kid
+
+
+def test_production_requires_a_configured_key(tmp_path):
+    key_set = tokens.KeySet(str(tmp_path / "missing"), reload_seconds=0, autogenerate=False)
+
+    with pytest.raises(tokens.MissingSigningKeyError):
+        key_set.refresh()
+    assert not (tmp_path / "missing").exists()
@@ -0,0 +1,140 @@
+"""
+Tests for Atomic Uniqueness
+Creates rely on unique indexes (no SELECT first) and map violations to 400
+"""
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, status
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.empresas import crear_empresa
+from app.api.v1.users import create_user
+from app.db.base import Base
+from app.models.empresa import Empresa
+from app.models.user import User
+from app.repositories.unique import violated_columns
+from app.schemas.empresa import EmpresaCreate
+from app.schemas.user import UserCreate
+
+WORKERS = 8
+
+
+@pytest.fixture
+def file_sessions(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'unique.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def _run_parallel(SessionLocal, fn):
+    def attempt(i):
+        db = SessionLocal()
+        try:
+            fn(db, i)
+            return None
+        except HTTPException as exc:
+            return exc
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        return list(pool.map(attempt, range(WORKERS)))
+
+
+def test_concurrent_user_creates_keep_one(file_sessions):
+    results = _run_parallel(file_sessions, lambda db, i: create_user(
+        UserCreate(username=f"racer{i}", email="race@aurum.ec", password="secret123"), db=db
+    ))
+
+    errors = [r for r in results if r is not None]
+    assert len(errors) == WORKERS - 1
+    assert {(e.status_code, e.detail) for e in errors} == {(400, "Email ya registrado")}
+    db = file_sessions()
+    assert db.query(User).filter(User.email == "race@aurum.ec").count() == 1
+    db.close()
+
+
+def test_concurrent_empresa_creates_keep_one(file_sessions):
+    results = _run_parallel(file_sessions, lambda db, i: crear_empresa(
+        EmpresaCreate(nombre_empresa="Race SA", slug=f"race-sa-{i}"), db=db
+    ))
+
+    assert sum(r is None for r in results) == 1
+    assert {r.detail for r in results if r is not None} == {"Empresa ya existe"}
+    db = file_sessions()
+    assert db.query(Empresa).count() == 1
+    db.close()
+
+
+def test_create_user_skips_uniqueness_selects(client, db_session):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split()[0].upper()
+        if verb in ("SELECT", "INSERT", "UPDATE"):
+            statements.append(verb)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = client.post("/api/v1/users", json={
+            "username": "solo", "email": "solo@aurum.ec", "password": "secret123"
+        })
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    # INSERT first, then the refresh SELECT; no SELECT ... WHERE email/username
+    assert statements[0] == "INSERT"
+    assert statements.count("SELECT") == 1
+
+
+def test_duplicate_username_maps_to_message(client):
+    payload = {"username": "dup", "email": "one@aurum.ec", "password": "secret123"}
+    assert client.post("/api/v1/users", json=payload).status_code == 201
+
+    response = client.post("/api/v1/users", json={**payload, "email": "two@aurum.ec"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username ya tomado"
+
+
+def test_duplicate_simulation_slug(client, db_session):
+    from app.models.catalog import ContentCategory
+
+    company = Empresa(nombre_empresa="Slug Co", slug="slug-co")
+    category = ContentCategory(name="Slugs", slug="slugs")
+    db_session.add_all([company, category])
+    db_session.commit()
+    payload = {
+        "company_id": company.id, "category_id": category.id, "title": "Sim",
+        "slug": "same-slug", "short_description": "Short description for sim",
+    }
+
+    assert client.post("/api/v1/simulations", json=payload).status_code == 201
+    response = client.post("/api/v1/simulations", json=payload)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Slug already exists"
+
+
+def test_violated_columns_from_postgres_errors():
+    class Orig(Exception):
+        diag = SimpleNamespace(constraint_name="ix_users_username")
+
+    by_name = IntegrityError("INSERT", {}, Orig("duplicate key value violates unique constraint"))
+    by_detail = IntegrityError("INSERT", {}, Exception(
+        'duplicate key value violates unique constraint "users_email_key"\n'
+        'DETAIL:  Key (email)=(a@aurum.ec) already exists.'
+    ))
+
+    assert violated_columns(by_name) == ["username"]
+    assert violated_columns(by_detail) == ["email"]
@@ -0,0 +1,172 @@
+"""
+Tests for Partial Updates
+PATCH/PUT endpoints issue a single UPDATE ... RETURNING
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.models.catalog import ContentCategory
+from app.models.empresa import Empresa
+from app.models.simulations import Simulation
+from app.models.user import User
+from app.models.usuarios_empresa import CompanyUser
+
+
+@contextmanager
+def captured_statements(db_session):
+    """SQL verbs sent while the block runs (transaction control excluded)"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split()[0].upper()
+        if verb in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+            statements.append(verb)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+@pytest.fixture
+def simulation(db_session):
+    company = Empresa(nombre_empresa="Update Co", slug="update-co")
+    category = ContentCategory(name="Updates", slug="updates")
+    db_session.add_all([company, category])
+    db_session.commit()
+    sim = Simulation(company_id=company.id, category_id=category.id, title="Old",
+                     slug="old", short_description="Before the update", state="draft")
+    db_session.add(sim)
+    db_session.commit()
+    return sim
+
+
+def test_patch_simulation_is_one_update(client, db_session, simulation):
+    url = f"/api/v1/simulations/{simulation.id}"
+    with captured_statements(db_session) as captured:
+        response = client.patch(url, json={"title": "New"})
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "New"
+    # UPDATE ... RETURNING, then only the lazy load of `modules` for the response
+    assert captured[0] == "UPDATE"
+    assert captured.count("UPDATE") == 1
+    assert captured.count("SELECT") == 1
+    print(f"✓ Statements: {captured}")
+
+
+def test_patch_state_reads_old_state_once(client, simulation):
+    response = client.patch(f"/api/v1/simulations/{simulation.id}", json={"state": "published"})
+
+    assert response.status_code == 200
+    assert response.json()["state"] == "published"
+    company = client.get(f"/api/v1/empresas/{simulation.company_id}").json()
+    assert company["total_simulaciones"] == 1
+
+
+def test_put_empresa_is_one_update(client, db_session):
+    empresa = Empresa(nombre_empresa="Stamp Co", slug="stamp-co")
+    db_session.add(empresa)
+    db_session.commit()
+    url = f"/api/v1/empresas/{empresa.id}"
+
+    with captured_statements(db_session) as captured:
+        response = client.put(url, json={"ciudad": "Cuenca"})
+
+    assert response.status_code == 200
+    assert response.json()["ciudad"] == "Cuenca"
+    assert response.json()["actualizado_en"] is not None
+    # The UPDATE plus its outbox event, no SELECT
+    assert captured == ["UPDATE", "INSERT"]
+
+
+@pytest.mark.parametrize("url,payload", [
+    ("/api/v1/simulations/999999", {"title": "x"}),
+    ("/api/v1/simulations/999999", {"state": "published"}),
+    ("/api/v1/users/999999", {"full_name": "x"}),
+])
+def test_missing_rows_return_404(client, url, payload):
+    method = client.put if url.startswith("/api/v1/users") else client.patch
+    assert method(url, json=payload).status_code == 404
+
+
+def test_put_empresa_missing_and_duplicate_name(client, db_session):
+    db_session.add_all([
+        Empresa(nombre_empresa="Taken", slug="taken"),
+        Empresa(nombre_empresa="Mine", slug="mine"),
+    ])
+    db_session.commit()
+    mine = db_session.query(Empresa).filter_by(slug="mine").one()
+
+    assert client.put("/api/v1/empresas/999999", json={"ciudad": "Loja"}).status_code == 404
+    response = client.put(f"/api/v1/empresas/{mine.id}", json={"nombre_empresa": "Taken"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Empresa ya existe"
+
+
+def test_update_company_user_scoped_to_company(client, db_session):
+    company = Empresa(nombre_empresa="Scope Co", slug="scope-co")
+    other = Empresa(nombre_empresa="Other Co", slug="other-co")
+    db_session.add_all([company, other])
+    db_session.commit()
+    user = CompanyUser(company_id=company.id, email="scoped@co.ec", password_hash="x",
+                       full_name="Scoped", role="viewer")
+    db_session.add(user)
+    db_session.commit()
+
+    wrong = client.patch(f"/api/v1/companies/{other.id}/users/{user.id}", json={"full_name": "Hacked"})
+    right = client.patch(f"/api/v1/companies/{company.id}/users/{user.id}", json={"full_name": "Renamed"})
+
+    assert wrong.status_code == 404
+    assert right.status_code == 200
+    assert right.json()["full_name"] == "Renamed"
+
+
+def test_update_user_returns_new_values(client, db_session):
+    user = User(username="upd", email="upd@aurum.ec", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.put(f"/api/v1/users/{user.id}", json={"full_name": "Actualizado"})
+
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Actualizado"
+    assert response.json()["updated_at"] is not None
+
+
+def test_if_match_rejects_stale_edits(client, db_session, simulation):
+    url = f"/api/v1/simulations/{simulation.id}"
+    etag = client.get(url).headers["etag"]
+
+    first = client.patch(url, json={"title": "First editor"}, headers={"If-Match": etag})
+    assert first.status_code == 200
+    assert first.headers["etag"] != etag
+
+    # The second editor still holds the old ETag: 409, nothing written
+    second = client.patch(url, json={"title": "Second editor"}, headers={"If-Match": etag})
+    assert second.status_code == 409
+    assert client.get(url).json()["title"] == "First editor"
+
+    # Retrying with the fresh ETag goes through; no If-Match keeps last-write-wins
+    assert client.patch(url, json={"title": "Retried"}, headers={"If-Match": first.headers["etag"]}).status_code == 200
+    assert client.patch(url, json={"title": "Unconditional"}).status_code == 200
+    db_session.expire_all()
+    assert db_session.get(Simulation, simulation.id).version == 4
+
+
+def test_if_match_on_empresa_and_missing_rows(client, db_session):
+    empresa = Empresa(nombre_empresa="Match Co", slug="match-co")
+    db_session.add(empresa)
+    db_session.commit()
+    url = f"/api/v1/empresas/{empresa.id}"
+
+    assert client.put(url, json={"ciudad": "Loja"}, headers={"If-Match": '"not-ours"'}).status_code == 409
+    etag = client.get(url).headers["etag"]
+    assert client.put(url, json={"ciudad": "Loja"}, headers={"If-Match": etag}).status_code == 200
+    assert client.put(url, json={"ciudad": "Ambato"}, headers={"If-Match": "*"}).status_code == 200
+    # A missing row is still a 404, whatever the If-Match
+    assert client.put("/api/v1/empresas/999999", json={"ciudad": "Loja"}, headers={"If-Match": etag}).status_code == 404